@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import time
+
+from persistence import shard_path
+
+SNAPSHOT_FILE = "cashout_aggregates.json"
+
+# count, loaded, redeemed, tip, game, paid (amounts in cents)
+FIELDS = ("count", "loaded", "redeemed", "tip", "game", "paid")
+
+SECONDS_PER_DAY = 86400
+
+
+def day_of(timestamp):
+    """UTC day number of a unix timestamp"""
+    return int(timestamp // SECONDS_PER_DAY)
+
+
+def _add(totals, values):
+    for i, value in enumerate(values):
+        totals[i] += value
+
+
+class CashoutAggregates:
+    """Running cashout totals per guild, by UTC day, operator and player.
+
+    Each recorded cashout updates three buckets for its day (the guild
+    total, its operator and its player), so an update is O(1) and a
+    summary only merges the day buckets inside the requested window.
+
+    State survives restarts through a snapshot holding the totals and
+    the highest ledger id they include. ``restore`` loads it and replays
+    only the ledger rows recorded after that id.
+
+    A cluster worker passes its ``shard_ids`` and ``shard_count``. It then
+    keeps its own snapshot file and only counts the guilds its shards
+    own, since the ledger it replays from is shared by all workers. The
+    watermark only moves past rows this process applied or wrote itself.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE, retention_days=400, snapshot_every=500,
+                 shard_ids=None, shard_count=None):
+        self.path = shard_path(path, shard_ids, shard_count)
+        self.shards = None if shard_ids is None or shard_count is None else (frozenset(shard_ids), shard_count)
+        self.retention_days = retention_days
+        self.snapshot_every = snapshot_every
+        self.guilds = {}
+        self.player_names = {}
+        self.watermark = 0
+        self._since_snapshot = 0
+        self._snapshot_task = None
+
+    def owns(self, guild_id):
+        """Whether this process's shards receive the guild's events"""
+        if self.shards is None:
+            return True
+        shard_ids, shard_count = self.shards
+        return (guild_id >> 22) % shard_count in shard_ids
+
+    def _day(self, guild_id, day):
+        days = self.guilds.get(guild_id)
+        if days is None:
+            days = self.guilds[guild_id] = {}
+        bucket = days.get(day)
+        if bucket is None:
+            bucket = days[day] = {"total": [0] * len(FIELDS), "operator": {}, "player": {}}
+        return bucket
+
+    def apply_row(self, row):
+        """Fold one ledger row (as queued by CashoutLedger.record) into the totals"""
+        (guild_id, created_at, operator_id, player_name, player_key, _cashtag, _cashtag_key,
+         loaded, redeemed, tip, game, paid) = row
+        values = (1, loaded, redeemed, tip, game, paid)
+        bucket = self._day(guild_id, day_of(created_at))
+
+        _add(bucket["total"], values)
+        operator_totals = bucket["operator"].get(operator_id)
+        if operator_totals is None:
+            operator_totals = bucket["operator"][operator_id] = [0] * len(FIELDS)
+        _add(operator_totals, values)
+        player_totals = bucket["player"].get(player_key)
+        if player_totals is None:
+            player_totals = bucket["player"][player_key] = [0] * len(FIELDS)
+        _add(player_totals, values)
+
+        self.player_names.setdefault(guild_id, {})[player_key] = player_name
+        self._since_snapshot += 1
+
+    def summary(self, guild_id, days=1, group_by=None, now=None):
+        """Totals over the last ``days`` UTC days (today included).
+
+        Returns a dict of field -> value, or with ``group_by`` set to
+        "operator" or "player", a dict of key -> such a dict.
+        """
+        today = day_of(now if now is not None else time.time())
+        guild_days = self.guilds.get(guild_id, {})
+        merged = [0] * len(FIELDS) if group_by is None else {}
+        for day in range(today - days + 1, today + 1):
+            bucket = guild_days.get(day)
+            if bucket is None:
+                continue
+            if group_by is None:
+                _add(merged, bucket["total"])
+                continue
+            for key, values in bucket[group_by].items():
+                totals = merged.get(key)
+                if totals is None:
+                    totals = merged[key] = [0] * len(FIELDS)
+                _add(totals, values)
+
+        if group_by is None:
+            return dict(zip(FIELDS, merged))
+        return {key: dict(zip(FIELDS, values)) for key, values in merged.items()}
+
+    def player_name(self, guild_id, player_key):
+        return self.player_names.get(guild_id, {}).get(player_key, player_key)
+
+    def _prune(self):
+        oldest = day_of(time.time()) - self.retention_days
+        for days in self.guilds.values():
+            for day in [day for day in days if day < oldest]:
+                del days[day]
+
+    def _encode(self):
+        return json.dumps({
+            "watermark": self.watermark,
+            "guilds": {
+                str(guild_id): {
+                    str(day): {
+                        "total": bucket["total"],
+                        "operator": {str(k): v for k, v in bucket["operator"].items()},
+                        "player": bucket["player"],
+                    }
+                    for day, bucket in days.items()
+                }
+                for guild_id, days in self.guilds.items()
+            },
+            "player_names": {str(g): names for g, names in self.player_names.items()},
+        }, separators=(",", ":"))
+
+    def _write(self, payload):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        self.watermark = data["watermark"]
+        for guild_id, days in data["guilds"].items():
+            self.guilds[int(guild_id)] = {
+                int(day): {
+                    "total": bucket["total"],
+                    "operator": {int(k): v for k, v in bucket["operator"].items()},
+                    "player": bucket["player"],
+                }
+                for day, bucket in days.items()
+            }
+        for guild_id, names in data["player_names"].items():
+            self.player_names[int(guild_id)] = names
+
+    def restore(self, ledger):
+        """Load the snapshot and replay ledger rows recorded after it"""
+        self._load()
+        replayed = 0
+        for ledger_id, row in ledger.rows_after(self.watermark):
+            if not self.owns(row[0]):
+                continue
+            self.apply_row(row)
+            self.watermark = ledger_id
+            replayed += 1
+        self._prune()
+        self._since_snapshot = replayed
+        return replayed
+
+    async def snapshot(self, ledger):
+        """Write a snapshot consistent with the ledger's persisted rows"""
+        # Everything applied so far must be in the ledger before the
+        # watermark is taken; loop until no record slipped in meanwhile.
+        await ledger.flush()
+        while ledger.pending:
+            await ledger.flush()
+        self.watermark = max(self.watermark, ledger.written_id)
+        self._prune()
+        payload = self._encode()
+        self._since_snapshot = 0
+        await asyncio.to_thread(self._write, payload)
+
+    def maybe_snapshot(self, ledger):
+        """Schedule a snapshot once enough rows were applied since the last one"""
+        if self._since_snapshot < self.snapshot_every:
+            return
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.get_running_loop().create_task(self.snapshot(ledger))
+
+    def snapshot_now(self, ledger):
+        """Synchronous snapshot for shutdown, after the ledger was flushed"""
+        ledger.flush_now()
+        self.watermark = max(self.watermark, ledger.written_id)
+        self._write(self._encode())
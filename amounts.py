@@ -0,0 +1,166 @@
+import re
+from decimal import Decimal
+
+
+class AmountError(ValueError):
+    """An amount that cannot be parsed; the message says why"""
+
+
+AMOUNT_PATTERN = re.compile(
+    r'\s*(?P<sign>-)?\s*[$€£]?\s*'
+    r'(?P<int>\d{1,3}(?:,\d{3})+|\d+)?'
+    r'(?:\.(?P<frac>\d+))?'
+    r'\s*(?P<k>[kK])?\s*'
+)
+ALLOWED_CHARS = frozenset("0123456789,.$€£kK- \t")
+MAX_DECIMALS = 2
+THOUSAND = Decimal(1000)
+ZERO = Decimal(0)
+CENT = Decimal("0.01")
+# The forms people actually type, "$1,500" or "2000.50", skip the full
+# pattern and the group lookups; anything else falls through to it.
+PLAIN_AMOUNT = re.compile(rf'\$?(?:\d{{1,3}}(?:,\d{{3}})+|\d+)(?:\.\d{{1,{MAX_DECIMALS}}})?')
+
+
+def _explain(text):
+    """Find the most specific reason ``text`` is not an amount"""
+    for position, char in enumerate(text):
+        if char not in ALLOWED_CHARS:
+            return f"unexpected character {char!r} at position {position + 1}"
+    sign_index = text.find("-")
+    if sign_index != -1:
+        # Only a single leading '-' is a sign.
+        leading = not text[:sign_index].strip()
+        bad = text.find("-", sign_index + 1) if leading else sign_index
+        if bad != -1:
+            return f"unexpected '-' at position {bad + 1}"
+    if text.count(".") > 1:
+        return "more than one decimal point"
+    if "," in text:
+        return "thousands separators must group exactly three digits, like 1,500"
+    return "not a valid amount"
+
+
+def parse_amount(text, default=None, allow_negative=False):
+    """Parse an amount such as ``15``, ``$1,500.50`` or ``1.5k`` into a Decimal.
+
+    Empty input returns ``default`` when one is given. Raises AmountError
+    with the reason otherwise.
+    """
+    if text is None or not text.strip():
+        if default is not None:
+            return default
+        raise AmountError("an amount is required")
+    if text.isdigit() and text.isascii():
+        return Decimal(text)
+    if PLAIN_AMOUNT.fullmatch(text):
+        return Decimal(text.lstrip("$").replace(",", ""))
+
+    match = AMOUNT_PATTERN.fullmatch(text)
+    if match is None:
+        raise AmountError(_explain(text))
+
+    int_part, frac = match.group("int"), match.group("frac")
+    if int_part is None and frac is None:
+        raise AmountError("no digits found")
+    if frac is not None and len(frac) > MAX_DECIMALS and not match.group("k"):
+        raise AmountError(f"at most {MAX_DECIMALS} decimal places are allowed")
+
+    digits = (int_part or "0").replace(",", "")
+    value = Decimal(f"{digits}.{frac}" if frac is not None else digits)
+    if match.group("k"):
+        value *= THOUSAND
+        if value != value.quantize(CENT):
+            raise AmountError(f"at most {MAX_DECIMALS} decimal places are allowed")
+    if match.group("sign"):
+        if not allow_negative:
+            raise AmountError("negative amounts are not allowed")
+        value = -value
+    return value
+
+
+def parse_many(texts, default=None, allow_negative=False):
+    """Bulk mode: parse many amounts in one pass.
+
+    Returns ``(values, errors)``: ``values`` has one entry per input (None
+    where parsing failed) and ``errors`` lists ``(index, message)``.
+    Plain digit strings, by far the most common input, skip the regex.
+    """
+    values = []
+    errors = []
+    append = values.append
+    for index, text in enumerate(texts):
+        if text.isdigit() and text.isascii():
+            append(Decimal(text))
+            continue
+        try:
+            append(parse_amount(text, default, allow_negative))
+        except AmountError as e:
+            append(None)
+            errors.append((index, str(e)))
+    return values, errors
+
+
+def format_amount(value):
+    """Decimal -> '1500' or '1500.50'"""
+    if value == value.to_integral_value():
+        return str(int(value))
+    return f"{value:.2f}"
+
+
+TIP_GAME_LABEL = re.compile(r'(?i)\b(tip|game)\b\s*[=:]?')
+# Tried in order: "1,500, 20" splits at ", ", "10 5" at the space, "10,5" at the comma.
+BARE_COMMA = re.compile(r',')
+TIP_GAME_SEPARATORS = (re.compile(r',\s+'), re.compile(r'\s+'), BARE_COMMA)
+# After a bare comma, three digits could be a thousands group: "1,500".
+THOUSANDS_GROUP = re.compile(r'\d{3}(?!\d)')
+
+
+def parse_tip_game(s: str):
+    """
+    Accepts things like:
+      "10,5"  -> tip=10, game=5
+      "10, 5" / "10 5"
+      "tip=10 game=5"
+      "tip 10 game 5" / "game: $5 tip: $1,000"
+      "10"    -> tip=10, game=0
+      ""      -> both 0
+    "1,500" could be one amount or tip=1, game=500 and is rejected as
+    ambiguous rather than guessed.
+    Returns (tip:Decimal, game:Decimal); raises AmountError naming the bad part.
+    """
+    s = (s or "").strip()
+    if not s:
+        return ZERO, ZERO
+
+    # ["", "tip", "10 ", "game", "5"]: each label followed by its text.
+    pieces = TIP_GAME_LABEL.split(s)
+    if len(pieces) > 1:
+        if pieces[0]:
+            raise AmountError(f"unexpected text before '{pieces[1]}'")
+        found = {}
+        for key, value in zip(pieces[1::2], pieces[2::2]):
+            key = key.lower()
+            if key in found:
+                raise AmountError(f"'{key}' given more than once")
+            found[key] = value.strip().rstrip(",")
+    else:
+        parts = [s]
+        for separator in TIP_GAME_SEPARATORS:
+            parts = separator.split(s, maxsplit=1)
+            if len(parts) > 1:
+                break
+        if separator is BARE_COMMA and len(parts) > 1 and THOUSANDS_GROUP.match(parts[1]):
+            raise AmountError(
+                f"'{s}' is ambiguous: write a single amount without the comma (like 1500), "
+                f"or separate tip and game with ', ' or a space"
+            )
+        found = {"tip": parts[0], "game": parts[1] if len(parts) > 1 else ""}
+
+    values = []
+    for key in ("tip", "game"):
+        try:
+            values.append(parse_amount(found.get(key), default=ZERO))
+        except AmountError as e:
+            raise AmountError(f"{key.capitalize()}: {e}") from None
+    return tuple(values)
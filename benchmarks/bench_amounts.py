@@ -0,0 +1,129 @@
+"""Throughput and correctness: amounts.py against the old inline parsers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_amounts
+"""
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from amounts import format_amount, parse_amount, parse_many, parse_tip_game
+
+
+def legacy_to_int(s, default=0):
+    """CashoutModal.on_submit's old to_int helper"""
+    s = (s or "").strip()
+    if not s: return default
+    try:
+        return int(''.join(ch for ch in s if ch.isdigit() or ch == '-'))
+    except:
+        return default
+
+
+def legacy_parse_tip_game(s):
+    """The old bot.parse_tip_game"""
+    s = (s or "").strip()
+    if not s:
+        return 0, 0
+    if "," in s:
+        parts = [p.strip() for p in s.split(",", 1)]
+        tip = int(''.join(ch for ch in parts[0] if ch.isdigit() or ch=='-') or "0")
+        game = int(''.join(ch for ch in parts[1] if ch.isdigit() or ch=='-') or "0")
+        return tip, game
+    s_low = s.lower().replace("=", " ").replace("tip", " ").replace("game", " ")
+    nums = [int(''.join(ch for ch in tok if ch.isdigit() or ch=='-') or "0")
+            for tok in s_low.split() if any(c.isdigit() for c in tok)]
+    tip = nums[0] if len(nums) >= 1 else 0
+    game = nums[1] if len(nums) >= 2 else 0
+    return tip, game
+
+
+AMOUNT_CASES = [
+    ("15", "15"),
+    ("$1,500", "1500"),
+    ("$1,500.50", "1500.50"),
+    ("1.5k", "1500"),
+    ("1-2", None),
+    ("1,50", None),
+    ("abc", None),
+    ("12abc", None),
+    ("-5", None),
+]
+
+TIP_GAME_CASES = [
+    ("10,5", ("10", "5")),
+    ("tip=10 game=5", ("10", "5")),
+    ("game 5 tip 10", ("10", "5")),
+    ("$1,000, 20", ("1000", "20")),
+    ("10", ("10", "0")),
+    ("tip 1-2", None),
+]
+
+
+def _outcome(fn, text):
+    try:
+        return fn(text)
+    except ValueError as e:
+        return f"error: {e}"
+
+
+def correctness():
+    print(f"{'input':<16} {'old to_int':>12}  {'new parse_amount'}")
+    wrong = 0
+    for text, expected in AMOUNT_CASES:
+        new = _outcome(parse_amount, text)
+        ok = (new == Decimal(expected)) if expected else isinstance(new, str)
+        wrong += not ok
+        print(f"{text!r:<16} {legacy_to_int(text)!r:>12}  {new if isinstance(new, str) else format_amount(new)}{'' if ok else '   <-- UNEXPECTED'}")
+    print()
+    print(f"{'input':<16} {'old parse_tip_game':>20}  {'new parse_tip_game'}")
+    for text, expected in TIP_GAME_CASES:
+        new = _outcome(parse_tip_game, text)
+        if expected:
+            ok = not isinstance(new, str) and new == tuple(Decimal(v) for v in expected)
+        else:
+            ok = isinstance(new, str)
+        wrong += not ok
+        shown = new if isinstance(new, str) else tuple(format_amount(v) for v in new)
+        print(f"{text!r:<16} {str(_outcome(legacy_parse_tip_game, text)):>20}  {shown}{'' if ok else '   <-- UNEXPECTED'}")
+    return wrong
+
+
+def measure(label, fn, iterations):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    rate = iterations / (time.perf_counter() - start)
+    print(f"{label:<40} {rate:>12,.0f} ops/s")
+    return rate
+
+
+def throughput(iterations=100_000):
+    inputs = ["15", "$1,500", "100", "$2,000.50", "1.5k", "250"]
+    measure("old to_int (6 amounts)", lambda: [legacy_to_int(t) for t in inputs], iterations // 6)
+    measure("new parse_amount (6 amounts)", lambda: [parse_amount(t) for t in inputs], iterations // 6)
+    measure("new parse_many (6 amounts)", lambda: parse_many(inputs), iterations // 6)
+    measure("old parse_tip_game", lambda: legacy_parse_tip_game("tip=10 game=5"), iterations)
+    measure("new parse_tip_game", lambda: parse_tip_game("tip=10 game=5"), iterations)
+
+    rows = [str(i % 5000) if i % 4 else f"${i % 5000:,}.25" for i in range(100_000)]
+    start = time.perf_counter()
+    values, errors = parse_many(rows)
+    elapsed = time.perf_counter() - start
+    print(f"{'parse_many bulk (100k rows)':<40} {len(rows) / elapsed:>12,.0f} rows/s  ({len(errors)} errors)")
+
+
+def main():
+    wrong = correctness()
+    print()
+    throughput()
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
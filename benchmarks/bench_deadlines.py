@@ -0,0 +1,142 @@
+"""Interaction acknowledgement under slow handlers, with and without the deadline guard.
+
+Each simulated interaction runs a handler whose time to respond follows a
+long-tailed distribution (most fast, some stuck behind rate limits for
+seconds). Unguarded, a reply after Discord's 3 second window is a miss;
+guarded, InteractionDeadlines defers first and the reply becomes a followup.
+Then CashoutModal submissions are pushed through a dispatcher paced at one
+send per five seconds, all in one channel, to check they are acknowledged
+before their sends go out.
+
+    python -m benchmarks.bench_deadlines
+    python -m benchmarks.bench_deadlines --interactions 2000 --slow 0.2
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import discord
+
+from benchmarks.fakes import FakeGuild, FakeInteraction, FakeMember, FakeResponse, FakeTextInput
+from deadlines import ACK_WINDOW, InteractionDeadlines
+
+
+class TimedResponse(FakeResponse):
+    """Records when the interaction was first acknowledged"""
+
+    def __init__(self):
+        super().__init__()
+        self.acked_at = None
+
+    def _ack(self):
+        if self.acked_at is None:
+            self.acked_at = time.perf_counter()
+
+    async def send_message(self, content=None, **kwargs):
+        self._ack()
+        await super().send_message(content, **kwargs)
+
+    async def send_modal(self, modal):
+        self._ack()
+        await super().send_modal(modal)
+
+    async def defer(self, **kwargs):
+        self._ack()
+        await super().defer(**kwargs)
+
+
+def interaction(channel, member):
+    result = FakeInteraction(member, channel)
+    result.created_at = discord.utils.utcnow()
+    result.response = TimedResponse()
+    result.started = time.perf_counter()
+    return result
+
+
+def ack_report(label, interactions):
+    latencies = sorted(i.response.acked_at - i.started for i in interactions)
+    misses = sum(latency > ACK_WINDOW for latency in latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<28} {len(latencies):>6} {latencies[len(latencies) // 2] * 1000:>9.1f} "
+          f"{p99 * 1000:>9.1f} {misses:>7}")
+    return misses
+
+
+async def simulated(count, slow, seed):
+    rng = random.Random(seed)
+    guild = FakeGuild("bench-guild", role_count=1, channel_count=1)
+    channel = next(iter(guild.channels.values()))
+    member = FakeMember(guild, "operator")
+    # Fast replies mostly; ``slow`` of them wait 2-6s, as behind a rate limit.
+    delays = [rng.uniform(2.0, 6.0) if rng.random() < slow else rng.uniform(0.01, 0.3) for _ in range(count)]
+
+    async def handler(interaction, delay):
+        await asyncio.sleep(delay)
+        await interaction.response.send_message("done", ephemeral=True)
+
+    deadlines = InteractionDeadlines()
+    guarded = deadlines.guard("simulated")(handler)
+    results = {}
+    for label, run in (("unguarded", handler), ("guarded", guarded)):
+        interactions = [interaction(channel, member) for _ in delays]
+        await asyncio.gather(*(run(i, d) for i, d in zip(interactions, delays)))
+        results[label] = interactions
+    return results, deadlines
+
+
+async def modal_submissions(count):
+    with tempfile.TemporaryDirectory() as workdir:
+        from benchmarks.harness import World, import_bot
+        from dispatcher import MessageDispatcher
+
+        bot = import_bot(workdir)
+        world = World(bot)
+        bot.dispatcher = MessageDispatcher(channel_rate=1, channel_per=5.0, max_batch=1)
+        interactions = []
+
+        async def submit(n):
+            modal = bot.CashoutModal(bot.template_bot, bot.bot_settings, world.guild)
+            for field, value in (("player_name", f"Player {n}"), ("cashtag", f"$tag{n}"),
+                                 ("loaded_amount", "50"), ("redeemed_amount", "200"),
+                                 ("optional_tip_game", "")):
+                setattr(modal, field, FakeTextInput(value))
+            i = interaction(world.command_channel, world.operator)
+            interactions.append(i)
+            await modal.on_submit(i)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(submit(n) for n in range(count)))
+        elapsed = time.perf_counter() - start
+        bot.ledger.close()
+        bot.bot_settings.close()
+    return interactions, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interactions", type=int, default=1000)
+    parser.add_argument("--slow", type=float, default=0.1, help="fraction of handlers that take 2-6s")
+    parser.add_argument("--modals", type=int, default=3, help="modal submissions behind the paced dispatcher")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results, deadlines = asyncio.run(simulated(args.interactions, args.slow, args.seed))
+    print(f"{'':<28} {'acks':>6} {'p50 ms':>9} {'p99 ms':>9} {'misses':>7}")
+    ack_report("simulated, unguarded", results["unguarded"])
+    guarded_misses = ack_report("simulated, guarded", results["guarded"])
+    print(f"  auto-deferred: {deadlines.auto_deferred}")
+
+    interactions, elapsed = asyncio.run(modal_submissions(args.modals))
+    modal_misses = ack_report("CashoutModal, paced sends", interactions)
+    print(f"  all {args.modals} cashouts sent after {elapsed:.1f}s")
+    return 1 if guarded_misses or modal_misses else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
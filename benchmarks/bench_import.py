@@ -0,0 +1,154 @@
+"""Streaming CSV import: throughput and peak memory by file size.
+
+Feeds generated CSV lines through CashoutImport with the real cashout
+template, ledger and dispatcher (posting to a fake channel). Rows cycle
+through 100 players so the aggregates stay a fixed size; peak traced memory
+should then stay flat as the row count grows.
+
+With ``--paced`` the whole /cashout_import command runs instead, against
+the dispatcher's real Discord rate limits, so rows post at about five a
+second. The interaction token is made to expire after ``--token-ttl``
+seconds rather than 15 minutes; the import must still finish and its
+report must land as a channel message.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --paced 100 --token-ttl 8
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import discord
+
+from benchmarks.fakes import FakeInteraction
+from benchmarks.harness import World, import_bot
+
+
+class ExpiringInteraction(FakeInteraction):
+    """Edits of the original response fail once the token is ``ttl`` seconds old"""
+
+    def __init__(self, user, channel, ttl):
+        super().__init__(user, channel)
+        self.expires = time.monotonic() + ttl
+        self.edits = 0
+        self.rejected = 0
+
+    async def edit_original_response(self, **kwargs):
+        if time.monotonic() >= self.expires:
+            self.rejected += 1
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"),
+                                   {"code": 50027, "message": "Invalid Webhook Token"})
+        self.edits += 1
+
+
+async def generated_lines(rows, bad_every):
+    yield b"player,cashtag,loaded,redeemed,tip,game\r\n"
+    for i in range(rows):
+        if bad_every and i % bad_every == 0:
+            yield f"Player {i % 100},$tag{i % 100},1-2,100,,\r\n".encode()
+        else:
+            yield f'"Player, {i % 100}",$tag{i % 100},"$1,{i % 1000:03d}",2000.50,10,5\r\n'.encode()
+
+
+async def run(bot, world, rows, bad_every):
+    from cashout_import import CashoutImport
+
+    def post_row(values):
+        content, embed = bot.record_cashout(
+            bot.template_bot, world.guild.id, world.operator.id,
+            values["player"], values["cashtag"],
+            values["loaded"], values["redeemed"], values["tip"], values["game"],
+        )
+        return bot.dispatcher.send(world.response_channel, content, role_id=world.notify_role.id, embed=embed)
+
+    async def progress(job):
+        # Flush the ledger as the real bot's write-behind would, so
+        # queued rows do not pile up in memory during the run.
+        await bot.ledger.flush()
+
+    job = CashoutImport(max_in_flight=bot.dispatcher.max_batch * 2, progress_every=0.05)
+    tracemalloc.start()
+    start = time.perf_counter()
+    await job.run(generated_lines(rows, bad_every), post_row, progress)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report = job.error_report()
+    report_lines = report.read().count(b"\n") if report else 0
+    job.close()
+    await bot.ledger.flush()
+    return job, elapsed, peak, report_lines
+
+
+async def run_paced(bot, world, rows, token_ttl):
+    import cashout_import
+    from dispatcher import MessageDispatcher
+
+    bot.dispatcher = MessageDispatcher()
+    # Scale the 15 minute token down to the run; the module globals are
+    # read when the command creates its ImportStatus.
+    cashout_import.TOKEN_LIFETIME = token_ttl
+    cashout_import.TOKEN_MARGIN = min(cashout_import.TOKEN_MARGIN, token_ttl / 4)
+    cashout_import.attachment_lines = lambda file: generated_lines(rows, 0)
+    interaction = ExpiringInteraction(world.operator, world.command_channel, token_ttl)
+    file = SimpleNamespace(filename="paced.csv", url=None)
+
+    posts_before = world.response_channel.sent_count
+    start = time.perf_counter()
+    await bot.cashout_import.callback(interaction, file)
+    elapsed = time.perf_counter() - start
+    await bot.ledger.flush()
+
+    channel = world.command_channel
+    report = channel.last_message.content if channel.last_message else ""
+    print(f"{'rows':>6} {'seconds':>8} {'rows/s':>7} {'messages':>9} {'edits':>6} {'rejected':>9} {'status msgs':>12} {'msg edits':>10}")
+    print(f"{rows:>6} {elapsed:>8.1f} {rows / elapsed:>7.1f} "
+          f"{world.response_channel.sent_count - posts_before:>9} {interaction.edits:>6} "
+          f"{interaction.rejected:>9} {channel.sent_count:>12} "
+          f"{channel.last_message.edits if channel.last_message else 0:>10}")
+    print(f"report in channel: {report.splitlines()[0] if report else 'missing'}")
+    print(f"at {rows / elapsed:.1f} rows/s a 15 minute token covers about {rows / elapsed * 15 * 60:,.0f} rows")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated row counts")
+    parser.add_argument("--bad-every", type=int, default=50, help="make every Nth row invalid (0 for none)")
+    parser.add_argument("--paced", type=int, metavar="ROWS",
+                        help="run /cashout_import on ROWS rows under Discord's rate limits instead")
+    parser.add_argument("--token-ttl", type=float, default=8.0, help="seconds the token lasts with --paced")
+    args = parser.parse_args(argv)
+
+    if args.paced:
+        with tempfile.TemporaryDirectory() as workdir:
+            bot = import_bot(workdir)
+            world = World(bot)
+            report = asyncio.run(run_paced(bot, world, args.paced, args.token_ttl))
+            bot.ledger.close()
+            bot.bot_settings.close()
+        return 0 if report.startswith(f"{world.operator.mention} ✅") else 1
+
+    async def run_all(bot, world):
+        print(f"{'rows':>8} {'rows/s':>10} {'posted':>8} {'failed':>7} {'requests':>9} {'peak KiB':>9}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            requests_before = bot.dispatcher.sent_requests
+            job, elapsed, peak, report_lines = await run(bot, world, size, args.bad_every)
+            assert report_lines == (job.failed + 1 if job.failed else 0)
+            print(f"{size:>8} {size / elapsed:>10,.0f} {job.posted:>8} {job.failed:>7} "
+                  f"{bot.dispatcher.sent_requests - requests_before:>9} {peak / 1024:>9,.0f}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bot = import_bot(workdir)
+        world = World(bot)
+        asyncio.run(run_all(bot, world))
+        bot.ledger.close()
+        bot.bot_settings.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
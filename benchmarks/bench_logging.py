@@ -0,0 +1,133 @@
+"""Caller-side cost of a log call: blocking stream handler against the background queue.
+
+Times each call on the logging thread only; the queue is drained after the
+timed loop, the way the listener thread would write it out while handlers
+keep running. Output goes to a temporary file, then to a stream whose
+writes stall the way a full stdout pipe does.
+
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --calls 200000 --check --budget-us 5
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import jsonlog
+from metrics import MetricsRegistry
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+class StalledStream:
+    """A text stream whose writes take ``delay`` seconds"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def blocking_handler(stream):
+    """main.py's logging.basicConfig setup before the queue"""
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s : %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def instrumented_cost(calls):
+    """Per-call cost of metrics.instrument around a no-op handler"""
+    metrics = MetricsRegistry()
+
+    @metrics.instrument("noop")
+    async def noop(message):
+        pass
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(calls):
+            await noop(None)
+        return (time.perf_counter() - start) / calls * 1e6
+
+    return asyncio.run(run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--stall-ms", type=float, default=1.0, help="write latency of the stalled stream")
+    parser.add_argument("--check", action="store_true", help="exit non-zero if a hot-path call is over budget")
+    parser.add_argument("--budget-us", type=float, default=5.0)
+    args = parser.parse_args(argv)
+    log = logging.getLogger("bench")
+    queued_log = jsonlog.get_logger("bench.queued")
+    extra = {"guild": 1234, "handler": "/cashout", "latency_ms": 12.5}
+    info = lambda i: log.info("cashout posted", extra=extra)
+    debug = lambda i: log.debug("gateway event %d", i)
+    queued_info = lambda i: queued_log.info("cashout posted", extra=extra)
+    queued_debug = lambda i: queued_log.debug("gateway event %d", i)
+
+    results = {}
+    # Calls made from the bot's own hot paths; plain loggers (discord.py,
+    # module-level logging.info) still pay for building a LogRecord.
+    hot_path = ("info, QueuedLogger", "debug while level is INFO", "debug, QueuedLogger 1 in 100",
+                "handler record, pre-sampled")
+    with tempfile.TemporaryFile("w") as stream:
+        blocking_handler(stream)
+        results["info, blocking stream (before)"] = per_call(info, args.calls)
+
+        listener = jsonlog.setup_logging(level=logging.INFO, debug_every=100, stream=stream)
+        results["info, queued record"] = per_call(info, args.calls)
+        results["info, QueuedLogger"] = per_call(queued_info, args.calls)
+        results["debug while level is INFO"] = per_call(debug, args.calls)
+        jsonlog.stop_logging()
+
+        baseline = instrumented_cost(args.calls)
+        jsonlog.setup_logging(level=logging.DEBUG, debug_every=100, stream=stream)
+        results["debug, 1 in 100 kept by filter"] = per_call(debug, args.calls)
+        results["debug, QueuedLogger 1 in 100"] = per_call(queued_debug, args.calls)
+        results["handler record, pre-sampled"] = instrumented_cost(args.calls) - baseline
+        jsonlog.stop_logging()
+
+    # stdout piped to a consumer that has stopped reading for a moment.
+    stalled = StalledStream(args.stall_ms / 1000)
+    stalled_calls = max(1, int(200 / args.stall_ms))
+    blocking_handler(stalled)
+    results[f"info, blocking, {args.stall_ms:g} ms writes"] = per_call(info, stalled_calls)
+    jsonlog.setup_logging(level=logging.INFO, stream=stalled)
+    results[f"info, QueuedLogger, {args.stall_ms:g} ms writes"] = per_call(queued_info, stalled_calls)
+    drain = time.perf_counter()
+    jsonlog.stop_logging()
+    print(f"listener wrote the stalled backlog in {(time.perf_counter() - drain) * 1000:.0f} ms, off the loop")
+
+    print(f"{'call':<40} {'µs/call':>10}")
+    for label, cost in results.items():
+        print(f"{label:<40} {cost:>10.2f}")
+    over = [label for label in hot_path if results[label] > args.budget_us]
+    if args.check and over:
+        print(f"FAILED: over {args.budget_us} µs: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Gateway memory footprint per profile, against synthetic guilds.
+
+Builds a fresh bot for each gateway profile, feeds it GUILD_CREATE and
+MESSAGE_CREATE payloads for a synthetic guild of each size, and reports
+the traced memory it retains. Payload parts Discord only sends for an
+intent (voice states, emojis) are included only when the profile asks
+for them.
+
+    python -m benchmarks.bench_memory
+    python -m benchmarks.bench_memory --members 1000,50000 --check --budget-kib 4096
+"""
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from discord.ext import commands
+
+from benchmarks.fakes import next_id
+from footprint import PROFILES, format_memory_report, gateway_options, memory_report
+
+
+TIMESTAMP = "2024-01-01T00:00:00.000000+00:00"
+
+
+def user_payload(user_id):
+    return {"id": str(user_id), "username": f"user{user_id % 100000}", "discriminator": "0",
+            "global_name": None, "avatar": None}
+
+
+def member_payload(user_id, role_ids):
+    return {"user": user_payload(user_id), "roles": role_ids, "joined_at": TIMESTAMP,
+            "deaf": False, "mute": False, "flags": 0}
+
+
+def guild_payload(member_count, intents):
+    """GUILD_CREATE for a guild of ``member_count`` members"""
+    guild_id = next_id()
+    role_ids = [str(next_id()) for _ in range(min(250, max(5, member_count // 40)))]
+    channels = [
+        {"id": str(next_id()), "type": 0, "name": f"channel-{i}", "position": i,
+         "permission_overwrites": [], "nsfw": False, "parent_id": None}
+        for i in range(50)
+    ]
+    voice = [
+        {"id": str(next_id()), "type": 2, "name": f"voice-{i}", "position": 50 + i,
+         "permission_overwrites": [], "bitrate": 64000, "user_limit": 0, "parent_id": None}
+        for i in range(5)
+    ]
+    # Member ids are first_member + 0..member_count-1; no list of them is
+    # kept, so the benchmark itself does not grow with the guild.
+    first_member = next_id() * 1000
+    payload = {
+        "id": str(guild_id), "name": "bench-guild", "owner_id": str(first_member),
+        "member_count": member_count, "large": member_count > 250, "features": [],
+        "roles": [
+            {"id": role_id, "name": f"role-{i}", "color": 0, "hoist": False, "position": i,
+             "permissions": "0", "managed": False, "mentionable": True}
+            for i, role_id in enumerate(role_ids)
+        ],
+        "channels": channels + voice,
+        # Large guilds only include members Discord considers relevant;
+        # without the members intent that is the voice-connected ones.
+        "members": [],
+        "voice_states": [],
+        "emojis": [],
+        "stickers": [],
+        "threads": [],
+    }
+    if intents.voice_states:
+        for i in range(max(1, member_count // 100)):
+            user_id = first_member + i
+            payload["voice_states"].append({
+                "user_id": str(user_id), "channel_id": voice[i % len(voice)]["id"], "session_id": "s",
+                "deaf": False, "mute": False, "self_deaf": False, "self_mute": False,
+                "self_video": False, "suppress": False, "request_to_speak_timestamp": None,
+            })
+            payload["members"].append(member_payload(user_id, role_ids[:3]))
+    if intents.emojis_and_stickers:
+        payload["emojis"] = [
+            {"id": str(next_id()), "name": f"emoji{i}", "roles": [], "require_colons": True,
+             "managed": False, "animated": False, "available": True}
+            for i in range(50)
+        ]
+    return payload, first_member, role_ids, channels
+
+
+def message_payload(guild_id, channel, author_id, role_ids, n):
+    return {
+        "id": str(next_id()), "channel_id": channel["id"], "guild_id": guild_id,
+        "author": user_payload(author_id), "member": member_payload(author_id, role_ids[:3]),
+        "content": f"message {n} about the weekend plans and nothing in particular",
+        "timestamp": TIMESTAMP, "edited_timestamp": None, "tts": False, "mention_everyone": False,
+        "mentions": [], "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0,
+    }
+
+
+async def measure(profile, member_count, messages):
+    """Traced bytes retained by a bot that saw one guild and ``messages`` messages"""
+    options = gateway_options(profile)
+    gc.collect()
+    tracemalloc.start()
+    bot = commands.AutoShardedBot(command_prefix='!', **options)
+    async with bot:
+        state = bot._connection
+        payload, first_member, role_ids, channels = guild_payload(member_count, options["intents"])
+        state._add_guild_from_data(payload)
+        del payload
+        for n in range(messages):
+            channel = channels[n % len(channels)]
+            author_id = first_member + n * 7919 % member_count
+            state.parse_message_create(message_payload(state.guilds[0].id, channel, author_id, role_ids, n))
+            if n % 100 == 0:
+                await asyncio.sleep(0)  # let dispatched on_message tasks finish
+        await asyncio.sleep(0)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0]
+        report = memory_report()
+        tracemalloc.stop()
+        cached = len(bot.cached_messages)
+    return retained, cached, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", default="1000,10000,100000", help="comma-separated guild sizes")
+    parser.add_argument("--messages", type=int, default=3000, help="MESSAGE_CREATE events per run")
+    parser.add_argument("--top", action="store_true", help="print the top allocation sites of each run")
+    parser.add_argument("--check", action="store_true",
+                        help="exit non-zero unless low_memory retains less than default in every guild")
+    parser.add_argument("--budget-kib", type=int, default=None,
+                        help="with --check, also fail if low_memory retains more than this")
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'members':>8} {'profile':>11} {'retained KiB':>13} {'cached msgs':>12}")
+    for member_count in (int(n) for n in args.members.split(",")):
+        retained = {}
+        for profile in PROFILES:
+            retained[profile], cached, report = asyncio.run(measure(profile, member_count, args.messages))
+            print(f"{member_count:>8} {profile:>11} {retained[profile] / 1024:>13,.0f} {cached:>12}")
+            if args.top:
+                print(format_memory_report(report))
+        if retained["low_memory"] >= retained["default"]:
+            failures.append(f"{member_count} members: low_memory is not smaller than default")
+        if args.budget_kib is not None and retained["low_memory"] > args.budget_kib * 1024:
+            failures.append(f"{member_count} members: low_memory over the {args.budget_kib} KiB budget")
+
+    if args.check and failures:
+        print("\n".join(["", "FAILED:"] + failures))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
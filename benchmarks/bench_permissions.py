@@ -0,0 +1,79 @@
+"""is_bot_admin: the old list scan against AdminIndex, in guilds with many roles.
+
+    python -m benchmarks.bench_permissions
+    python -m benchmarks.bench_permissions --roles 250,1000 --admin-roles 25
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fakes import FakeGuild, FakeMember
+from permissions import AdminIndex
+
+
+def legacy_is_bot_admin(settings, member):
+    """bot.is_bot_admin before the role index"""
+    server_settings = settings.get(str(member.guild.id), {})
+    allowed_roles = server_settings.get("admin_role_ids", [])
+    if not allowed_roles:
+        return member.guild_permissions.administrator
+    return (
+        member.guild_permissions.administrator
+        or any(role.id in allowed_roles for role in member.roles))
+
+
+def build(role_count, admin_roles, member_count, member_roles, seed=0):
+    rng = random.Random(seed)
+    guild = FakeGuild("bench-guild", role_count=role_count, channel_count=1)
+    roles = list(guild.roles.values())
+    settings = {str(guild.id): {"admin_role_ids": [role.id for role in rng.sample(roles, admin_roles)]}}
+    # Mostly non-admins: the worst case, since every role has to be ruled out.
+    members = [
+        FakeMember(guild, f"member-{i}", roles=rng.sample(roles, min(member_roles, role_count)))
+        for i in range(member_count)
+    ]
+    return settings, members
+
+
+def measure(fn, members, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for member in members:
+            fn(member)
+    return rounds * len(members) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--roles", default="100,500,1000", help="comma-separated guild role counts")
+    parser.add_argument("--admin-roles", type=int, default=10)
+    parser.add_argument("--member-roles", type=int, default=100)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    print(f"{'guild roles':>11} {'old checks/s':>13} {'index cold':>12} {'index warm':>12}")
+    for role_count in (int(n) for n in args.roles.split(",")):
+        settings, members = build(role_count, args.admin_roles, args.members, args.member_roles)
+
+        def load(guild_id):
+            return settings.get(str(guild_id), {}).get("admin_role_ids", [])
+
+        expected = [legacy_is_bot_admin(settings, member) for member in members]
+        cold = AdminIndex(load, ttl=0)
+        warm = AdminIndex(load)
+        assert [cold.is_admin(m) for m in members] == expected
+        assert [warm.is_admin(m) for m in members] == expected
+
+        old = measure(lambda m: legacy_is_bot_admin(settings, m), members, args.rounds)
+        cold_rate = measure(cold.is_admin, members, args.rounds)
+        warm_rate = measure(warm.is_admin, members, args.rounds)
+        print(f"{role_count:>11} {old:>13,.0f} {cold_rate:>12,.0f} {warm_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
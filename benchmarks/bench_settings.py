@@ -0,0 +1,90 @@
+"""Settings reads under concurrent writers, and lost-update checking.
+
+Readers take snapshots in a tight loop while writer tasks edit the same
+guild, each holding its edit across an await. Every writer increments a
+counter, so any interleaving that loses an update shows up as a final
+count below the number of edits.
+
+    python -m benchmarks.bench_settings
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from settings_store import GuildSettingsStore, SqliteSettingsBackend
+
+
+GUILD_ID = 1234
+
+
+async def reader(store, stop, counts):
+    reads = 0
+    while not stop.is_set():
+        for _ in range(1000):
+            settings = store.get(GUILD_ID, {})
+            settings.get("notify_role_id")
+            settings.get("response_channel_id")
+        reads += 1000
+        await asyncio.sleep(0)
+    counts.append(reads)
+
+
+async def writer(store, edits):
+    for _ in range(edits):
+        async with store.edit(GUILD_ID) as settings:
+            count = settings.get("counter", 0)
+            await asyncio.sleep(0)  # another writer would interleave here without the lock
+            settings["counter"] = count + 1
+
+
+async def run(store, readers, writers, edits):
+    stop = asyncio.Event()
+    counts = []
+    reader_tasks = [asyncio.create_task(reader(store, stop, counts)) for _ in range(readers)]
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(store, edits) for _ in range(writers)))
+    if not writers:
+        await asyncio.sleep(1.0)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*reader_tasks)
+    await store.flush()
+    return sum(counts) / elapsed, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--edits", type=int, default=500, help="edits per writer")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        store = GuildSettingsStore(SqliteSettingsBackend(os.path.join(workdir, "bench.db")))
+        store[GUILD_ID] = {"notify_role_id": 1, "response_channel_id": 2}
+
+        idle_rate, _ = asyncio.run(run(store, args.readers, 0, 0))
+        busy_rate, elapsed = asyncio.run(run(store, args.readers, args.writers, args.edits))
+        expected = args.writers * args.edits
+        counter = store.get(GUILD_ID)["counter"]
+        store.close()
+
+        reopened = GuildSettingsStore(SqliteSettingsBackend(os.path.join(workdir, "bench.db")))
+        persisted = reopened.get(GUILD_ID)["counter"]
+        reopened.close()
+
+    print(f"reads/s, no writers:        {idle_rate:>14,.0f}")
+    print(f"reads/s, {args.writers} writers:          {busy_rate:>14,.0f}")
+    print(f"edits/s, alongside readers: {expected / elapsed:>14,.0f}")
+    print(f"counter: {counter} in memory, {persisted} on disk, {expected} expected")
+    return 0 if counter == persisted == expected else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
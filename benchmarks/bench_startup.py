@@ -0,0 +1,89 @@
+"""Cold start: what each process has to do before it can log in.
+
+Each case runs in a fresh interpreter, as a restart would:
+
+- main.py without a token, which now fails before importing bot.py;
+- importing main.py alone, all a cluster supervisor now loads;
+- importing bot.py, which now leaves settings and the ledger unopened;
+- bot.open_state() against a ledger of ``--rows`` cashouts, after a
+  clean shutdown (aggregates snapshot written by close_state) and after
+  a crash (no snapshot: every row is replayed). main.py runs this in a
+  thread while the login request is in flight.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --rows 200000
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ledger import LEDGER_DB, CashoutLedger
+
+
+OPEN_STATE = f"""
+import sys, time
+sys.path.insert(0, {str(ROOT)!r})
+import bot
+start = time.perf_counter()
+bot.open_state()
+print(time.perf_counter() - start)
+bot.close_state()
+"""
+
+
+def wall_time(args, cwd, env=None):
+    start = time.perf_counter()
+    subprocess.run(args, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def fill_ledger(path, rows):
+    ledger = CashoutLedger(path)
+    row = (1234, time.time(), 42, "Player", "player", "$tag", "$tag", 1500, 10000, 1000, 500, 8500)
+    ledger._write([row] * rows)
+    ledger.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=100_000, help="cashouts in the ledger for open_state")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fill_ledger(os.path.join(workdir, LEDGER_DB), args.rows)
+        no_token = {**os.environ, "DISCORD_TOKEN": ""}
+        cases = {
+            "main.py, no token": ([sys.executable, str(ROOT / "main.py")], no_token),
+            "import main": ([sys.executable, "-c", f"import sys; sys.path.insert(0, {str(ROOT)!r}); import main"], None),
+            "import bot": ([sys.executable, "-c", f"import sys; sys.path.insert(0, {str(ROOT)!r}); import bot"], None),
+        }
+        print(f"{'process':<28} {'median ms':>10} {'min ms':>8}")
+        for label, (command, env) in cases.items():
+            times = [wall_time(command, workdir, env) for _ in range(args.runs)]
+            print(f"{label:<28} {statistics.median(times) * 1000:>10.0f} {min(times) * 1000:>8.0f}")
+
+        for label, crashed in (("open_state, clean restart", False), ("open_state, after a crash", True)):
+            durations = []
+            for _ in range(args.runs):
+                if crashed:
+                    for name in os.listdir(workdir):
+                        if name.endswith(".json"):
+                            os.remove(os.path.join(workdir, name))
+                result = subprocess.run([sys.executable, "-c", OPEN_STATE], cwd=workdir,
+                                        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+                durations.append(float(result.stdout.strip().splitlines()[-1]))
+            print(f"{label:<28} {statistics.median(durations) * 1000:>10.0f} {min(durations) * 1000:>8.0f}"
+                  f"   ({args.rows:,} ledger rows, during login)")
+
+
+if __name__ == "__main__":
+    main()
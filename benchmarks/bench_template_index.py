@@ -0,0 +1,106 @@
+"""Template lookup, autocomplete and "did you mean" with thousands of templates and aliases.
+
+Compares TemplateIndex against what the bot did without it: a dict lookup,
+a ', '.join of every name for the "not found" reply, and (as the obvious
+fuzzy fallback) difflib.get_close_matches over every name and alias.
+"mention" is what a two-edit typo costs on the message path, which only
+looks one edit away.
+
+    python -m benchmarks.bench_template_index
+    python -m benchmarks.bench_template_index --templates 100,1000,10000 --aliases 2
+"""
+import argparse
+import difflib
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from template_engine import compile_template
+from template_index import TemplateIndex
+
+
+SYLLABLES = ("ca", "sh", "out", "dep", "os", "it", "pay", "ment", "re", "fund", "bo", "nus", "tip", "load", "game")
+
+
+def build_templates(count, aliases, seed=0):
+    rng = random.Random(seed)
+    templates = {}
+    while len(templates) < count:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if name in templates:
+            continue
+        alias_names = {name[:rng.randint(2, 4)] + str(rng.randint(0, 99)) for _ in range(aliases)}
+        templates[name] = compile_template(name, "{value}", ["value"], aliases=sorted(alias_names))
+    return templates
+
+
+def typo(word, rng):
+    """``word`` with one character replaced, dropped or doubled"""
+    i = rng.randrange(len(word))
+    edit = rng.choice(("replace", "drop", "double"))
+    if edit == "replace":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    if edit == "drop":
+        return word[:i] + word[i + 1:]
+    return word[:i] + word[i] + word[i:]
+
+
+def per_call(fn, inputs):
+    start = time.perf_counter()
+    for value in inputs:
+        fn(value)
+    return (time.perf_counter() - start) / len(inputs) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--templates", default="100,1000,5000", help="comma-separated template counts")
+    parser.add_argument("--aliases", type=int, default=2, help="aliases per template")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'templates':>9} {'keys':>6} {'build ms':>9} {'resolve':>8} {'complete':>9} "
+          f"{'1 edit':>8} {'2 edits':>8} {'mention':>8} {'difflib':>9} {'join names':>11}   (µs/call)")
+    for count in (int(n) for n in args.templates.split(",")):
+        rng = random.Random(args.seed)
+        templates = build_templates(count, args.aliases, args.seed)
+        start = time.perf_counter()
+        index = TemplateIndex.from_templates(templates)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        keys = index.keys()
+        names = list(templates)
+        words = [rng.choice(keys) for _ in range(args.queries)]
+        prefixes = [word[:rng.randint(1, 3)] for word in words]
+        typos = [typo(rng.choice(names), rng) for _ in range(args.queries)]
+        # Two edits on longer names: these miss the one-edit lookup and walk the trie.
+        long_names = [name for name in names if len(name) >= 8] or names
+        typos2 = [typo(typo(rng.choice(long_names), rng), rng) for _ in range(args.queries // 10)]
+        typos2 = [word for word in typos2 if not index.resolve(word)]
+        for word in words:
+            assert templates[index.resolve(word)] is not None
+
+        resolve = per_call(index.resolve, words)
+        complete = per_call(index.complete, prefixes)
+        suggest = per_call(index.suggest, typos)
+        suggest2 = per_call(index.suggest, typos2)
+        mention = per_call(lambda word: index.suggest(word, max_distance=1), typos2)
+        # difflib is far slower; a sample is enough to time it.
+        close = per_call(lambda word: difflib.get_close_matches(word, keys, n=3), typos[:50])
+        join = per_call(lambda _: ', '.join(names), range(200))
+        print(f"{count:>9} {len(index):>6} {build_ms:>9.1f} {resolve:>8.2f} {complete:>9.2f} "
+              f"{suggest:>8.1f} {suggest2:>8.1f} {mention:>8.1f} {close:>9.0f} {join:>11.1f}")
+
+        found = sum(bool(index.suggest(word)) for word in typos)
+        found2 = sum(bool(index.suggest(word)) for word in typos2)
+        print(f"{'':>9} suggested for {found / len(typos):.0%} of one-edit and {found2 / len(typos2):.0%} "
+              f"of two-edit typos")
+
+
+if __name__ == "__main__":
+    main()
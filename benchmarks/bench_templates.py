@@ -0,0 +1,112 @@
+"""Micro-benchmark: template rendering before and after compiled render plans,
+and the text output mode against the embed prototype.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_templates
+"""
+import json
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.harness import import_bot
+from template_engine import compile_template
+
+
+GUILD_ID = 123456789012345678
+SAMPLE = {
+    "playerName": "Maria Lopez",
+    "loadedAmount": "15",
+    "cashtag": "$pablolose2",
+    "redeemedAmount": "100",
+    "tip": "10",
+    "gameLoad": "5",
+    "payAmount": "85",
+}
+
+
+def legacy_fill_template(bot, template, data, guild_id=None):
+    """The pre-compilation fill_template: regex scan + str.format per call"""
+    placeholders = re.findall(r'\{(\w+)\}', template)
+    filled_data = {}
+    for placeholder in placeholders:
+        if placeholder in data and data[placeholder]:
+            filled_data[placeholder] = data[placeholder]
+        elif placeholder == "role_mention" and guild_id:
+            server_settings = bot.bot_settings.get(str(guild_id), {})
+            role_id = server_settings.get("notify_role_id")
+            filled_data[placeholder] = f"<@&{role_id}>" if role_id else ""
+        else:
+            filled_data[placeholder] = ""
+    try:
+        return template.format(**filled_data)
+    except KeyError as e:
+        return f"Error: Missing field {e}"
+
+
+def measure(label, fn, iterations):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print(f"{label:<12} {rate:>12,.0f} renders/s  ({elapsed / iterations * 1e6:.2f} us/render)")
+    return rate
+
+
+def retained_bytes(fn, count=1000):
+    """Traced bytes held by ``count`` rendered posts, per post"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    posts = [fn() for _ in range(count)]
+    per_post = (tracemalloc.get_traced_memory()[0] - before) / count
+    tracemalloc.stop()
+    del posts
+    return per_post
+
+
+def payload_bytes(content, embed=None):
+    """Size of the JSON body channel.send would POST"""
+    payload = {"content": content or None}
+    if embed is not None:
+        payload["embeds"] = [embed.to_dict()]
+    return len(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode())
+
+
+def main(iterations=200_000):
+    with tempfile.TemporaryDirectory() as workdir:
+        bot = import_bot(workdir)
+        template_bot = bot.template_bot
+        bot.bot_settings[str(GUILD_ID)] = {"notify_role_id": 987654321}
+        source = template_bot.templates["cashout"]
+
+        expected = legacy_fill_template(bot, source, SAMPLE, GUILD_ID)
+        assert template_bot.fill_template("cashout", SAMPLE, GUILD_ID) == expected
+
+        before = measure("before", lambda: legacy_fill_template(bot, source, SAMPLE, GUILD_ID), iterations)
+        after = measure("after", lambda: template_bot.fill_template("cashout", SAMPLE, GUILD_ID), iterations)
+        print(f"speedup      {after / before:.2f}x\n")
+
+        cashout = template_bot.registry.get("cashout")
+        embed_template = compile_template("cashout", source, cashout.fields, output="embed", color=0xF1C40F)
+        resolvers = template_bot.resolvers
+        render_text = lambda: (cashout.render(SAMPLE, resolvers, GUILD_ID), None)
+        render_embed = lambda: embed_template.embed.render(SAMPLE, resolvers, GUILD_ID)
+        for label, render in (("text", render_text), ("embed", render_embed)):
+            measure(label, render, iterations)
+        print(f"\n{'mode':<8} {'payload bytes':>14} {'retained bytes/post':>20}")
+        for label, render in (("text", render_text), ("embed", render_embed)):
+            print(f"{label:<8} {payload_bytes(*render()):>14} {retained_bytes(render):>20,.0f}")
+        bot.ledger.close()
+        bot.bot_settings.close()
+
+
+if __name__ == "__main__":
+    main()
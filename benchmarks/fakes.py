@@ -0,0 +1,182 @@
+"""Minimal stand-ins for the discord.py objects the handlers in bot.py touch.
+
+They implement only the attributes and coroutines the bot uses, and they
+never talk to the network, so handlers can be driven offline at volume.
+Outbound sends are counted rather than stored to keep memory flat.
+"""
+import itertools
+
+
+_ids = itertools.count(100_000_000_000_000_000)
+
+
+def next_id():
+    return next(_ids)
+
+
+class FakePermissions:
+    def __init__(self, administrator=False):
+        self.administrator = administrator
+
+
+class FakeRole:
+    def __init__(self, guild, name, role_id=None):
+        self.id = role_id or next_id()
+        self.name = name
+        self.guild = guild
+
+    @property
+    def mention(self):
+        return f"<@&{self.id}>"
+
+
+class FakeUser:
+    def __init__(self, name, user_id=None, bot=False):
+        self.id = user_id or next_id()
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeMember(FakeUser):
+    def __init__(self, guild, name, roles=(), administrator=False):
+        super().__init__(name)
+        self.guild = guild
+        self.roles = list(roles)
+        self._role_ids = {role.id for role in self.roles}
+        self.guild_permissions = FakePermissions(administrator)
+
+    def get_role(self, role_id):
+        return self.guild.get_role(role_id) if role_id in self._role_ids else None
+
+
+class FakeSentMessage:
+    def __init__(self, channel, content):
+        self.id = next_id()
+        self.channel = channel
+        self.content = content
+        self.edits = 0
+
+    async def edit(self, content=None, **kwargs):
+        self.edits += 1
+        self.content = content
+
+
+class FakeChannel:
+    def __init__(self, guild, name, channel_id=None):
+        self.id = channel_id or next_id()
+        self.name = name
+        self.guild = guild
+        self.sent_count = 0
+        self.last_content = None
+        self.last_message = None
+
+    @property
+    def mention(self):
+        return f"<#{self.id}>"
+
+    async def send(self, content=None, **kwargs):
+        self.sent_count += 1
+        self.last_content = content
+        self.last_message = FakeSentMessage(self, content)
+        return self.last_message
+
+
+class FakeGuild:
+    def __init__(self, name, role_count=5, channel_count=3):
+        self.id = next_id()
+        self.name = name
+        self.roles = {}
+        self.channels = {}
+        for i in range(role_count):
+            self.add_role(f"role-{i}")
+        for i in range(channel_count):
+            self.add_channel(f"channel-{i}")
+
+    def add_role(self, name):
+        role = FakeRole(self, name)
+        self.roles[role.id] = role
+        return role
+
+    def add_channel(self, name):
+        channel = FakeChannel(self, name)
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+class FakeMessage:
+    def __init__(self, content, author, channel, mentions=(), mention_everyone=False):
+        self.id = next_id()
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild if channel is not None else None
+        self.mentions = list(mentions)
+        self.mention_everyone = mention_everyone
+
+
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+        self.sent_count = 0
+        self.last_content = None
+        self.modal = None
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self.sent_count += 1
+        self.last_content = content
+
+    async def send_modal(self, modal):
+        self._done = True
+        self.modal = modal
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent_count = 0
+        self.last_content = None
+
+    async def send(self, content=None, **kwargs):
+        self.sent_count += 1
+        self.last_content = content
+        return FakeSentMessage(None, content)
+
+
+class FakeInteraction:
+    def __init__(self, user, channel):
+        self.id = next_id()
+        self.user = user
+        self.channel = channel
+        self.guild = channel.guild
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+
+class FakeTextInput:
+    """Stand-in for a submitted ui.TextInput"""
+
+    def __init__(self, value=""):
+        self.value = value
@@ -0,0 +1,270 @@
+"""Offline benchmark harness for the handlers in bot.py.
+
+Drives the gateway/app-command handlers with the fakes in
+``benchmarks.fakes`` and reports ops/sec, p50/p99 latency and the peak
+bytes tracemalloc traced during a call (not an allocation count). Nothing touches the network; settings live in a temp dir.
+
+    python -m benchmarks.harness                      # run everything
+    python -m benchmarks.harness --only on_message    # substring filter
+    python -m benchmarks.harness --save benchmarks/baseline.json
+    python -m benchmarks.harness --compare benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fakes import (
+    FakeGuild,
+    FakeInteraction,
+    FakeMember,
+    FakeMessage,
+    FakeTextInput,
+    FakeUser,
+)
+
+
+CASHOUT_BODY = "Maria Lopez\n15\n$pablolose2\n100\n10\n5\n85"
+
+
+def import_bot(workdir):
+    """Import bot.py with its settings files redirected into ``workdir``"""
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import bot
+        bot.open_state()
+    finally:
+        os.chdir(cwd)
+    from dispatcher import MessageDispatcher
+    from settings_store import GuildSettingsStore, SqliteSettingsBackend
+
+    bot.bot_settings.close()
+    bot.bot_settings = GuildSettingsStore(SqliteSettingsBackend(os.path.join(workdir, "bench.db")))
+    bot.bot_settings.subscribe(bot.view_cache.invalidate)
+    bot.bot_settings.subscribe(bot.admin_index.invalidate_guild)
+    bot.recent_cashouts.path = os.path.join(workdir, "dedupe.json")
+    bot.aggregates.path = os.path.join(workdir, "aggregates.json")
+    # Pacing is Discord's concern, not the handlers'; measure without it.
+    bot.dispatcher = MessageDispatcher(channel_rate=10**9, global_rate=10**9)
+    return bot
+
+
+class World:
+    """A synthetic guild with configured settings, members and a bot user"""
+
+    def __init__(self, bot, role_count=20):
+        self.bot = bot
+        self.bot_user = FakeUser("TemplateBot", bot=True)
+        bot.bot._connection.user = self.bot_user
+        bot.message_filter.bot_user_id = None
+
+        self.guild = FakeGuild("bench-guild", role_count=role_count, channel_count=2)
+        self.command_channel, self.response_channel = self.guild.channels.values()
+        roles = list(self.guild.roles.values())
+        self.notify_role = roles[0]
+        self.admin_role = roles[1]
+        self.admin = FakeMember(self.guild, "admin", roles=roles, administrator=True)
+        self.operator = FakeMember(self.guild, "operator", roles=roles[2:])
+
+        bot.bot_settings[self.guild.id] = {
+            "notify_role_id": self.notify_role.id,
+            "admin_role_ids": [self.admin_role.id],
+            "command_channel_id": self.command_channel.id,
+            "response_channel_id": self.response_channel.id,
+        }
+
+    def mention(self, body):
+        return FakeMessage(
+            f"<@{self.bot_user.id}> {body}", self.operator, self.command_channel,
+            mentions=[self.bot_user],
+        )
+
+    def chatter(self):
+        return FakeMessage("just chatting about the weekend", self.operator, self.command_channel)
+
+    def interaction(self, user=None):
+        return FakeInteraction(user or self.admin, self.command_channel)
+
+    def submitted_modal(self):
+        modal = self.bot.CashoutModal(self.bot.template_bot, self.bot.bot_settings, self.guild)
+        modal.player_name = FakeTextInput("Maria Lopez")
+        modal.cashtag = FakeTextInput("$pablolose2")
+        modal.loaded_amount = FakeTextInput("15")
+        modal.redeemed_amount = FakeTextInput("100")
+        modal.optional_tip_game = FakeTextInput("10, 5")
+        return modal
+
+
+def build_cases(world):
+    """name -> (callable returning a value or awaitable)"""
+    bot = world.bot
+    tb = bot.template_bot
+    data = {"playerName": "Maria Lopez", "loadedAmount": "15", "cashtag": "$pablolose2",
+            "redeemedAmount": "100", "tip": "10", "gameLoad": "5", "payAmount": "85"}
+    mention_text = f"<@{world.bot_user.id}> cashout\n{CASHOUT_BODY}"
+    modal = world.submitted_modal()
+    guild_id = world.guild.id
+
+    async def notify_role_cycle():
+        await bot.remove_notify_role.callback(world.interaction())
+        await bot.set_notify_role.callback(world.interaction(), world.notify_role)
+
+    players = itertools.count()
+
+    def fresh_modal():
+        # A new player each time, so the dedupe cache does not flag a repost.
+        modal.player_name = FakeTextInput(f"Player {next(players)}")
+        return modal.on_submit(world.interaction(world.operator))
+
+    async def bot_settings_uncached():
+        bot.view_cache.invalidate(guild_id)
+        await bot.view_settings.callback(world.interaction())
+
+    return {
+        "on_message.chatter": lambda: bot.on_message(world.chatter()),
+        "on_message.cashout": lambda: bot.on_message(world.mention(f"cashout\nPlayer {next(players)}\n{CASHOUT_BODY.split(chr(10), 1)[1]}")),
+        "on_message.cashout.duplicate": lambda: bot.on_message(world.mention(f"cashout\n{CASHOUT_BODY}")),
+        "on_message.unknown_template": lambda: bot.on_message(world.mention("nope")),
+        "CashoutModal.on_submit": fresh_modal,
+        "CashoutModal.on_submit.duplicate": lambda: world.submitted_modal().on_submit(world.interaction(world.operator)),
+        "parse_tip_game": lambda: bot.parse_tip_game("tip=10 game=5"),
+        "TemplateBot.parse_mention_message": lambda: tb.parse_mention_message(mention_text, world.bot_user.id),
+        "TemplateBot.fill_template": lambda: tb.fill_template("cashout", data, guild_id),
+        "is_bot_admin": lambda: bot.is_bot_admin(world.operator),
+        "slash.cashout": lambda: bot.slash_cashout.callback(world.interaction(world.operator)),
+        "slash.set_admin_roles": lambda: bot.set_admin_roles.callback(world.interaction(), world.admin_role),
+        "slash.notify_role_cycle": notify_role_cycle,
+        "slash.set_command_channel": lambda: bot.set_command_channel.callback(world.interaction(), world.command_channel),
+        "slash.set_response_channel": lambda: bot.set_response_channel.callback(world.interaction(), world.response_channel),
+        "slash.bot_settings": lambda: bot.view_settings.callback(world.interaction()),
+        "slash.bot_settings.uncached": bot_settings_uncached,
+        "slash.templates": lambda: bot.slash_templates.callback(world.interaction()),
+        "slash.help": lambda: bot.slash_help.callback(world.interaction()),
+    }
+
+
+async def _call(fn):
+    result = fn()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+async def run_case(fn, iterations, memory_samples):
+    for _ in range(min(100, iterations)):
+        await _call(fn)
+
+    timings = []
+    perf_counter_ns = time.perf_counter_ns
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        t0 = perf_counter_ns()
+        await _call(fn)
+        timings.append(perf_counter_ns() - t0)
+    elapsed = (perf_counter_ns() - start) / 1e9
+    timings.sort()
+
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(memory_samples):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        await _call(fn)
+        peak_total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        "ops_per_sec": iterations / elapsed,
+        "p50_us": _percentile(timings, 0.50) / 1000,
+        "p99_us": _percentile(timings, 0.99) / 1000,
+        "peak_bytes_per_call": peak_total / memory_samples if memory_samples else 0,
+    }
+
+
+async def run(bot, iterations, memory_samples, only=None, role_count=20):
+    world = World(bot, role_count=role_count)
+    results = {}
+    for name, fn in build_cases(world).items():
+        if only and only not in name:
+            continue
+        results[name] = await run_case(fn, iterations, memory_samples)
+    await bot.bot_settings.flush()
+    return results
+
+
+def print_results(results, baseline=None):
+    header = f"{'case':<36} {'ops/s':>12} {'p50 us':>9} {'p99 us':>9} {'peak B/call':>12}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    for name, r in results.items():
+        line = (f"{name:<36} {r['ops_per_sec']:>12,.0f} {r['p50_us']:>9.1f} "
+                f"{r['p99_us']:>9.1f} {r['peak_bytes_per_call']:>12,.0f}")
+        if baseline and name in baseline:
+            line += f" {r['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1:>+8.0%}"
+        print(line)
+
+
+def regressions(results, baseline, tolerance):
+    """Cases whose throughput dropped more than ``tolerance`` below baseline"""
+    return [
+        name for name, r in results.items()
+        if name in baseline and r["ops_per_sec"] < baseline[name]["ops_per_sec"] * (1 - tolerance)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--memory-samples", "--alloc-samples", type=int, default=200,
+                        help="calls traced for peak bytes per call")
+    parser.add_argument("--roles", type=int, default=20, help="roles in the synthetic guild")
+    parser.add_argument("--only", help="only run cases whose name contains this")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare against a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="allowed ops/sec drop vs baseline before failing (default 0.20)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bot = import_bot(workdir)
+        results = asyncio.run(run(bot, args.iterations, args.memory_samples, args.only, args.roles))
+        bot.bot_settings.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": sys.version.split()[0], "iterations": args.iterations,
+                       "results": results}, f, indent=2)
+        print(f"Saved results to {args.save}")
+
+    if baseline:
+        slow = regressions(results, baseline, args.tolerance)
+        if slow:
+            print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
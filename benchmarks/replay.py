@@ -0,0 +1,307 @@
+"""Replay a recorded traffic file through the bot's handlers.
+
+Recordings come from running the bot with RECORD_EVENTS=<path> (see
+recorder.py) or from ``--synthesize``. Events are replayed through
+on_message, the slash command callbacks and CashoutModal.on_submit
+against the stand-ins in ``benchmarks.fakes``, which play the Discord
+REST layer and count every request.
+
+    python -m benchmarks.replay traffic.jsonl.gz                # as fast as possible
+    python -m benchmarks.replay traffic.jsonl.gz --speed 1      # original pacing
+    python -m benchmarks.replay traffic.jsonl.gz --speed 10 --paced
+    python -m benchmarks.replay synthetic.jsonl.gz --synthesize 20000
+"""
+import argparse
+import asyncio
+import contextvars
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fakes import (
+    FakeGuild,
+    FakeInteraction,
+    FakeMember,
+    FakeMessage,
+    FakeTextInput,
+    FakeUser,
+)
+from benchmarks.harness import import_bot
+from recorder import EventRecorder, read_recording
+
+
+MODAL_FIELDS = ("player_name", "cashtag", "loaded_amount", "redeemed_amount", "optional_tip_game")
+
+current_handler = contextvars.ContextVar("current_handler", default=None)
+
+
+def filler(length, words):
+    """Stand-in text of ``length`` characters in ``words`` words, for messages recorded by shape"""
+    words = max(1, min(words, (length + 1) // 2))
+    size, extra = divmod(max(0, length - (words - 1)), words)
+    return " ".join("x" * (size + (i < extra)) for i in range(words))
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class ReplayWorld:
+    """Fake guilds, channels and members created on first sight of an id"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.bot_user = FakeUser("TemplateBot", bot=True)
+        bot.bot._connection.user = self.bot_user
+        bot.message_filter.bot_user_id = None
+        self.guilds = {}
+        self.channels = {}
+        self.members = {}
+
+    def guild(self, guild_id):
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = self.guilds[guild_id] = FakeGuild(f"guild-{len(self.guilds)}", role_count=5, channel_count=0)
+            notify_role = next(iter(guild.roles.values()))
+            self.bot.bot_settings[guild.id] = {"notify_role_id": notify_role.id}
+        return guild
+
+    def channel(self, guild_id, channel_id):
+        channel = self.channels.get((guild_id, channel_id))
+        if channel is None:
+            guild = self.guild(guild_id)
+            channel = self.channels[guild_id, channel_id] = guild.add_channel(f"channel-{len(guild.channels)}")
+        return channel
+
+    def member(self, guild_id, user_id, is_bot=False):
+        member = self.members.get((guild_id, user_id))
+        if member is None:
+            guild = self.guild(guild_id)
+            member = self.members[guild_id, user_id] = FakeMember(guild, f"user-{user_id % 10000}")
+            member.bot = is_bot
+        return member
+
+    def rest_requests(self):
+        return sum(channel.sent_count for channel in self.channels.values())
+
+
+class HandlerStats:
+    __slots__ = ("events", "errors", "latencies", "queued", "responses", "skipped")
+
+    def __init__(self):
+        self.events = 0
+        self.errors = 0
+        self.latencies = []
+        self.queued = 0
+        self.responses = 0
+        self.skipped = 0
+
+
+class Replayer:
+    def __init__(self, bot, world, speed=0.0, concurrency=1000):
+        self.bot = bot
+        self.world = world
+        self.speed = speed
+        self.concurrency = concurrency
+        self.stats = defaultdict(HandlerStats)
+        self.schedule_lag = []
+        self.first_errors = []
+
+        send = bot.dispatcher.send
+
+        async def counted_send(*args, **kwargs):
+            handler = current_handler.get()
+            if handler is not None:
+                self.stats[handler].queued += 1
+            return await send(*args, **kwargs)
+
+        bot.dispatcher.send = counted_send
+
+    def _event(self, record):
+        """(handler name, coroutine, interaction or None) for a record"""
+        world = self.world
+        kind = record["k"]
+        if kind == "message":
+            if record["g"] is None:
+                return None
+            channel = world.channel(record["g"], record["c"])
+            author = world.bot_user if record["own"] else world.member(record["g"], record["u"], record["bot"])
+            if "content" in record:
+                content = record["content"].replace("<@BOT>", f"<@{world.bot_user.id}>")
+            else:
+                content = filler(record["length"], record["words"])
+            message = FakeMessage(
+                content, author, channel,
+                mentions=[world.bot_user] if record["mentions_bot"] else (),
+                mention_everyone=record["everyone"],
+            )
+            return "on_message", self.bot.on_message(message), None
+
+        channel = world.channel(record["g"], record["c"])
+        interaction = FakeInteraction(world.member(record["g"], record["u"]), channel)
+        if kind == "slash":
+            name = f"/{record['name']}"
+            command = self.bot.bot.tree.get_command(record["name"])
+            try:
+                return name, command.callback(interaction), interaction
+            except (AttributeError, TypeError):
+                # Unknown command, or one with required options we cannot fake.
+                self.stats[name].skipped += 1
+                return None
+        if kind == "modal" and record["name"] == "CashoutModal":
+            modal = self.bot.CashoutModal(self.bot.template_bot, self.bot.bot_settings, channel.guild)
+            for field in MODAL_FIELDS:
+                setattr(modal, field, FakeTextInput(record["fields"].get(field, "")))
+            return "CashoutModal.on_submit", modal.on_submit(interaction), interaction
+        self.stats[f"{kind}:{record.get('name')}"].skipped += 1
+        return None
+
+    async def _run_one(self, name, coro, interaction, semaphore):
+        current_handler.set(name)
+        stats = self.stats[name]
+        start = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            stats.errors += 1
+            if len(self.first_errors) < 5:
+                self.first_errors.append(f"{name}: {type(e).__name__}: {e}")
+        finally:
+            stats.latencies.append(time.perf_counter() - start)
+            stats.events += 1
+            if interaction is not None:
+                stats.responses += interaction.response.sent_count + interaction.followup.sent_count
+                if interaction.response.modal is not None:
+                    stats.responses += 1
+            semaphore.release()
+
+    async def run(self, records):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        start = time.perf_counter()
+        for record in records:
+            if self.speed:
+                due = start + record["t"] / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.schedule_lag.append(max(0.0, time.perf_counter() - due))
+            event = self._event(record)
+            if event is None:
+                continue
+            await semaphore.acquire()
+            task = asyncio.create_task(self._run_one(*event, semaphore))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        # Let the dispatcher drain whatever the last handlers queued.
+        while self.bot.dispatcher.stats()["queue_depth"]:
+            await asyncio.sleep(0.01)
+        return time.perf_counter() - start
+
+
+def print_report(replayer, elapsed, rest_requests):
+    print(f"{'handler':<28} {'events':>8} {'ev/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'queued':>7} {'replies':>7} {'errors':>6} {'skipped':>7}")
+    for name, stats in sorted(replayer.stats.items(), key=lambda item: -item[1].events):
+        latencies = sorted(stats.latencies)
+        print(
+            f"{name:<28} {stats.events:>8} {stats.events / elapsed:>10,.0f} "
+            f"{_percentile(latencies, 0.5) * 1000:>8.2f} {_percentile(latencies, 0.99) * 1000:>8.2f} "
+            f"{(latencies[-1] if latencies else 0) * 1000:>8.2f} "
+            f"{stats.queued:>7} {stats.responses:>7} {stats.errors:>6} {stats.skipped:>7}"
+        )
+    events = sum(stats.events for stats in replayer.stats.values())
+    replies = sum(stats.responses for stats in replayer.stats.values())
+    print(f"\n{events} events in {elapsed:.2f}s ({events / elapsed:,.0f}/s); "
+          f"{rest_requests} channel sends + {replies} interaction replies to the REST stand-in")
+    if replayer.schedule_lag:
+        lag = sorted(replayer.schedule_lag)
+        print(f"schedule lag p50 {_percentile(lag, 0.5) * 1000:.2f} ms, p99 {_percentile(lag, 0.99) * 1000:.2f} ms")
+    for error in replayer.first_errors:
+        print(f"  error: {error}")
+
+
+def synthesize(path, events, guilds=20, seconds=600.0, seed=0):
+    """Write a synthetic recording of about ``seconds`` with a plausible mix of traffic"""
+    rng = random.Random(seed)
+    now = [0.0]
+    recorder = EventRecorder(path, keep_words=("cashout",), clock=lambda: now[0])
+    bot_user = FakeUser("TemplateBot", bot=True)
+    worlds = []
+    for g in range(guilds):
+        guild = FakeGuild(f"guild-{g}", role_count=1, channel_count=3)
+        staff = [FakeMember(guild, f"staff-{i}") for i in range(5)]
+        chatters = [FakeMember(guild, f"member-{i}") for i in range(50)]
+        worlds.append((list(guild.channels.values()), staff, chatters))
+    players = [f"Player {i}" for i in range(200)]
+    rate = events * 1.15 / seconds
+
+    for n in range(events):
+        now[0] += rng.expovariate(rate)
+        channels, staff, chatters = rng.choice(worlds)
+        channel = rng.choice(channels)
+        roll = rng.random()
+        player = rng.choice(players)
+        amounts = (rng.randint(10, 500), rng.randint(50, 3000), rng.choice((0, 5, 10)), rng.choice((0, 5)))
+        if roll < 0.75:
+            recorder.message(FakeMessage("chatting about the weekend " * rng.randint(1, 4),
+                                         rng.choice(chatters), channel), bot_user.id, handled=False)
+        elif roll < 0.85:
+            body = f"{player}\n{amounts[0]}\n$tag{player[-3:]}\n{amounts[1]}\n{amounts[2]}\n{amounts[3]}\n"
+            recorder.message(FakeMessage(f"<@{bot_user.id}> cashout\n{body}", rng.choice(staff), channel,
+                                         mentions=[bot_user]), bot_user.id)
+        else:
+            user = rng.choice(staff)
+            interaction = FakeInteraction(user, channel)
+            recorder.slash(interaction, "cashout")
+            # The modal is submitted a little later; 15% of events add this gap.
+            now[0] += rng.expovariate(rate)
+            recorder.modal(interaction, "CashoutModal", {
+                "player_name": player, "cashtag": f"$tag{player[-3:]}",
+                "loaded_amount": f"${amounts[0]:,}", "redeemed_amount": f"${amounts[1]:,}",
+                "optional_tip_game": f"{amounts[2]}, {amounts[3]}",
+            })
+    recorder.flush_now()
+    print(f"Wrote {recorder.recorded} events ({recorder.bytes / 1024:,.0f} KiB before compression) to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help="gzipped JSON-lines recording")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="1 replays at the recorded pace, 10 ten times faster; 0 (default) as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=1000, help="maximum handlers in flight")
+    parser.add_argument("--paced", action="store_true",
+                        help="keep the dispatcher's Discord rate limits instead of sending unpaced")
+    parser.add_argument("--synthesize", type=int, metavar="EVENTS",
+                        help="write a synthetic recording of this many events first")
+    args = parser.parse_args(argv)
+
+    if args.synthesize:
+        synthesize(args.recording, args.synthesize)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        bot = import_bot(workdir)
+        if args.paced:
+            from dispatcher import MessageDispatcher
+            bot.dispatcher = MessageDispatcher()
+        world = ReplayWorld(bot)
+        replayer = Replayer(bot, world, speed=args.speed, concurrency=args.concurrency)
+        elapsed = asyncio.run(replayer.run(read_recording(args.recording)))
+        print_report(replayer, elapsed, world.rest_requests())
+        bot.ledger.close()
+        bot.bot_settings.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
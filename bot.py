@@ -3,70 +3,209 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from discord import ui, TextStyle, Embed
-import re
-import json
+import aiohttp
+import logging
+import math
 import os
+import time
 
+from aggregates import SNAPSHOT_FILE as AGGREGATES_SNAPSHOT, CashoutAggregates
+from amounts import ZERO, AmountError, format_amount, parse_amount, parse_tip_game
+from deadlines import InteractionDeadlines
+from dedupe import DEDUPE_FILE, DedupeCache, cashout_fingerprint
+from dispatcher import MAX_CONTENT_LENGTH, MessageDispatcher
+from footprint import gateway_options, rss_bytes
+from ledger import LEDGER_DB, CashoutLedger, format_cents
+from message_filter import COMMAND, MENTION, MessageFilter, mention_pattern
+from metrics import MetricsRegistry
+from permissions import AdminIndex
+from persistence import shard_path
+from recorder import EventRecorder
+from settings_store import GuildSettingsStore, JsonSettingsBackend, SqliteSettingsBackend
+from startup import sync_command_tree, timer as startup_timer
+from template_engine import compile_template
+from template_registry import TemplateRegistry
+from view_cache import ViewCache
 
 
 
 
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
 SETTINGS_FILE = "bot_settings.json"
+SETTINGS_DB = "bot_settings.db"
+
+# "sqlite" (default) or "json" for the original single-file store
+SETTINGS_BACKEND = os.environ.get("SETTINGS_BACKEND", "sqlite")
+
+# "default", or "low_memory" for minimal intents and no member/message caches
+GATEWAY_PROFILE = os.environ.get("GATEWAY_PROFILE", "default")
+
+# Path of an anonymized traffic recording for benchmarks/replay.py; unset disables it
+RECORD_EVENTS = os.environ.get("RECORD_EVENTS")
+RECORD_SAMPLE = float(os.environ.get("RECORD_SAMPLE", "1"))
+
+# Longest template list shown in "not found" replies; /template autocompletes the rest.
+# Help and /templates list as many as fit in one message.
+MAX_LISTED_TEMPLATES = 50
 
 
 ADMIN_ROLE_IDS = []
 
 def load_settings():
-    """Load bot settings from file"""
-    if os.path.exists(SETTINGS_FILE):
-        with open(SETTINGS_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+    """Open the configured settings store"""
+    if SETTINGS_BACKEND == "json":
+        backend = JsonSettingsBackend(SETTINGS_FILE)
+    else:
+        backend = SqliteSettingsBackend(SETTINGS_DB, migrate_from=SETTINGS_FILE)
+    return GuildSettingsStore(backend)
+
+
 
-def save_settings(settings):
-    """Save bot settings to file"""
-    with open(SETTINGS_FILE, 'w') as f:
-        json.dump(settings, f, indent=2)
+# AutoShardedBot runs a single shard for small bots; main.py may set
+# shard_count/shard_ids before start for sharded and cluster mode.
+bot = commands.AutoShardedBot(command_prefix='!', **gateway_options(GATEWAY_PROFILE))
+message_filter = MessageFilter(prefix='!')
+dispatcher = MessageDispatcher()
+metrics = MetricsRegistry()
+deadlines = InteractionDeadlines()
+recorder = EventRecorder(sample_rate=RECORD_SAMPLE)
+view_cache = ViewCache()
+admin_index = AdminIndex(lambda guild_id: bot_settings.get(str(guild_id), {}).get("admin_role_ids", []))
 
+# State kept on disk, opened by open_state() rather than at import so
+# main.py can check the token first and open it while logging in.
+bot_settings = None
+ledger = None
+aggregates = None
+recent_cashouts = None
 
-bot_settings = load_settings()
 
+def open_state():
+    """Open the settings store, cashout ledger, aggregates, dedupe cache and recording.
 
-intents = discord.Intents.default()
-intents.message_content = True  
-bot = commands.Bot(command_prefix='!', intents=intents)
+    Does nothing if they are already open. Runs before any event is
+    handled, so it may be called from a worker thread.
+    """
+    global bot_settings, ledger, aggregates, recent_cashouts
+    if bot_settings is not None:
+        return
+    settings = load_settings()
+    settings.subscribe(view_cache.invalidate)
+    settings.subscribe(admin_index.invalidate_guild)
+    cashouts = CashoutLedger(LEDGER_DB)
+    totals = CashoutAggregates(AGGREGATES_SNAPSHOT, shard_ids=bot.shard_ids, shard_count=bot.shard_count)
+    totals.restore(cashouts)
+    cashouts.subscribe(totals.apply_row)
+    # Cluster workers each write their own window; a guild's duplicates
+    # only ever reach the worker that owns its shard.
+    recent = DedupeCache(path=shard_path(DEDUPE_FILE, bot.shard_ids, bot.shard_count))
+    if RECORD_EVENTS:
+        recorder.open(shard_path(RECORD_EVENTS, bot.shard_ids, bot.shard_count))
+    bot_settings, ledger, aggregates, recent_cashouts = settings, cashouts, totals, recent
+
+
+def close_state():
+    """Flush and close what open_state opened"""
+    if bot_settings is None:
+        return
+    bot_settings.close()
+    recent_cashouts.flush_now()
+    aggregates.snapshot_now(ledger)
+    ledger.close()
+
+
+def _runtime_metrics():
+    """Gauges sampled at scrape time"""
+    dispatch = dispatcher.stats()
+    return {
+        "process_resident_memory_bytes": rss_bytes(),
+        "cached_messages": len(bot.cached_messages),
+        "gateway_latency_seconds": bot.latency,
+        "shard_latency_seconds": dict(bot.latencies),
+        "messages_dropped": message_filter.dropped,
+        "messages_accepted": message_filter.accepted,
+        "dispatch_queue_depth": dispatch["queue_depth"],
+        "dispatch_wait_avg_seconds": dispatch["wait_avg"],
+        "dispatch_wait_max_seconds": dispatch["wait_max"],
+        "dispatch_requests": dispatch["sent_requests"],
+        "dispatch_merged_messages": dispatch["merged_messages"],
+        "view_cache_hits": view_cache.hits,
+        "view_cache_misses": view_cache.misses,
+        "admin_decision_hits": admin_index.hits,
+        "admin_decision_misses": admin_index.misses,
+        "duplicate_cashouts": recent_cashouts.duplicates,
+        "interaction_acks": deadlines.acks,
+        "interaction_deadline_misses": deadlines.misses,
+        "interaction_auto_deferred": dict(deadlines.auto_deferred),
+        "interaction_ack_p99_seconds": deadlines.ack_latency.quantile(0.99),
+    }
+
+metrics.add_collector(_runtime_metrics)
 
 class TemplateBot:
-    def __init__(self):
+    def __init__(self, template_dir=TEMPLATE_DIR):
         
-        self.templates = {
-            "cashout": """
-🔔 **CASHOUT**
-═══════════════════
- {role_mention}
-
- **Player**: {playerName}
- **Deposited Amount:** {loadedAmount}
- **Tag:** {cashtag}
- **Redeemed Amount:** {redeemedAmount}
- **Tip:** {tip}
- **Post Redeem Game Load:** {gameLoad}
-
- **To pay:** {payAmount}
-
-═══════════════════
-            """
+        self.resolvers = {
+            "role_mention": self._resolve_role_mention,
         }
+
         
-        
-        self.template_fields = {
-            "cashout": ["playerName","loadedAmount","cashtag","redeemedAmount","tip","gameLoad","payAmount",]
-        }
+        self.registry = TemplateRegistry(template_dir, known_placeholders=self.resolvers)
+
+    @property
+    def templates(self):
+        """Global template sources by name"""
+        return {name: compiled.source for name, compiled in self.registry.templates.items()}
+
+    @property
+    def template_fields(self):
+        return {name: list(compiled.fields) for name, compiled in self.registry.templates.items()}
+
+    def names(self, guild_id=None):
+        """Template names available in a guild"""
+        return self.registry.names(guild_id)
 
-    def parse_mention_message(self, text, bot_user_id):
+    def register_template(self, name, template, fields, description="", output="text", color=None, aliases=()):
+        """Register a template and compile its render plan"""
+        self.registry.add(compile_template(name, template, fields, description, output, color, aliases))
+
+    def resolve(self, word, guild_id=None):
+        """The template name ``word`` (a name or alias) stands for, or None"""
+        return self.registry.resolve(word, guild_id)
+
+    def complete(self, prefix, guild_id=None, limit=25):
+        """Template names for autocomplete: prefix matches, else close misspellings"""
+        index = self.registry.index(guild_id)
+        return index.complete(prefix, limit) or index.suggest(prefix, max_distance=1, limit=limit)
+
+    def did_you_mean(self, word, guild_id=None, max_distance=1):
+        """Names close to a template name that was not found.
+
+        One edit is a trie walk; two fall back to a full edit distance
+        search, which costs milliseconds on thousands of templates and is
+        kept to explicit commands rather than every mention.
+        """
+        return self.registry.index(guild_id).suggest(word, max_distance=max_distance) if word else []
+
+    @staticmethod
+    def requested_name(text, bot_user_id):
+        """The first word after the bot mention, the template being asked for"""
+        words = mention_pattern(bot_user_id).sub('', text).split(None, 1)
+        return words[0] if words else None
+
+    @staticmethod
+    def _resolve_role_mention(guild_id):
+        """Resolve {role_mention} from the guild's notify role setting"""
+        server_settings = bot_settings.get(str(guild_id), {})
+        role_id = server_settings.get("notify_role_id")
+        return f"<@&{role_id}>" if role_id else ""
+
+    def parse_mention_message(self, text, bot_user_id, guild_id=None):
         """Parse a message that mentions the bot and extract template data"""
         
-        text = re.sub(f'<@!?{bot_user_id}>', '', text).strip()
+        text = mention_pattern(bot_user_id).sub('', text).strip()
         
         
         parts = text.split('\n', 1)
@@ -74,9 +213,10 @@ class TemplateBot:
             return None, None
             
         first_line = parts[0].strip()
-        template_name = first_line.split()[0].lower() if first_line.split() else None
+        template_name = self.resolve(first_line.split()[0], guild_id) if first_line.split() else None
         
-        if template_name not in self.templates:
+        compiled = self.registry.get(template_name, guild_id) if template_name else None
+        if compiled is None:
             return None, None
         
         
@@ -86,7 +226,7 @@ class TemplateBot:
             values = [line.strip() for line in content.split('\n') if line.strip()]
             
             
-            template_fields = self.template_fields.get(template_name, [])
+            template_fields = compiled.fields
             for i, value in enumerate(values):
                 if i < len(template_fields):
                     data[template_fields[i]] = value
@@ -94,43 +234,51 @@ class TemplateBot:
         return template_name, data
 
     def fill_template(self, template_name, data, guild_id=None):
-        """Fill template with provided data"""
-        template = self.templates[template_name]
-        
-        
-        placeholders = re.findall(r'\{(\w+)\}', template)
-        
-        
-        filled_data = {}
-        for placeholder in placeholders:
-            if placeholder in data and data[placeholder]:
-                filled_data[placeholder] = data[placeholder]
-            elif placeholder == "role_mention" and guild_id:
-                
-                server_settings = bot_settings.get(str(guild_id), {})
-                role_id = server_settings.get("notify_role_id")
-                if role_id:
-                    filled_data[placeholder] = f"<@&{role_id}>"
-                else:
-                    filled_data[placeholder] = ""
-            else:
-                
-                filled_data[placeholder] = ""
-        
-        try:
-            return template.format(**filled_data)
-        except KeyError as e:
-            return f"Error: Missing field {e}"
-
-    def get_help_message(self):
+        """Fill template with provided data; None if a reload removed it"""
+        compiled = self.registry.get(template_name, guild_id)
+        if compiled is None:
+            return None
+        return compiled.render(data, self.resolvers, guild_id)
+
+    def render_post(self, template_name, data, guild_id=None):
+        """(content, embed) to post: the filled text and None, or the embed
+        form for templates with ``output: embed``. None if a reload removed
+        the template."""
+        compiled = self.registry.get(template_name, guild_id)
+        if compiled is None:
+            return None
+        if compiled.embed is None:
+            return compiled.render(data, self.resolvers, guild_id), None
+        return compiled.embed.render(data, self.resolvers, guild_id)
+
+    def template_list(self, guild_id, budget, describe=True):
+        """Template lines for help and /templates, as many as fit in ``budget`` characters"""
+        names = self.names(guild_id)
+        budget -= len(f"\n…and {len(names)} more, search them with `/template`")
+        lines = []
+        for name in names:
+            line = template_line(self.registry.get(name, guild_id), describe)
+            budget -= len(line) + 1
+            if budget < 0:
+                break
+            lines.append(line)
+        if len(lines) < len(names):
+            lines.append(f"…and {len(names) - len(lines)} more, search them with `/template`")
+        return "\n".join(lines)
+
+    def get_help_message(self, guild_id=None):
         """Generate help message showing available templates and usage"""
-        help_msg = """
+        budget = MAX_CONTENT_LENGTH - len(HELP_MESSAGE.format(templates=""))
+        return HELP_MESSAGE.format(templates=self.template_list(guild_id, budget))
+
+
+HELP_MESSAGE = """
 🤖 **Template Bot Help**
 
 **Usage:** Mention the bot followed by the template name and values (one per line).
 
 **Available Templates:**
-• `cashout` - For cashout notifications
+{templates}
 
 **Example Usage:**
 ```
@@ -156,40 +304,111 @@ Fields are filled in order - no need to specify field names!
 • `/set_response_channel 
 • `/remove_notify_role` - Remove automatic role mention  
 • `/bot_settings` - View current settings
+• `/bot_stats` - View handler latency and throughput
+• `/template` - Post any template but cashout by name or alias
+• `/cashout_import` - Post many cashouts from a CSV file
+• `/cashout_history` - Browse past cashouts by player or cashtag
+• `/cashout_summary` - Cashout totals by day, operator or player
         """
-        return help_msg
+
+
+def lines_that_fit(lines, budget):
+    """How many of ``lines``, joined with newlines, fit in ``budget`` characters"""
+    used = -1
+    for count, line in enumerate(lines):
+        used += len(line) + 1
+        if used > budget:
+            return count
+    return len(lines)
+
+
+def template_line(compiled, describe=True):
+    """``• `name` (aliases) - description`` for template lists"""
+    line = f"• `{compiled.name}`"
+    if compiled.aliases:
+        line += f" ({', '.join(compiled.aliases)})"
+    if describe and compiled.description:
+        line += f" - {compiled.description}"
+    return line
+
+
+def listed_names(guild_id):
+    """Comma separated template names for "not found" replies, cached per guild"""
+    def build():
+        names = template_bot.names(guild_id)
+        listed = ', '.join(names[:MAX_LISTED_TEMPLATES])
+        if len(names) > MAX_LISTED_TEMPLATES:
+            listed += f" and {len(names) - MAX_LISTED_TEMPLATES} more"
+        return listed
+
+    return view_cache.get(guild_id, "template_names", build)
+
+
+def template_fingerprint(guild_id, template_name, data):
+    """Duplicate-detection key for a post, or None for templates that are not checked"""
+    if template_name != "cashout":
+        return None
+    return cashout_fingerprint(
+        guild_id, data.get("playerName", ""), data.get("cashtag", ""),
+        [data.get(field, "") for field in ("loadedAmount", "redeemedAmount", "tip", "gameLoad")],
+    )
 
 
 template_bot = TemplateBot()
+template_bot.registry.subscribe(view_cache.invalidate)
+recorder.keep_words.update(template_bot.registry.index().keys())
+_commands_synced = False
+
+
+def help_view(guild_id):
+    """The help message for a guild, rendered once per settings/template change"""
+    return view_cache.get(guild_id, "help", lambda: template_bot.get_help_message(guild_id))
 
 @bot.event
+@metrics.instrument("on_ready")
 async def on_ready():
     """Event triggered when bot is ready"""
-    print(f'{bot.user} has connected to Discord!')
-    print(f'Bot is ready to use in {len(bot.guilds)} servers')
+    logging.info(f"{bot.user} has connected to Discord, ready in {len(bot.guilds)} servers")
+    message_filter.bind(bot.user.id, bot.all_commands)
+    recorder.keep_words.update(bot.all_commands)
+
+    global _commands_synced
+    if _commands_synced:
+        # on_ready fires again after gateway reconnects; nothing to sync.
+        return
+    startup_timer.mark("ready")
     
     
     try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} slash command(s)")
-        
-        
-        for command in synced:
-            print(f"  - /{command.name}")
-            
-    except Exception as e:
-        print(f"Failed to sync commands: {e}")
+        force = os.environ.get("FORCE_COMMAND_SYNC") == "1"
+        try:
+            synced = await sync_command_tree(bot.tree, bot.application_id, force=force)
+        finally:
+            startup_timer.mark("tree_sync")
+        _commands_synced = True
+        if synced is None:
+            logging.info("Command tree unchanged, skipped sync")
+            return
+        logging.info(f"Synced {len(synced)} slash command(s): {', '.join('/' + command.name for command in synced)}")
+
+    except Exception:
+        logging.exception("Failed to sync commands")
 
 
 @bot.event
+@metrics.instrument("on_message")
 async def on_message(message):
     """Event triggered when a message is sent"""
     
-    if message.author == bot.user:
+    if message_filter.bot_user_id is None:
+        message_filter.bind(bot.user.id, bot.all_commands)
+    kind = message_filter.classify(message)
+    recorder.message(message, bot.user.id, handled=kind is not None)
+    if kind is None:
         return
     
    
-    if bot.user.mentioned_in(message):
+    if kind == MENTION:
        
         guild_id = str(message.guild.id)
         server_settings = bot_settings.get(guild_id, {})
@@ -199,81 +418,136 @@ async def on_message(message):
         if command_channel_id and message.channel.id != command_channel_id:
             command_channel = message.guild.get_channel(command_channel_id)
             channel_mention = command_channel.mention if command_channel else "the designated channel"
-            await message.channel.send(f"❌ Please use commands in {channel_mention}")
+            await dispatcher.send(message.channel, f"❌ Please use commands in {channel_mention}")
             return
         
         
         if 'help' in message.content.lower():
-            help_message = template_bot.get_help_message()
-            await message.channel.send(help_message)
+            help_message = help_view(message.guild.id)
+            await dispatcher.send(message.channel, help_message, batchable=False)
             return
         
         
         template_name, data = template_bot.parse_mention_message(
             message.content, 
-            bot.user.id
+            bot.user.id,
+            message.guild.id
         )
+        post = template_bot.render_post(template_name, data, message.guild.id) if template_name else None
         
-        if template_name is None:
-            available_templates = ', '.join(template_bot.templates.keys())
-            await message.channel.send(
+        if post is None:
+            requested = template_bot.requested_name(message.content, bot.user.id)
+            suggestions = template_bot.did_you_mean(requested, message.guild.id)
+            hint = f"Did you mean {' or '.join(f'`{name}`' for name in suggestions)}?\n" if suggestions else ""
+            await dispatcher.send(
+                message.channel,
                 f"❌ Template not found or invalid format.\n\n"
-                f"Available templates: {available_templates}\n"
+                f"{hint}"
+                f"Available templates: {listed_names(message.guild.id)}\n"
                 f"Type '@{bot.user.display_name} help' for usage instructions."
             )
             return
         
         
-        result = template_bot.fill_template(template_name, data, message.guild.id)
-        
-      
-        response_channel_id = server_settings.get("response_channel_id")
-        
-        if response_channel_id:
-           
-            response_channel = message.guild.get_channel(response_channel_id)
-            if response_channel:
-                await response_channel.send(result)
-                await message.channel.send(f"✅ Template posted in {response_channel.mention}")
-            else:
-                await message.channel.send("❌ Response channel not found. Please contact an admin.")
-        else:
-            await message.channel.send(result)
+        content, embed = post
+        key = template_fingerprint(message.guild.id, template_name, data)
+
+        async def post_result():
+            response_channel_id = server_settings.get("response_channel_id")
+            response_channel = message.guild.get_channel(response_channel_id) if response_channel_id else message.channel
+            if response_channel is None:
+                await dispatcher.send(message.channel, "❌ Response channel not found. Please contact an admin.")
+                return
+
+            if key is not None:
+                recent_cashouts.remember(key)
+            await dispatcher.send(response_channel, content, embed=embed)
+            if response_channel.id != message.channel.id:
+                await dispatcher.send(message.channel, f"✅ Template posted in {response_channel.mention}")
+
+        first_seen = recent_cashouts.seen(key) if key is not None else None
+        if first_seen is not None:
+            async def confirm(interaction):
+                await interaction.response.edit_message(content="✅ Posting it again.", view=None)
+                await post_result()
+
+            await message.channel.send(
+                duplicate_warning(data.get("playerName", ""), first_seen),
+                view=DuplicateCashoutView(message.author.id, confirm)
+            )
+            return
+
+        await post_result()
     
     
-    await bot.process_commands(message)
+    elif kind == COMMAND:
+        await bot.process_commands(message)
     
     
 
 
-def parse_tip_game(s: str):
-    """
-    Accepts things like:
-      "10,5"  -> tip=10, game=5
-      "tip=10 game=5"
-      "tip 10 game 5"
-      "10"    -> tip=10, game=0
-      ""      -> both 0
-    Returns (tip:int, game:int)
-    """
-    s = (s or "").strip()
-    if not s:
-        return 0, 0
-    
-    if "," in s:
-        parts = [p.strip() for p in s.split(",", 1)]
-        tip = int(''.join(ch for ch in parts[0] if ch.isdigit() or ch=='-') or "0")
-        game = int(''.join(ch for ch in parts[1] if ch.isdigit() or ch=='-') or "0")
-        return tip, game
-    
-    s_low = s.lower().replace("=", " ").replace("tip", " ").replace("game", " ")
-    nums = [int(''.join(ch for ch in tok if ch.isdigit() or ch=='-') or "0")
-            for tok in s_low.split() if any(c.isdigit() for c in tok)]
-    tip = nums[0] if len(nums) >= 1 else 0
-    game = nums[1] if len(nums) >= 2 else 0
-    return tip, game
+@bot.event
+@metrics.instrument("on_guild_update")
+async def on_guild_update(before, after):
+    """Guild names appear in cached views"""
+    if before.name != after.name:
+        view_cache.invalidate(after.id)
+
+
+@bot.event
+@metrics.instrument("on_guild_role_delete")
+async def on_guild_role_delete(role):
+    """Cached settings views and admin decisions may involve the deleted role"""
+    view_cache.invalidate(role.guild.id)
+    admin_index.invalidate_guild(role.guild.id)
 
 
+@bot.event
+@metrics.instrument("on_guild_role_update")
+async def on_guild_role_update(before, after):
+    """A role gaining or losing Administrator changes admin decisions"""
+    if before.permissions.administrator != after.permissions.administrator:
+        admin_index.invalidate_guild(after.guild.id)
+
+
+@bot.event
+@metrics.instrument("on_member_update")
+async def on_member_update(before, after):
+    if before.roles != after.roles:
+        admin_index.invalidate_member(after.guild.id, after.id)
+
+
+@bot.event
+@metrics.instrument("on_guild_channel_delete")
+async def on_guild_channel_delete(channel):
+    """Cached settings views may mention the deleted channel"""
+    view_cache.invalidate(channel.guild.id)
+
+
+def record_cashout(template_bot, guild_id, operator_id, player_name, cashtag, loaded, redeemed, tip, game):
+    """Record a cashout in the ledger and return the (content, embed) to post for it.
+
+    Returns None, recording nothing, if the cashout template is gone.
+    """
+    pay_amount = redeemed - tip - game
+    if pay_amount < 0:
+        pay_amount = ZERO
+
+    data = {
+        "playerName": player_name,
+        "loadedAmount": format_amount(loaded),
+        "cashtag": cashtag,
+        "redeemedAmount": format_amount(redeemed),
+        "tip": format_amount(tip) if tip else "",
+        "gameLoad": format_amount(game) if game else "",
+        "payAmount": format_amount(pay_amount),
+    }
+    post = template_bot.render_post("cashout", data, guild_id)
+    if post is None:
+        return None
+
+    ledger.record(guild_id, operator_id, player_name, cashtag, loaded, redeemed, tip, game, pay_amount)
+    return post
 
 
 class CashoutModal(ui.Modal, title="Cashout Details"):
@@ -311,86 +585,130 @@ class CashoutModal(ui.Modal, title="Cashout Details"):
         self.add_item(self.redeemed_amount)
         self.add_item(self.optional_tip_game)
 
+    @metrics.instrument("CashoutModal.on_submit")
+    @deadlines.guard("CashoutModal.on_submit")
     async def on_submit(self, interaction: discord.Interaction):
+        recorder.modal(interaction, "CashoutModal", {
+            "player_name": self.player_name.value,
+            "cashtag": self.cashtag.value,
+            "loaded_amount": self.loaded_amount.value,
+            "redeemed_amount": self.redeemed_amount.value,
+            "optional_tip_game": self.optional_tip_game.value,
+        })
         guild_id = str(self.guild.id)
         server_settings = self.bot_settings.get(guild_id, {})
 
-        def to_int(s, default=0):
-            s = (s or "").strip()
-            if not s: return default
-            try:
-                return int(''.join(ch for ch in s if ch.isdigit() or ch == '-'))
-            except:
-                return default
-
-        loaded = to_int(self.loaded_amount.value, 0)
-        redeemed = to_int(self.redeemed_amount.value, 0)
-        tip, game = parse_tip_game(self.optional_tip_game.value)
-
-        pay_amount = redeemed - tip - game
-        if pay_amount < 0:
-            pay_amount = 0
-
-        data = {
-            "playerName": self.player_name.value.strip(),
-            "loadedAmount": str(loaded),
-            "cashtag": self.cashtag.value.strip(),
-            "redeemedAmount": str(redeemed),
-            "tip": str(tip) if tip else "",
-            "gameLoad": str(game) if game else "",
-            "payAmount": str(pay_amount),
-        }
+        try:
+            loaded = parse_amount(self.loaded_amount.value, default=ZERO)
+        except AmountError as e:
+            await interaction.response.send_message(f"❌ Loaded Amount: {e}", ephemeral=True)
+            return
+        try:
+            redeemed = parse_amount(self.redeemed_amount.value, default=ZERO)
+        except AmountError as e:
+            await interaction.response.send_message(f"❌ Redeemed Amount: {e}", ephemeral=True)
+            return
+        try:
+            tip, game = parse_tip_game(self.optional_tip_game.value)
+        except AmountError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
 
-        
-        text_block = self.template_bot.fill_template("cashout", data, self.guild.id)
+        player_name = self.player_name.value.strip()
+        cashtag = self.cashtag.value.strip()
+        amounts = (loaded, redeemed, tip, game)
+        key = cashout_fingerprint(self.guild.id, player_name, cashtag, amounts)
 
-        
-        response_channel_id = server_settings.get("response_channel_id")
-        if response_channel_id:
-            channel = self.guild.get_channel(response_channel_id)
-            if channel:
-                
-                notify_role_id = server_settings.get("notify_role_id")
-                if notify_role_id:
-                    await channel.send(f"<@&{notify_role_id}>")
-                await channel.send(text_block)
-                await interaction.response.send_message(
-                    f"✅ Cashout posted in {channel.mention}", ephemeral=True
-                )
+        async def post(interaction, confirmed=False):
+            cashout = record_cashout(
+                self.template_bot, self.guild.id, interaction.user.id, player_name, cashtag, *amounts
+            )
+            if cashout is None:
+                missing = "❌ Cashout template not found. Please contact an admin."
+                if confirmed:
+                    await interaction.response.edit_message(content=missing, view=None)
+                else:
+                    await interaction.response.send_message(missing, ephemeral=True)
                 return
+            recent_cashouts.remember(key)
+            content, embed = cashout
+            aggregates.maybe_snapshot(ledger)
 
-        
-        notify_role_id = server_settings.get("notify_role_id")
-        if notify_role_id:
-            await interaction.channel.send(f"<@&{notify_role_id}>")
-        await interaction.channel.send(text_block)
-        await interaction.response.send_message("✅ Cashout posted.", ephemeral=True)
+            response_channel_id = server_settings.get("response_channel_id")
+            channel = self.guild.get_channel(response_channel_id) if response_channel_id else None
+            if channel:
+                status = f"✅ Cashout posted in {channel.mention}"
+            else:
+                channel = interaction.channel
+                status = "✅ Cashout posted."
+            if confirmed:
+                await interaction.response.edit_message(content=status, view=None)
+            else:
+                await interaction.response.send_message(status, ephemeral=True)
 
+            # Acknowledged first: under rate limits the send can outlast Discord's window.
+            notify_role_id = server_settings.get("notify_role_id")
+            try:
+                await dispatcher.send(channel, content, role_id=notify_role_id, embed=embed)
+            except discord.HTTPException as e:
+                await interaction.edit_original_response(content=f"❌ Cashout recorded, but posting it failed: {e.text or e}")
+
+        first_seen = recent_cashouts.seen(key)
+        if first_seen is not None:
+            await interaction.response.send_message(
+                duplicate_warning(player_name, first_seen),
+                view=DuplicateCashoutView(interaction.user.id, lambda i: post(i, confirmed=True)),
+                ephemeral=True
+            )
+            return
 
+        await post(interaction)
 
 
+def duplicate_warning(player_name, first_seen):
+    return (
+        f"⚠️ An identical cashout for **{player_name}** was already posted <t:{int(first_seen)}:R>. "
+        f"Post it again?"
+    )
 
 
+class DuplicateCashoutView(ui.View):
+    """Asks before reposting a cashout that matches a recent one"""
 
+    def __init__(self, user_id, on_confirm):
+        super().__init__(timeout=recent_cashouts.window)
+        self.user_id = user_id
+        self.on_confirm = on_confirm
 
+    async def interaction_check(self, interaction: discord.Interaction):
+        return interaction.user.id == self.user_id
 
+    @ui.button(label="Post anyway", style=discord.ButtonStyle.danger)
+    @deadlines.guard("DuplicateCashoutView.post_anyway")
+    async def post_anyway(self, interaction: discord.Interaction, button: ui.Button):
+        self.stop()
+        await self.on_confirm(interaction)
 
+    @ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    @deadlines.guard("DuplicateCashoutView.cancel")
+    async def cancel(self, interaction: discord.Interaction, button: ui.Button):
+        self.stop()
+        await interaction.response.edit_message(content="Cancelled, nothing was posted.", view=None)
 
 
-def is_bot_admin(member: discord.Member):
-    """Check if a member is allowed to run bot admin commands"""
-    guild_id = str(member.guild.id)
-    server_settings = bot_settings.get(guild_id, {})
-    allowed_roles = server_settings.get("admin_role_ids", [])
 
-    
-    if not allowed_roles:
-        return member.guild_permissions.administrator
 
-    
-    return (
-        member.guild_permissions.administrator
-        or any(role.id in allowed_roles for role in member.roles))
+
+
+
+
+
+
+
+
+def is_bot_admin(member: discord.Member):
+    """Check if a member is allowed to run bot admin commands"""
+    return admin_index.is_admin(member)
 
 
 
@@ -403,6 +721,8 @@ def is_bot_admin(member: discord.Member):
     role4="Fourth admin role (optional)",
     role5="Fifth admin role (optional)"
 )
+@metrics.instrument("/set_admin_roles")
+@deadlines.guard("/set_admin_roles")
 async def set_admin_roles(
     interaction: discord.Interaction,
     role1: discord.Role,
@@ -420,10 +740,8 @@ async def set_admin_roles(
         return
 
     roles = [r for r in (role1, role2, role3, role4, role5) if r]
-    guild_id = str(interaction.guild.id)
-    bot_settings.setdefault(guild_id, {})
-    bot_settings[guild_id]["admin_role_ids"] = [role.id for role in roles]
-    save_settings(bot_settings)
+    async with bot_settings.edit(interaction.guild.id) as settings:
+        settings["admin_role_ids"] = [role.id for role in roles]
 
     await interaction.response.send_message(
         f"✅ Admin roles set: {', '.join(role.mention for role in roles)}",
@@ -434,6 +752,8 @@ async def set_admin_roles(
 
 @bot.tree.command(name="set_notify_role", description="Set the role to mention for cashout notifications")
 @app_commands.describe(role="Role to mention in cashout messages")
+@metrics.instrument("/set_notify_role")
+@deadlines.guard("/set_notify_role")
 async def set_notify_role(interaction: discord.Interaction, role: discord.Role):
     if not is_bot_admin(interaction.user):
         await interaction.response.send_message(
@@ -442,19 +762,18 @@ async def set_notify_role(interaction: discord.Interaction, role: discord.Role):
         )
         return
 
-    guild_id = str(interaction.guild.id)
-    bot_settings.setdefault(guild_id, {})
+    async with bot_settings.edit(interaction.guild.id) as settings:
+        already_set = "notify_role_id" in settings
+        if not already_set:
+            settings["notify_role_id"] = role.id
 
-    if "notify_role_id" in bot_settings[guild_id]:
+    if already_set:
         await interaction.response.send_message(
             f"❌ Notify Role already set! Clear using command   `/remove_notify_role`   to set a new one.",
             ephemeral=True
         )
         return
 
-    bot_settings[guild_id]["notify_role_id"] = role.id
-    save_settings(bot_settings)
-
     await interaction.response.send_message(
         f"✅ Notification role set to {role.mention}",
         ephemeral=True
@@ -463,6 +782,8 @@ async def set_notify_role(interaction: discord.Interaction, role: discord.Role):
 
 
 @bot.tree.command(name="remove_notify_role", description="Remove the automatic role mention from cashout messages")
+@metrics.instrument("/remove_notify_role")
+@deadlines.guard("/remove_notify_role")
 async def remove_notify_role(interaction: discord.Interaction):
 
     if not is_bot_admin(interaction.user):
@@ -472,12 +793,10 @@ async def remove_notify_role(interaction: discord.Interaction):
         )
         return
 
-    guild_id = str(interaction.guild.id)
-    server_settings = bot_settings.get(guild_id, {})
+    async with bot_settings.edit(interaction.guild.id) as settings:
+        removed = settings.pop("notify_role_id", None) is not None
 
-    if "notify_role_id" in server_settings:
-        del server_settings["notify_role_id"]
-        save_settings(bot_settings)
+    if removed:
         await interaction.response.send_message(
             "✅ Automatic role mention removed.",
             ephemeral=True
@@ -492,6 +811,8 @@ async def remove_notify_role(interaction: discord.Interaction):
 
 @bot.tree.command(name="set_command_channel", description="Set the channel where bot listens for commands")
 @app_commands.describe(channel="Channel for commands")
+@metrics.instrument("/set_command_channel")
+@deadlines.guard("/set_command_channel")
 async def set_command_channel(interaction: discord.Interaction, channel: discord.TextChannel):
     if not is_bot_admin(interaction.user):
         await interaction.response.send_message(
@@ -500,10 +821,8 @@ async def set_command_channel(interaction: discord.Interaction, channel: discord
         )
         return
 
-    guild_id = str(interaction.guild.id)
-    bot_settings.setdefault(guild_id, {})
-    bot_settings[guild_id]["command_channel_id"] = channel.id
-    save_settings(bot_settings)
+    async with bot_settings.edit(interaction.guild.id) as settings:
+        settings["command_channel_id"] = channel.id
 
     await interaction.response.send_message(
         f"✅ Command channel set to {channel.mention}",
@@ -514,6 +833,8 @@ async def set_command_channel(interaction: discord.Interaction, channel: discord
 
 @bot.tree.command(name="set_response_channel", description="Set the channel where cashout templates are posted")
 @app_commands.describe(channel="Channel for cashout templates")
+@metrics.instrument("/set_response_channel")
+@deadlines.guard("/set_response_channel")
 async def set_response_channel(interaction: discord.Interaction, channel: discord.TextChannel):
     if not is_bot_admin(interaction.user):
         await interaction.response.send_message(
@@ -522,10 +843,8 @@ async def set_response_channel(interaction: discord.Interaction, channel: discor
         )
         return
 
-    guild_id = str(interaction.guild.id)
-    bot_settings.setdefault(guild_id, {})
-    bot_settings[guild_id]["response_channel_id"] = channel.id
-    save_settings(bot_settings)
+    async with bot_settings.edit(interaction.guild.id) as settings:
+        settings["response_channel_id"] = channel.id
 
     await interaction.response.send_message(
         f"✅ Response channel set to {channel.mention}",
@@ -533,53 +852,57 @@ async def set_response_channel(interaction: discord.Interaction, channel: discor
     )
 
 
-@bot.tree.command(name="bot_settings", description="View current bot settings for this server")
-async def view_settings(interaction: discord.Interaction):
-    
-    await interaction.response.defer(ephemeral=True)
+def render_settings_view(guild):
+    """The /bot_settings text for a guild"""
+    server_settings = bot_settings.get(str(guild.id), {})
 
-    if not is_bot_admin(interaction.user):
-        await interaction.followup.send(
-            "❌ You do not have permission to use this command.",
-            ephemeral=True
-        )
-        return
+    def mention(target, deleted):
+        return target.mention if target else deleted
 
-    guild_id = str(interaction.guild.id)
-    server_settings = bot_settings.get(guild_id, {})
-
-    
     admin_role_ids = server_settings.get("admin_role_ids", [])
     if admin_role_ids:
         admin_roles_text = ", ".join(
-            interaction.guild.get_role(rid).mention if interaction.guild.get_role(rid) else f"(deleted role {rid})"
-            for rid in admin_role_ids
+            mention(guild.get_role(rid), f"(deleted role {rid})") for rid in admin_role_ids
         )
     else:
         admin_roles_text = "❌ None set (defaults to Discord Administrator permission)"
 
-    
     notify_role_id = server_settings.get("notify_role_id")
-    notify_role_mention = interaction.guild.get_role(notify_role_id).mention if notify_role_id else "Not set"
+    notify_role_mention = mention(guild.get_role(notify_role_id), f"(deleted role {notify_role_id})") if notify_role_id else "Not set"
 
-    
     command_channel_id = server_settings.get("command_channel_id")
-    command_channel_mention = interaction.guild.get_channel(command_channel_id).mention if command_channel_id else "Any channel"
+    command_channel_mention = mention(guild.get_channel(command_channel_id), f"(deleted channel {command_channel_id})") if command_channel_id else "Any channel"
 
-    
     response_channel_id = server_settings.get("response_channel_id")
-    response_channel_mention = interaction.guild.get_channel(response_channel_id).mention if response_channel_id else "Same as command channel"
+    response_channel_mention = mention(guild.get_channel(response_channel_id), f"(deleted channel {response_channel_id})") if response_channel_id else "Same as command channel"
 
-    await interaction.followup.send(
-        f"**Bot Settings for {interaction.guild.name}:**\n\n"
+    return (
+        f"**Bot Settings for {guild.name}:**\n\n"
         f"📢 **Notify Role:** {notify_role_mention}\n"
         f"🛡 **Admin Roles:** {admin_roles_text}\n"
         f"📝 **Command Channel:** {command_channel_mention}\n"
-        f"📢 **Response Channel:** {response_channel_mention}",
-        ephemeral=True
+        f"📢 **Response Channel:** {response_channel_mention}"
     )
 
 
+@bot.tree.command(name="bot_settings", description="View current bot settings for this server")
+@metrics.instrument("/bot_settings")
+@deadlines.guard("/bot_settings")
+async def view_settings(interaction: discord.Interaction):
+    
+    await interaction.response.defer(ephemeral=True)
+
+    if not is_bot_admin(interaction.user):
+        await interaction.followup.send(
+            "❌ You do not have permission to use this command.",
+            ephemeral=True
+        )
+        return
+
+    message = view_cache.get(interaction.guild.id, "settings", lambda: render_settings_view(interaction.guild))
+    await interaction.followup.send(message, ephemeral=True)
+
+
 
 
 
@@ -587,7 +910,10 @@ async def view_settings(interaction: discord.Interaction):
 
 
 @bot.tree.command(name="cashout", description="Open a form to generate a cashout template")
+@metrics.instrument("/cashout")
+@deadlines.guard("/cashout", can_defer=False)
 async def slash_cashout(interaction: discord.Interaction):
+    recorder.slash(interaction, "cashout")
     guild_id = str(interaction.guild.id)
     server_settings = bot_settings.get(guild_id, {})
     command_channel_id = server_settings.get("command_channel_id")
@@ -604,39 +930,398 @@ async def slash_cashout(interaction: discord.Interaction):
 
 
 
+@bot.tree.command(name="cashout_import", description="Post many cashouts at once from a CSV file")
+@app_commands.describe(
+    file="CSV with columns player, cashtag, loaded, redeemed and optionally tip, game"
+)
+@metrics.instrument("/cashout_import")
+@deadlines.guard("/cashout_import")
+async def cashout_import(interaction: discord.Interaction, file: discord.Attachment):
+    # Imported on first use; most runs never import a CSV.
+    from cashout_import import CashoutImport, CsvImportError, ImportStatus, attachment_lines
+
+    guild_id = str(interaction.guild.id)
+    server_settings = bot_settings.get(guild_id, {})
+    command_channel_id = server_settings.get("command_channel_id")
+
+    if command_channel_id and interaction.channel.id != command_channel_id:
+        command_channel = interaction.guild.get_channel(command_channel_id)
+        channel_mention = command_channel.mention if command_channel else "the designated channel"
+        await interaction.response.send_message(
+            f"❌ Please use this command in {channel_mention}", ephemeral=True
+        )
+        return
+
+    if not file.filename.lower().endswith(".csv"):
+        await interaction.response.send_message("❌ Please attach a `.csv` file.", ephemeral=True)
+        return
+
+    channel = interaction.channel
+    response_channel_id = server_settings.get("response_channel_id")
+    if response_channel_id:
+        channel = interaction.guild.get_channel(response_channel_id) or channel
+    notify_role_id = server_settings.get("notify_role_id")
+
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    def post_row(values):
+        key = cashout_fingerprint(
+            interaction.guild.id, values["player"], values["cashtag"],
+            (values["loaded"], values["redeemed"], values["tip"], values["game"]),
+        )
+        first_seen = recent_cashouts.seen(key)
+        if first_seen is not None:
+            return duplicate_row(first_seen)
+        cashout = record_cashout(
+            template_bot, interaction.guild.id, interaction.user.id,
+            values["player"], values["cashtag"],
+            values["loaded"], values["redeemed"], values["tip"], values["game"],
+        )
+        if cashout is None:
+            raise CsvImportError("cashout template not found")
+        recent_cashouts.remember(key)
+        content, embed = cashout
+        return dispatcher.send(channel, content, role_id=notify_role_id, embed=embed)
+
+    async def duplicate_row(first_seen):
+        age = int(time.time() - first_seen)
+        raise CsvImportError(f"identical to a cashout posted {age}s ago, not posted")
+
+    def progress_line(job):
+        return f"{job.rows} rows read · {job.posted} posted · {job.failed} failed"
+
+    status = ImportStatus(interaction, interaction.elapsed())
+
+    async def show_progress(job):
+        await status.update(f"⏳ Importing `{file.filename}`… {progress_line(job)}")
+
+    job = CashoutImport(max_in_flight=dispatcher.max_batch * 2)
+    try:
+        try:
+            await job.run(attachment_lines(file), post_row, show_progress)
+            outcome = f"✅ Imported `{file.filename}` into {channel.mention}: {progress_line(job)}"
+        except (ValueError, aiohttp.ClientError, discord.HTTPException) as e:
+            outcome = f"❌ Import of `{file.filename}` stopped: {e}\n{progress_line(job)}"
+        aggregates.maybe_snapshot(ledger)
+
+        lines = [outcome]
+        for line_number, message in job.first_errors:
+            lines.append(f"• line {line_number}: {message}")
+        if job.failed > len(job.first_errors):
+            lines.append(f"…and {job.failed - len(job.first_errors)} more, see the attached report")
+
+        report = job.error_report()
+        attachments = [discord.File(report, filename="import_errors.csv")] if report else []
+        await status.update("\n".join(lines), attachments)
+    finally:
+        job.close()
+
+
+
+def format_history_page(rows, guild_name, before_id=None):
+    """Render one page of ledger rows as ``(content, before_id)``.
+
+    Rows that would take the page past Discord's 2000 characters are left
+    for the next page: ``before_id`` then points just past the last row
+    shown instead of past ``rows``.
+    """
+    if not rows:
+        return f"No cashouts found for {guild_name}.", None
+    header = f"**Cashout History for {guild_name}:**\n"
+    lines = []
+    for row in rows:
+        extras = ""
+        if row["tip_cents"]:
+            extras += f" · tip {format_cents(row['tip_cents'])}"
+        if row["game_cents"]:
+            extras += f" · game {format_cents(row['game_cents'])}"
+        lines.append(
+            f"`#{row['id']}` <t:{int(row['created_at'])}:f> **{row['player_name']}** · {row['cashtag']} · "
+            f"loaded {format_cents(row['loaded_cents'])} · redeemed {format_cents(row['redeemed_cents'])}"
+            f"{extras} · **paid {format_cents(row['pay_cents'])}**"
+        )
+    shown = max(1, lines_that_fit(lines, MAX_CONTENT_LENGTH - len(header) - 1))
+    if shown < len(rows):
+        before_id = rows[shown - 1]["id"]
+    return "\n".join([header] + lines[:shown]), before_id
+
+
+class CashoutHistoryView(ui.View):
+    """Pages backwards through the ledger using the last row id as cursor"""
+
+    def __init__(self, guild, player, cashtag, limit, before_id):
+        super().__init__(timeout=300)
+        self.guild = guild
+        self.player = player
+        self.cashtag = cashtag
+        self.limit = limit
+        self.before_id = before_id
+
+    @ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    @deadlines.guard("CashoutHistoryView.older")
+    async def older(self, interaction: discord.Interaction, button: ui.Button):
+        rows, before_id = await ledger.history(
+            self.guild.id, self.player, self.cashtag, self.before_id, self.limit
+        )
+        content, self.before_id = format_history_page(rows, self.guild.name, before_id)
+        button.disabled = self.before_id is None
+        await interaction.response.edit_message(content=content, view=self)
+
+
+@bot.tree.command(name="cashout_history", description="Browse past cashouts for this server")
+@app_commands.describe(
+    player="Only show cashouts for this player name",
+    cashtag="Only show cashouts for this cashtag",
+    limit="Cashouts per page (default 10, max 25; long pages show fewer)"
+)
+@metrics.instrument("/cashout_history")
+@deadlines.guard("/cashout_history")
+async def cashout_history(
+    interaction: discord.Interaction,
+    player: str = None,
+    cashtag: str = None,
+    limit: app_commands.Range[int, 1, 25] = 10
+):
+    if not is_bot_admin(interaction.user):
+        await interaction.response.send_message(
+            "❌ You do not have permission to use this command.",
+            ephemeral=True
+        )
+        return
+
+    rows, before_id = await ledger.history(interaction.guild.id, player, cashtag, None, limit)
+    content, before_id = format_history_page(rows, interaction.guild.name, before_id)
+    view = CashoutHistoryView(interaction.guild, player, cashtag, limit, before_id) if before_id else None
+    await interaction.response.send_message(content, view=view, ephemeral=True)
+
+
+
+@bot.tree.command(name="cashout_summary", description="Show cashout totals for a recent time window")
+@app_commands.describe(
+    days="Number of days to include, today counts as one (default 1)",
+    group_by="Break the totals down by operator or player"
+)
+@app_commands.choices(group_by=[
+    app_commands.Choice(name="Operator", value="operator"),
+    app_commands.Choice(name="Player", value="player"),
+])
+@metrics.instrument("/cashout_summary")
+@deadlines.guard("/cashout_summary")
+async def cashout_summary(
+    interaction: discord.Interaction,
+    days: app_commands.Range[int, 1, 365] = 1,
+    group_by: app_commands.Choice[str] = None
+):
+    if not is_bot_admin(interaction.user):
+        await interaction.response.send_message(
+            "❌ You do not have permission to use this command.",
+            ephemeral=True
+        )
+        return
+
+    def totals_line(totals):
+        return (
+            f"{totals['count']} cashouts · loaded {format_cents(totals['loaded'])} · "
+            f"redeemed {format_cents(totals['redeemed'])} · tips {format_cents(totals['tip'])} · "
+            f"game loads {format_cents(totals['game'])} · **paid {format_cents(totals['paid'])}**"
+        )
+
+    guild_id = interaction.guild.id
+    window = "today (UTC)" if days == 1 else f"the last {days} days (UTC)"
+    lines = [f"**Cashout Summary for {interaction.guild.name}, {window}:**\n"]
+    lines.append(totals_line(aggregates.summary(guild_id, days)))
+
+    if group_by:
+        groups = aggregates.summary(guild_id, days, group_by.value)
+        busiest = sorted(groups.items(), key=lambda item: item[1]["paid"], reverse=True)
+        lines.append(f"\n**By {group_by.name.lower()}:**")
+        # As many groups as fit in one message, with room for the "more" line.
+        budget = MAX_CONTENT_LENGTH - len("\n".join(lines)) - len(f"\n…and {len(groups)} more")
+        shown = 0
+        for key, totals in busiest:
+            label = f"<@{key}>" if group_by.value == "operator" else aggregates.player_name(guild_id, key)
+            line = f"• {label}: {totals_line(totals)}"
+            budget -= len(line) + 1
+            if budget < 0:
+                break
+            lines.append(line)
+            shown += 1
+        if len(groups) > shown:
+            lines.append(f"…and {len(groups) - shown} more")
+
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+
+
 @bot.tree.command(name="help", description="Show bot help and usage instructions")
+@metrics.instrument("/help")
+@deadlines.guard("/help")
 async def slash_help(interaction: discord.Interaction):
     """Slash command for help"""
-    help_message = template_bot.get_help_message()
+    help_message = help_view(interaction.guild.id)
     await interaction.response.send_message(help_message, ephemeral=True)
 
 @bot.tree.command(name="templates", description="List all available templates")
+@metrics.instrument("/templates")
+@deadlines.guard("/templates")
 async def slash_templates(interaction: discord.Interaction):
     """Show available templates"""
-    templates_list = "\n".join([f"• `{name}`" for name in template_bot.templates.keys()])
-    message = f"**Available Templates:**\n{templates_list}\n\nUse `/cashout` to create a cashout template!"
+    guild_id = interaction.guild.id
+
+    def build():
+        head = "**Available Templates:**\n"
+        tail = "\n\nUse `/cashout` to create a cashout template, or `/template` for any other!"
+        budget = MAX_CONTENT_LENGTH - len(head) - len(tail)
+        return head + template_bot.template_list(guild_id, budget, describe=False) + tail
+
+    message = view_cache.get(guild_id, "templates", build)
     await interaction.response.send_message(message, ephemeral=True)
 
 
+@bot.tree.command(name="template", description="Post any template")
+@app_commands.describe(
+    name="Template name or alias",
+    values="Field values in order, separated by |"
+)
+@metrics.instrument("/template")
+@deadlines.guard("/template")
+async def slash_template(interaction: discord.Interaction, name: str, values: str = ""):
+    guild_id = str(interaction.guild.id)
+    server_settings = bot_settings.get(guild_id, {})
+    command_channel_id = server_settings.get("command_channel_id")
+
+    if command_channel_id and interaction.channel.id != command_channel_id:
+        command_channel = interaction.guild.get_channel(command_channel_id)
+        channel_mention = command_channel.mention if command_channel else "the designated channel"
+        await interaction.response.send_message(
+            f"❌ Please use this command in {channel_mention}", ephemeral=True
+        )
+        return
+
+    template_name = template_bot.resolve(name, interaction.guild.id)
+    compiled = template_bot.registry.get(template_name, interaction.guild.id) if template_name else None
+    if compiled is None:
+        suggestions = template_bot.did_you_mean(name, interaction.guild.id, max_distance=2)
+        hint = f" Did you mean {' or '.join(f'`{n}`' for n in suggestions)}?" if suggestions else ""
+        await interaction.response.send_message(f"❌ No template named `{name}`.{hint}", ephemeral=True)
+        return
+
+    if template_name == "cashout":
+        # Cashouts are parsed, checked for duplicates and recorded in the ledger.
+        await interaction.response.send_message(
+            "❌ Use `/cashout` to post a cashout, so it is checked and recorded.", ephemeral=True
+        )
+        return
+
+    data = dict(zip(compiled.fields, (value.strip() for value in values.split("|"))))
+    content, embed = template_bot.render_post(template_name, data, interaction.guild.id)
+
+    response_channel_id = server_settings.get("response_channel_id")
+    channel = interaction.guild.get_channel(response_channel_id) if response_channel_id else None
+    if channel:
+        status = f"✅ Template posted in {channel.mention}"
+    else:
+        channel = interaction.channel
+        status = "✅ Template posted."
+    await interaction.response.send_message(status, ephemeral=True)
+    try:
+        await dispatcher.send(channel, content, embed=embed)
+    except discord.HTTPException as e:
+        await interaction.edit_original_response(content=f"❌ Posting the template failed: {e.text or e}")
+
+
+@slash_template.autocomplete("name")
+async def template_name_autocomplete(interaction: discord.Interaction, current: str):
+    return [
+        app_commands.Choice(name=name, value=name)
+        for name in template_bot.complete(current, interaction.guild.id)
+    ]
+
+
+
+
+
+
+
+@bot.tree.command(name="bot_stats", description="Show handler latency and throughput statistics")
+@metrics.instrument("/bot_stats")
+@deadlines.guard("/bot_stats")
+async def bot_stats(interaction: discord.Interaction):
+    if not is_bot_admin(interaction.user):
+        await interaction.response.send_message(
+            "❌ You do not have permission to use this command.",
+            ephemeral=True
+        )
+        return
+
+    from cluster import shard_status
+
+    uptime = int(time.time() - metrics.started_at)
+    head = [
+        f"**Bot Stats** (up {uptime // 3600}h {uptime % 3600 // 60}m)\n",
+        f"🌐 **Gateway latency:** {bot.latency * 1000:.0f} ms" if math.isfinite(bot.latency) else "🌐 **Gateway latency:** not connected",
+        f"🧠 **Memory:** {rss_bytes() / 2**20:.0f} MiB RSS, {len(bot.cached_messages)} cached messages ({GATEWAY_PROFILE} profile)",
+        f"⏱ **Event loop lag:** {metrics.loop_lag * 1000:.1f} ms (max {metrics.loop_lag_max * 1000:.1f} ms)",
+    ]
+
+    shard_lines = []
+    for shard in shard_status(bot):
+        state = "closed" if shard["closed"] else f"{shard['latency'] * 1000:.0f} ms"
+        shard_lines.append(f"🧩 **Shard {shard['shard_id']}:** {state}, {shard['guilds']} guilds")
+
+    dispatch = dispatcher.stats()
+    tail = [
+        f"📤 **Send queue:** {dispatch['queue_depth']} queued, "
+        f"avg wait {dispatch['wait_avg'] * 1000:.0f} ms, {dispatch['merged_messages']} merged",
+        f"🔇 **Messages ignored:** {sum(message_filter.dropped.values())}",
+        f"🗂 **View cache:** {view_cache.hits} hits, {view_cache.misses} misses",
+        f"⏳ **Interaction acks:** p99 ≤{deadlines.ack_latency.quantile(0.99) * 1000:g} ms, "
+        f"{sum(deadlines.auto_deferred.values())} deferred automatically, {deadlines.misses} missed\n",
+    ]
+
+    busiest = sorted(metrics.handlers.items(), key=lambda item: item[1].calls, reverse=True)
+    handler_lines = [
+        f"`{name}` — {stats.calls} calls, {stats.errors} errors, "
+        f"p50 ≤{stats.latency.quantile(0.5) * 1000:g} ms, p99 ≤{stats.latency.quantile(0.99) * 1000:g} ms"
+        for name, stats in busiest if stats.calls
+    ]
+
+    def fitted(lines, budget, what):
+        shown = lines_that_fit(lines, budget)
+        return lines[:shown] + ([f"…and {len(lines) - shown} more {what}"] if shown < len(lines) else [])
+
+    # Shards get up to a third of one message, the busiest handlers what is left.
+    budget = (MAX_CONTENT_LENGTH - len("\n".join(head + tail)) - len(f"\n…and {len(shard_lines)} more shards")
+              - len(f"\n…and {len(handler_lines)} more handlers") - 2)
+    shards = fitted(shard_lines, budget // 3, "shards")
+    handlers = fitted(handler_lines, budget - len("\n".join(shards)), "handlers")
+    await interaction.response.send_message("\n".join(head + shards + tail + handlers), ephemeral=True)
+
+
 
 
 
 
 
 @bot.command(name='help_template')
+@metrics.instrument("!help_template")
 async def help_command(ctx):
     """Help command"""
-    help_message = template_bot.get_help_message()
+    help_message = help_view(ctx.guild.id) if ctx.guild else template_bot.get_help_message()
     await ctx.send(help_message)
 
 
 @bot.event
+@metrics.instrument("on_command_error")
 async def on_command_error(ctx, error):
     """Handle command errors"""
     if isinstance(error, commands.CommandNotFound):
         return  
     
-    print(f"An error occurred: {error}")
+    logging.error(
+        f"Command error: {error}", exc_info=error,
+        extra={"handler": f"!{ctx.command}", "guild": ctx.guild.id if ctx.guild else None},
+    )
     await ctx.send("An error occurred while processing your request.")
 
 
@@ -0,0 +1,238 @@
+import asyncio
+import csv
+import io
+import logging
+import tempfile
+import time
+from collections import deque
+
+import aiohttp
+import discord
+
+from amounts import ZERO, AmountError, parse_amount
+from deadlines import TOKEN_LIFETIME
+
+
+# Accepted header spellings for each column, compared casefolded with
+# spaces, dashes and underscores removed.
+COLUMN_ALIASES = {
+    "player": ("player", "playername", "name"),
+    "cashtag": ("cashtag", "tag"),
+    "loaded": ("loaded", "loadedamount"),
+    "redeemed": ("redeemed", "redeemedamount"),
+    "tip": ("tip",),
+    "game": ("game", "gameload"),
+}
+REQUIRED_COLUMNS = ("player", "cashtag", "loaded", "redeemed")
+MAX_TEXT_LENGTH = 64
+MAX_ROW_LENGTH = 4096
+ERRORS_SHOWN = 10
+# Stop editing the interaction response this long before its token expires.
+TOKEN_MARGIN = 60.0
+
+
+class CsvImportError(ValueError):
+    """A CSV file or row that cannot be imported"""
+
+
+def _normalize(name):
+    return name.casefold().replace(" ", "").replace("_", "").replace("-", "")
+
+
+def parse_header(row):
+    """Map column name -> index from a header row"""
+    lookup = {alias: column for column, aliases in COLUMN_ALIASES.items() for alias in aliases}
+    columns = {}
+    for index, name in enumerate(row):
+        column = lookup.get(_normalize(name))
+        if column is not None and column not in columns:
+            columns[column] = index
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise CsvImportError(f"missing column(s): {', '.join(missing)}")
+    return columns
+
+
+def parse_row(row, columns):
+    """Validate one CSV row into a dict of player, cashtag and Decimal amounts"""
+    def cell(column):
+        index = columns.get(column)
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    values = {}
+    for column in ("player", "cashtag"):
+        text = cell(column)
+        if not text:
+            raise CsvImportError(f"{column} is required")
+        if len(text) > MAX_TEXT_LENGTH:
+            raise CsvImportError(f"{column} is longer than {MAX_TEXT_LENGTH} characters")
+        values[column] = text
+    for column in ("loaded", "redeemed", "tip", "game"):
+        try:
+            values[column] = parse_amount(cell(column), default=ZERO)
+        except AmountError as e:
+            raise CsvImportError(f"{column}: {e}") from None
+    return values
+
+
+async def csv_rows(lines):
+    """Yield ``(line_number, fields)`` from an async iterator of byte lines.
+
+    Only one record is held at a time. A quoted field may span lines; the
+    record is complete once its quotes balance. Blank lines are skipped.
+    """
+    record = ""
+    start = 0
+    line_number = 0
+    async for raw in lines:
+        line_number += 1
+        text = raw.decode("utf-8-sig" if line_number == 1 else "utf-8", errors="replace")
+        if not record:
+            start = line_number
+        record += text
+        if len(record) > MAX_ROW_LENGTH:
+            raise CsvImportError(f"line {start}: row is longer than {MAX_ROW_LENGTH} characters")
+        if record.count('"') % 2:
+            continue
+        if record.strip():
+            yield start, next(csv.reader([record]))
+        record = ""
+    if record.strip():
+        raise CsvImportError(f"line {start}: unterminated quoted field")
+
+
+async def attachment_lines(attachment):
+    """Stream an attachment's lines without downloading it whole"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(attachment.url) as response:
+            response.raise_for_status()
+            async for line in response.content:
+                yield line
+
+
+class CashoutImport:
+    """One streaming CSV import.
+
+    Rows are validated and handed to ``post_row`` as they are read. Up to
+    ``max_in_flight`` posts are outstanding at once, enough for the
+    dispatcher to merge them into batches while keeping memory flat.
+    Errors are spooled to a temporary file for the final report; only the
+    first few are kept in memory for display.
+    """
+
+    def __init__(self, max_in_flight=10, progress_every=2.0):
+        self.max_in_flight = max_in_flight
+        self.progress_every = progress_every
+        self.rows = 0
+        self.posted = 0
+        self.failed = 0
+        self.first_errors = []
+        self._spool = tempfile.SpooledTemporaryFile(max_size=256 * 1024, mode="w+b")
+        self._errors = io.TextIOWrapper(self._spool, encoding="utf-8", newline="")
+        self._error_writer = csv.writer(self._errors)
+        self._error_writer.writerow(("line", "error"))
+
+    def _error(self, line_number, message):
+        self.failed += 1
+        if len(self.first_errors) < ERRORS_SHOWN:
+            self.first_errors.append((line_number, message))
+        self._error_writer.writerow((line_number, message))
+
+    async def _settle(self, line_number, task):
+        try:
+            await task
+        except CsvImportError as e:
+            self._error(line_number, str(e))
+        except Exception as e:
+            self._error(line_number, f"post failed: {e}")
+        else:
+            self.posted += 1
+
+    async def run(self, lines, post_row, on_progress=None):
+        """Import every row of ``lines``.
+
+        ``post_row(values)`` is called with each valid row and returns an
+        awaitable that completes once the row is posted, or raises
+        CsvImportError for a row it refused. ``on_progress`` is awaited at
+        most every ``progress_every`` seconds.
+        """
+        in_flight = deque()
+        next_progress = time.monotonic() + self.progress_every
+        rows = csv_rows(lines)
+        try:
+            try:
+                _, header = await anext(rows)
+            except StopAsyncIteration:
+                raise CsvImportError("the file is empty") from None
+            columns = parse_header(header)
+
+            async for line_number, row in rows:
+                self.rows += 1
+                try:
+                    values = parse_row(row, columns)
+                except CsvImportError as e:
+                    self._error(line_number, str(e))
+                    continue
+                in_flight.append((line_number, asyncio.ensure_future(post_row(values))))
+                if len(in_flight) >= self.max_in_flight:
+                    await self._settle(*in_flight.popleft())
+
+                if on_progress is not None and time.monotonic() >= next_progress:
+                    await on_progress(self)
+                    next_progress = time.monotonic() + self.progress_every
+        finally:
+            while in_flight:
+                await self._settle(*in_flight.popleft())
+            await rows.aclose()
+
+    def error_report(self):
+        """The spooled errors as a binary CSV file object, or None without errors"""
+        if not self.failed:
+            return None
+        self._errors.flush()
+        self._spool.seek(0)
+        return self._spool
+
+    def close(self):
+        self._errors.close()
+
+
+class ImportStatus:
+    """Where an import shows its progress and final report.
+
+    Posting paces imports at about five rows a second, so a large file
+    outlives the interaction token. The deferred response is edited while
+    the token is good; after that, or once an edit fails, the status moves
+    to a message the bot posts in the command channel and edits from then
+    on.
+    """
+
+    def __init__(self, interaction, age=0.0):
+        """``age`` is how many seconds ago Discord created ``interaction``"""
+        self.interaction = interaction
+        self.expires = time.monotonic() - age + TOKEN_LIFETIME - TOKEN_MARGIN
+        self.message = None
+
+    async def update(self, content, attachments=()):
+        """Show ``content``; errors are logged, an import never stops for them"""
+        attachments = list(attachments)
+        if self.message is None and time.monotonic() < self.expires:
+            try:
+                await self.interaction.edit_original_response(content=content, attachments=attachments)
+                return
+            except discord.HTTPException as e:
+                logging.warning(f"Import status edit failed, moving to a channel message: {e}")
+                self.expires = 0.0
+                for file in attachments:
+                    file.reset()
+        try:
+            if self.message is None:
+                self.message = await self.interaction.channel.send(
+                    f"{self.interaction.user.mention} {content}", files=attachments
+                )
+            else:
+                await self.message.edit(
+                    content=f"{self.interaction.user.mention} {content}", attachments=attachments
+                )
+        except discord.HTTPException as e:
+            logging.warning(f"Import status message failed: {e}")
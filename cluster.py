@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import random
+import signal
+import time
+
+from jsonlog import setup_logging
+
+
+STATUS_FILE = "cluster_status.json"
+
+
+def shard_ranges(shard_count, workers):
+    """Split shard ids 0..shard_count-1 into contiguous per-worker ranges"""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def shard_status(bot):
+    """Health of each shard this process runs"""
+    guilds = {}
+    for guild in bot.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+
+    shards = getattr(bot, "shards", None)
+    if not shards:
+        return [{
+            "shard_id": 0, "latency": bot.latency, "closed": bot.is_closed(),
+            "ratelimited": bot.is_ws_ratelimited(), "guilds": len(bot.guilds),
+        }]
+    return [
+        {
+            "shard_id": shard_id,
+            "latency": info.latency,
+            "closed": info.is_closed(),
+            "ratelimited": info.is_ws_ratelimited(),
+            "guilds": guilds.get(shard_id, 0),
+        }
+        for shard_id, info in sorted(shards.items())
+    ]
+
+
+async def recommended_shard_count(token):
+    """Ask Discord how many shards the bot should run"""
+    from discord.http import HTTPClient
+
+    http = HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        shard_count, _, _ = await http.get_bot_gateway()
+    finally:
+        await http.close()
+    return shard_count
+
+
+async def _report_status(bot, worker_id, status_queue, interval):
+    await bot.wait_until_ready()
+    status_queue.put({"worker": worker_id, "event": "ready", "time": time.time()})
+    while not bot.is_closed():
+        status_queue.put({
+            "worker": worker_id, "event": "status", "time": time.time(),
+            "shards": shard_status(bot),
+        })
+        await asyncio.sleep(interval)
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _worker_main(token, worker_id, shard_ids, shard_count, status_queue, interval):
+    """Worker process: run the bot for a subset of shards"""
+    metrics_port = os.environ.get("METRICS_PORT")
+    if metrics_port:
+        os.environ["METRICS_PORT"] = str(int(metrics_port) + worker_id)
+
+    setup_logging(fields={"worker": worker_id})
+    import main
+    from bot import bot
+
+    # terminate() from the supervisor should still flush settings.
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+
+    bot.shard_count = shard_count
+    bot.shard_ids = shard_ids
+
+    async def setup_hook():
+        asyncio.get_running_loop().create_task(_report_status(bot, worker_id, status_queue, interval))
+
+    bot.setup_hook = setup_hook
+    main.serve(token)
+
+
+def _fake_worker_main(token, worker_id, shard_ids, shard_count, status_queue, interval):
+    """Stand-in gateway worker for exercising the launcher without Discord"""
+    time.sleep(random.uniform(0.1, 0.5))
+    status_queue.put({"worker": worker_id, "event": "ready", "time": time.time()})
+    while True:
+        status_queue.put({
+            "worker": worker_id, "event": "status", "time": time.time(),
+            "shards": [
+                {"shard_id": shard_id, "latency": random.uniform(0.03, 0.12), "closed": False,
+                 "ratelimited": False, "guilds": random.randint(900, 1100)}
+                for shard_id in shard_ids
+            ],
+        })
+        time.sleep(interval)
+
+
+class ClusterSupervisor:
+    """Runs shard ranges in separate worker processes.
+
+    Workers are started one at a time, each after the previous one reports
+    ready, so IDENTIFY calls stay within Discord's session start limits.
+    Dead workers are restarted with backoff. Every status interval the
+    per-shard health is logged and written to ``status_file``.
+
+    Settings stay consistent because a guild always lives on exactly one
+    shard, so only one worker ever writes a given guild's row. The SQLite
+    store is shared by all workers, and its WAL mode lets them write
+    concurrently.
+    """
+
+    def __init__(self, token, shard_count, workers, worker_target=_worker_main,
+                 status_interval=15.0, ready_timeout=180.0, status_file=STATUS_FILE):
+        self.token = token
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, workers)
+        self.worker_target = worker_target
+        self.status_interval = status_interval
+        self.ready_timeout = ready_timeout
+        self.status_file = status_file
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._queue = self._ctx.Queue()
+        self.processes = {}
+        self.restarts = dict.fromkeys(range(len(self.ranges)), 0)
+        self.status = {}
+
+    def _spawn(self, worker_id):
+        process = self._ctx.Process(
+            target=self.worker_target,
+            args=(self.token, worker_id, self.ranges[worker_id], self.shard_count,
+                  self._queue, self.status_interval),
+            name=f"templatebot-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.status[worker_id] = {"state": "starting", "shards": [], "updated": time.time()}
+        logging.info(f"Started worker {worker_id} for shards {self.ranges[worker_id]} (pid {process.pid})")
+
+    def _handle(self, message):
+        worker = self.status.setdefault(message["worker"], {})
+        worker["updated"] = message["time"]
+        if message["event"] == "ready":
+            worker["state"] = "ready"
+        elif message["event"] == "status":
+            worker["state"] = "ready"
+            worker["shards"] = message["shards"]
+
+    def _drain(self, timeout):
+        try:
+            self._handle(self._queue.get(timeout=timeout))
+            while True:
+                self._handle(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _wait_ready(self, worker_id):
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            self._drain(0.5)
+            if self.status[worker_id].get("state") == "ready":
+                return True
+            if not self.processes[worker_id].is_alive():
+                return False
+        logging.warning(f"Worker {worker_id} did not report ready within {self.ready_timeout:.0f}s")
+        return False
+
+    def status_table(self):
+        """Per-shard health rows"""
+        rows = []
+        for worker_id, worker in sorted(self.status.items()):
+            process = self.processes.get(worker_id)
+            alive = process is not None and process.is_alive()
+            for shard in worker.get("shards") or [{"shard_id": s} for s in self.ranges[worker_id]]:
+                rows.append({
+                    "worker": worker_id,
+                    "pid": process.pid if process else None,
+                    "alive": alive,
+                    "state": worker.get("state"),
+                    "restarts": self.restarts[worker_id],
+                    "age": time.time() - worker.get("updated", 0),
+                    **shard,
+                })
+        return rows
+
+    def _publish_status(self):
+        rows = self.status_table()
+        for row in rows:
+            latency = row.get("latency")
+            latency_text = f"{latency * 1000:.0f}ms" if latency is not None else "-"
+            logging.info(
+                f"shard {row['shard_id']:>3} worker {row['worker']} {row['state']:<8} "
+                f"latency {latency_text:>6} guilds {row.get('guilds', '-')}"
+                f"{'' if row['alive'] else ' (DOWN)'}"
+            )
+        tmp_path = f"{self.status_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"updated": time.time(), "shard_count": self.shard_count, "shards": rows}, f, indent=2)
+        os.replace(tmp_path, self.status_file)
+
+    def run(self):
+        if os.environ.get("SETTINGS_BACKEND", "sqlite") == "json":
+            raise RuntimeError("Cluster mode needs the sqlite settings backend")
+
+        try:
+            for worker_id in range(len(self.ranges)):
+                self._spawn(worker_id)
+                self._wait_ready(worker_id)
+
+            next_report = 0.0
+            while True:
+                self._drain(1.0)
+                for worker_id, process in self.processes.items():
+                    if not process.is_alive():
+                        self.restarts[worker_id] += 1
+                        delay = min(60, 2 ** self.restarts[worker_id])
+                        logging.warning(
+                            f"Worker {worker_id} exited with code {process.exitcode}; restarting in {delay}s"
+                        )
+                        time.sleep(delay)
+                        self._spawn(worker_id)
+                if time.monotonic() >= next_report:
+                    self._publish_status()
+                    next_report = time.monotonic() + self.status_interval
+        finally:
+            for process in self.processes.values():
+                if process.is_alive():
+                    process.terminate()
+            for process in self.processes.values():
+                process.join(timeout=10)
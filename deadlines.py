@@ -0,0 +1,238 @@
+import asyncio
+import functools
+import heapq
+import inspect
+import itertools
+import time
+
+import discord
+
+from metrics import Histogram
+
+
+# Discord drops interactions that are not acknowledged within this window.
+ACK_WINDOW = 3.0
+# After this, the interaction token no longer accepts followups or edits.
+TOKEN_LIFETIME = 15 * 60.0
+
+
+def interaction_age(interaction):
+    """Seconds since Discord created the interaction, from its snowflake"""
+    created_at = getattr(interaction, "created_at", None)
+    if created_at is None:
+        return 0.0
+    # Clock skew can make this negative or absurd; only the window matters.
+    return min(ACK_WINDOW, max(0.0, (discord.utils.utcnow() - created_at).total_seconds()))
+
+
+def _present(kwargs):
+    """followup.send rejects None where response.send_message accepts it"""
+    return {key: value for key, value in kwargs.items() if value is not None and key != "delete_after"}
+
+
+class DeadlineResponse:
+    """``interaction.response`` for guarded handlers.
+
+    Behaves like the real one until the guard has deferred the interaction;
+    after that, replies go out as the followup that replaces the "thinking"
+    message, and message edits as edits of the original response.
+    """
+
+    def __init__(self, guarded):
+        self._guarded = guarded
+        self._response = guarded.interaction.response
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def is_done(self):
+        return self._response.is_done()
+
+    async def send_message(self, content=None, **kwargs):
+        guarded = self._guarded
+        if guarded.responding():
+            await guarded.defer_landed()
+        if guarded.auto_deferred:
+            return await guarded.interaction.followup.send(content, **_present(kwargs))
+        return await guarded.ack(self._response.send_message(content, **kwargs))
+
+    async def edit_message(self, **kwargs):
+        guarded = self._guarded
+        if guarded.responding():
+            await guarded.defer_landed()
+        if guarded.auto_deferred:
+            kwargs.pop("delete_after", None)
+            return await guarded.interaction.edit_original_response(**kwargs)
+        return await guarded.ack(self._response.edit_message(**kwargs))
+
+    async def send_modal(self, modal):
+        guarded = self._guarded
+        if guarded.responding():
+            await guarded.defer_landed()
+        return await guarded.ack(self._response.send_modal(modal))
+
+    async def defer(self, **kwargs):
+        guarded = self._guarded
+        if guarded.responding():
+            await guarded.defer_landed()
+        if guarded.auto_deferred:
+            return
+        return await guarded.ack(self._response.defer(**kwargs))
+
+
+class GuardedInteraction:
+    """Wraps an interaction so the guard and the handler cannot both answer it"""
+
+    __slots__ = ("interaction", "deadlines", "handler", "ephemeral", "age_at_entry", "entered",
+                 "answering", "finished", "auto_deferred", "deferring", "response")
+
+    def __init__(self, interaction, deadlines, handler, ephemeral):
+        self.interaction = interaction
+        self.deadlines = deadlines
+        self.handler = handler
+        self.ephemeral = ephemeral
+        self.age_at_entry = interaction_age(interaction)
+        self.entered = time.perf_counter()
+        self.answering = False
+        self.finished = False
+        self.auto_deferred = False
+        self.deferring = None
+        self.response = DeadlineResponse(self)
+
+    def __getattr__(self, name):
+        return getattr(self.interaction, name)
+
+    def elapsed(self):
+        """Seconds since Discord created the interaction"""
+        return self.age_at_entry + time.perf_counter() - self.entered
+
+    def responding(self):
+        """Called before each reply; the first one feeds the projection.
+
+        True when an automatic defer is still on the wire and must land first.
+        """
+        if not self.answering:
+            self.answering = True
+            self.deadlines.time_to_response(self.handler).observe(time.perf_counter() - self.entered)
+        return self.deferring is not None and not self.deferring.done()
+
+    async def defer_landed(self):
+        await asyncio.wait((self.deferring,))
+
+    async def ack(self, call):
+        try:
+            result = await call
+        except discord.NotFound as e:
+            if e.code == 10062:  # Unknown interaction: the window had closed
+                self.deadlines.misses += 1
+            raise
+        self.deadlines.acknowledged(self.elapsed())
+        return result
+
+    async def defer_for_deadline(self, reason):
+        if self.answering or self.interaction.response.is_done():
+            return
+        if getattr(self.interaction, "type", None) is discord.InteractionType.component:
+            # Deferred update: the handler's edit_message becomes an edit of the message.
+            call = self.interaction.response.defer()
+        else:
+            call = self.interaction.response.defer(ephemeral=self.ephemeral, thinking=True)
+        await self.ack(call)
+        self.auto_deferred = True
+        self.deadlines.auto_deferred[reason] += 1
+
+
+class InteractionDeadlines:
+    """Acknowledges app command interactions before Discord's 3 second window closes.
+
+    Handlers wrapped with ``guard(name)`` receive a :class:`GuardedInteraction`.
+    When the handler's p99 time to its first response, plus the time the
+    interaction spent reaching us, is past ``budget``, the interaction is
+    deferred before the handler runs. Otherwise a watchdog defers it once
+    ``budget`` is reached without a response. Either way the handler's own
+    replies are redirected to followups, so it needs no changes. ``budget``
+    leaves room for the defer request's own round trip.
+    """
+
+    def __init__(self, budget=2.0):
+        self.budget = budget
+        self.ack_latency = Histogram()
+        self.handlers = {}
+        self.acks = 0
+        self.misses = 0
+        self.auto_deferred = {"projected": 0, "watchdog": 0}
+        # One timer for the earliest pending deadline rather than one per
+        # interaction; finished entries are dropped lazily from the front.
+        self._pending = []
+        self._order = itertools.count()
+        self._timer = None
+        self._timer_at = None
+
+    def time_to_response(self, name):
+        histogram = self.handlers.get(name)
+        if histogram is None:
+            histogram = self.handlers[name] = Histogram()
+        return histogram
+
+    def projected(self, name, age):
+        return age + self.time_to_response(name).quantile(0.99)
+
+    def acknowledged(self, latency):
+        self.acks += 1
+        self.ack_latency.observe(latency)
+        if latency > ACK_WINDOW:
+            self.misses += 1
+
+    def guard(self, name=None, ephemeral=True, can_defer=True):
+        """Decorator for app command callbacks, modal submits and view buttons.
+
+        ``ephemeral`` is the visibility of an automatic "thinking" reply and
+        must match the handler's own replies. Handlers that open a modal
+        pass ``can_defer=False``: a deferred interaction cannot show one.
+        """
+        def decorator(func):
+            parameters = iter(inspect.signature(func).parameters)
+            position = 1 if next(parameters, None) == "self" else 0
+            handler = name or func.__name__
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                guarded = GuardedInteraction(args[position], self, handler, ephemeral)
+                args = args[:position] + (guarded,) + args[position + 1:]
+                if can_defer:
+                    if self.projected(handler, guarded.age_at_entry) >= self.budget:
+                        await guarded.defer_for_deadline("projected")
+                    else:
+                        self._watch(guarded, self.budget - guarded.age_at_entry)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    guarded.finished = True
+            return wrapper
+        return decorator
+
+    def _watch(self, guarded, delay):
+        loop = asyncio.get_running_loop()
+        pending = self._pending
+        while pending and pending[0][2].finished:
+            heapq.heappop(pending)
+        deadline = loop.time() + delay
+        heapq.heappush(pending, (deadline, next(self._order), guarded))
+        if self._timer_at is None or deadline < self._timer_at:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = loop.call_at(deadline, self._expire)
+            self._timer_at = deadline
+
+    def _expire(self):
+        loop = asyncio.get_running_loop()
+        pending = self._pending
+        now = loop.time()
+        while pending and (pending[0][0] <= now or pending[0][2].finished):
+            guarded = heapq.heappop(pending)[2]
+            if not guarded.finished and not guarded.answering:
+                guarded.deferring = loop.create_task(guarded.defer_for_deadline("watchdog"))
+        self._timer = self._timer_at = None
+        if pending:
+            self._timer_at = pending[0][0]
+            self._timer = loop.call_at(self._timer_at, self._expire)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from amounts import AmountError, parse_amount
+from ledger import to_cents
+from persistence import WriteBehind
+
+
+DEDUPE_FILE = "cashout_dedupe.json"
+
+
+def canonical_amount(value):
+    """Cents for a Decimal or parseable text, so '$1,500' and '1500.00' agree"""
+    if isinstance(value, str):
+        try:
+            value = parse_amount(value, default=0)
+        except AmountError:
+            return value.strip().casefold()
+    return str(to_cents(value))
+
+
+def cashout_fingerprint(guild_id, player_name, cashtag, amounts):
+    """Stable hash of a cashout's guild, player, cashtag and amounts"""
+    canonical = "\x1f".join((
+        str(int(guild_id)),
+        player_name.strip().casefold(),
+        cashtag.strip().casefold(),
+        *(canonical_amount(amount) for amount in amounts),
+    ))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class DedupeCache(WriteBehind):
+    """Fingerprints of recent cashouts, expiring after ``window`` seconds.
+
+    Entries are kept in insertion order, which is also expiry order, so
+    expired entries are dropped from the front and lookups stay O(1).
+    At most ``max_entries`` are held; the oldest go first. With a ``path``
+    the live window is written behind to a JSON file and reloaded on start,
+    so a restart does not reopen it. Cluster workers each need their own
+    file (see persistence.shard_path), as each writes only its own entries.
+    """
+
+    def __init__(self, window=120.0, max_entries=10_000, path=None, delay=1.0):
+        super().__init__(delay)
+        self.window = window
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self.duplicates = 0
+        if path is not None:
+            self._load()
+
+    def _expire(self, now):
+        entries = self._entries
+        cutoff = now - self.window
+        while entries:
+            key, seen_at = next(iter(entries.items()))
+            if seen_at > cutoff:
+                break
+            del entries[key]
+
+    def seen(self, key, now=None):
+        """When ``key`` was last remembered, or None outside the window"""
+        now = time.time() if now is None else now
+        self._expire(now)
+        seen_at = self._entries.get(key)
+        if seen_at is not None:
+            self.duplicates += 1
+        return seen_at
+
+    def remember(self, key, now=None):
+        self._entries.pop(key, None)
+        self._entries[key] = time.time() if now is None else now
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if self.path is not None:
+            self.mark_dirty(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Failed to load {self.path}: {e}")
+            return
+        for key, seen_at in sorted(entries.items(), key=lambda item: item[1]):
+            self._entries[key] = seen_at
+        self._expire(time.time())
+
+    def _take_snapshot(self, dirty):
+        self._expire(time.time())
+        return dict(self._entries)
+
+    def _write(self, entries):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
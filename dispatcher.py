@@ -0,0 +1,220 @@
+import asyncio
+import time
+from collections import deque
+
+
+MAX_CONTENT_LENGTH = 2000
+MAX_EMBEDS = 10
+# Characters across all embeds of one message
+MAX_EMBED_LENGTH = 6000
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking"""
+
+    def __init__(self, rate, per):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Take one token and return how long to wait before using it"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.fill_rate
+
+    def until_full(self):
+        """Seconds until the bucket has refilled completely"""
+        tokens = self.tokens + (time.monotonic() - self.updated) * self.fill_rate
+        return max(0.0, (self.capacity - tokens) / self.fill_rate)
+
+
+def split_content(content, limit=MAX_CONTENT_LENGTH):
+    """``content`` cut into pieces of at most ``limit`` characters, at line breaks where possible"""
+    pieces = []
+    while len(content) > limit:
+        cut = content.rfind("\n", 0, limit + 1)
+        if cut > 0:
+            pieces.append(content[:cut])
+            content = content[cut + 1:]
+        else:
+            pieces.append(content[:limit])
+            content = content[limit:]
+    pieces.append(content)
+    return pieces
+
+
+class _Outbound:
+    __slots__ = ("content", "embed", "batchable", "future", "enqueued_at")
+
+    def __init__(self, content, embed, batchable, future):
+        self.content = content
+        self.embed = embed
+        self.batchable = batchable
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class _ChannelQueue:
+    __slots__ = ("channel", "pending", "bucket", "worker", "forget")
+
+    def __init__(self, channel, rate, per):
+        self.channel = channel
+        self.pending = deque()
+        self.bucket = TokenBucket(rate, per)
+        self.worker = None
+        self.forget = None
+
+
+class MessageDispatcher:
+    """Per-channel outbound send queue.
+
+    Every channel gets a FIFO drained by one worker task, paced by a local
+    token bucket that mirrors Discord's per-channel send limit (5 messages
+    per 5 seconds) plus a global bucket, so sends wait locally instead of
+    running into 429s. Consecutive batchable messages for the same channel
+    are merged into one payload while they fit in 2000 characters and,
+    for embeds, Discord's 10 embeds and 6000 embed characters per message.
+    Content too long for one message is split at line breaks. A drained
+    queue is dropped once its bucket has refilled, so channels that went
+    quiet hold no memory and a new queue cannot burst past the limit.
+    """
+
+    def __init__(self, channel_rate=5, channel_per=5.0, global_rate=50, global_per=1.0, max_batch=5):
+        self.channel_rate = channel_rate
+        self.channel_per = channel_per
+        self.global_bucket = TokenBucket(global_rate, global_per)
+        self.max_batch = max_batch
+        self.queues = {}
+
+        self.sent_messages = 0
+        self.sent_requests = 0
+        self.failed_requests = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def send(self, channel, content, *, role_id=None, batchable=True, embed=None):
+        """Queue ``content`` (and ``embed``) for ``channel`` and wait until it is posted.
+
+        ``role_id`` is pinged in the same payload rather than as a separate
+        message; it is only prepended when the content does not mention
+        the role already. Returns the :class:`discord.Message` the content
+        ended up in, which is shared when messages were merged. Content
+        over 2000 characters goes out as consecutive messages, the embed
+        with the last one, which is returned.
+        """
+        if role_id:
+            ping = f"<@&{role_id}>"
+            if ping not in content:
+                content = f"{ping}\n{content}" if content else ping
+
+        queue = self.queues.get(channel.id)
+        if queue is None:
+            queue = self.queues[channel.id] = _ChannelQueue(channel, self.channel_rate, self.channel_per)
+        loop = asyncio.get_running_loop()
+        if content and len(content) > MAX_CONTENT_LENGTH:
+            pieces = split_content(content)
+        else:
+            pieces = [content]
+        futures = []
+        for i, piece in enumerate(pieces, 1):
+            future = loop.create_future()
+            queue.pending.append(_Outbound(piece, embed if i == len(pieces) else None, batchable, future))
+            futures.append(future)
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._drain(queue))
+        if len(futures) == 1:
+            return await futures[0]
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results[-1]
+
+    def _next_batch(self, pending):
+        batch = [pending.popleft()]
+        if not batch[0].batchable:
+            return batch
+        length = len(batch[0].content)
+        embeds = 0 if batch[0].embed is None else 1
+        embed_length = 0 if batch[0].embed is None else len(batch[0].embed)
+        while pending and len(batch) < self.max_batch:
+            item = pending[0]
+            length += len(item.content) + 1
+            if item.embed is not None:
+                embeds += 1
+                embed_length += len(item.embed)
+            if (not item.batchable or length > MAX_CONTENT_LENGTH
+                    or embeds > MAX_EMBEDS or embed_length > MAX_EMBED_LENGTH):
+                break
+            batch.append(pending.popleft())
+        return batch
+
+    async def _drain(self, queue):
+        while queue.pending:
+            wait = max(queue.bucket.reserve(), self.global_bucket.reserve())
+            if wait:
+                await asyncio.sleep(wait)
+
+            batch = self._next_batch(queue.pending)
+            now = time.monotonic()
+            for item in batch:
+                waited = now - item.enqueued_at
+                self.waited += 1
+                self.wait_total += waited
+                if waited > self.wait_max:
+                    self.wait_max = waited
+
+            content = "\n".join(item.content for item in batch if item.content)
+            embeds = [item.embed for item in batch if item.embed is not None]
+            try:
+                if embeds:
+                    message = await queue.channel.send(content or None, embeds=embeds)
+                else:
+                    message = await queue.channel.send(content)
+            except Exception as e:
+                self.failed_requests += 1
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                continue
+
+            self.sent_requests += 1
+            self.sent_messages += len(batch)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_result(message)
+
+        if queue.forget is None:
+            queue.forget = asyncio.get_running_loop().call_later(queue.bucket.until_full(), self._forget, queue)
+
+    def _forget(self, queue):
+        """Drop a drained ``queue`` once its bucket is full again"""
+        queue.forget = None
+        if queue.pending or not queue.worker.done():
+            return  # a worker is running and will schedule the next call
+        idle = queue.bucket.until_full()
+        if idle:
+            queue.forget = asyncio.get_running_loop().call_later(idle, self._forget, queue)
+        elif self.queues.get(queue.channel.id) is queue:
+            del self.queues[queue.channel.id]
+
+    def stats(self):
+        """Queue depth and wait-time metrics"""
+        depths = {channel_id: len(q.pending) for channel_id, q in self.queues.items() if q.pending}
+        return {
+            "queue_depth": sum(depths.values()),
+            "queue_depth_by_channel": depths,
+            "sent_messages": self.sent_messages,
+            "sent_requests": self.sent_requests,
+            "failed_requests": self.failed_requests,
+            "merged_messages": self.sent_messages - self.sent_requests,
+            "wait_avg": self.wait_total / self.waited if self.waited else 0.0,
+            "wait_max": self.wait_max,
+        }
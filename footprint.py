@@ -0,0 +1,73 @@
+import os
+import resource
+import tracemalloc
+
+import discord
+
+
+PROFILES = ("default", "low_memory")
+
+
+def gateway_options(profile="default"):
+    """Keyword arguments for the bot constructor under a gateway profile.
+
+    ``low_memory`` subscribes only to what the handlers use: guilds (roles
+    and channels), guild messages and their content. Member chunking and
+    the member cache are off, and so is the message cache; nothing in
+    bot.py looks messages up after on_message has run.
+    """
+    if profile == "low_memory":
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = True
+        intents.message_content = True
+        return {
+            "intents": intents,
+            "member_cache_flags": discord.MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+            "max_messages": None,
+        }
+    if profile != "default":
+        raise ValueError(f"unknown gateway profile {profile!r}, expected one of {', '.join(PROFILES)}")
+    intents = discord.Intents.default()
+    intents.message_content = True
+    return {"intents": intents}
+
+
+def rss_bytes():
+    """Current resident set size, or the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def memory_report(top=10):
+    """RSS plus, when tracemalloc is running, the largest allocation sites"""
+    report = {"rss_bytes": rss_bytes(), "tracing": tracemalloc.is_tracing()}
+    if not report["tracing"]:
+        return report
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+    report["traced_bytes"], report["traced_peak_bytes"] = tracemalloc.get_traced_memory()
+    report["top"] = [
+        (str(stat.traceback[0]), stat.size, stat.count)
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+    return report
+
+
+def format_memory_report(report):
+    lines = [f"RSS: {report['rss_bytes'] / 2**20:.1f} MiB"]
+    if not report["tracing"]:
+        lines.append("tracemalloc is not running (set PYTHONTRACEMALLOC=1 for allocation sites)")
+        return "\n".join(lines)
+    lines.append(
+        f"traced: {report['traced_bytes'] / 2**20:.1f} MiB (peak {report['traced_peak_bytes'] / 2**20:.1f} MiB)"
+    )
+    for where, size, count in report["top"]:
+        lines.append(f"  {size / 1024:>10,.0f} KiB {count:>8} blocks  {where}")
+    return "\n".join(lines)
@@ -0,0 +1,179 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+
+
+# Attributes every LogRecord has; anything else was passed in ``extra``.
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line.
+
+    Fields passed with ``extra=`` (``guild``, ``handler``, ``latency_ms``...)
+    become top-level keys, as do the constant ``fields`` given here.
+    """
+
+    def __init__(self, fields=None):
+        super().__init__()
+        self.fields = dict(fields or {})
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(self.fields)
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """Passes one in ``every`` records below INFO per call site; INFO and up always pass"""
+
+    max_sites = 10_000
+
+    def __init__(self, every=1):
+        super().__init__()
+        self.every = every
+        self.seen = {}
+        self.dropped = 0
+
+    def keep(self, key):
+        if self.every <= 1:
+            return True
+        count = self.seen.get(key, 0)
+        if count == 0 and len(self.seen) >= self.max_sites:
+            # Messages built with f-strings make every call a new site.
+            self.seen.clear()
+        self.seen[key] = count + 1
+        if count % self.every == 0:
+            return True
+        self.dropped += 1
+        return False
+
+    def filter(self, record):
+        # ``sampled`` marks records their caller already passed through keep().
+        return record.levelno >= logging.INFO or "sampled" in record.__dict__ or self.keep((record.name, record.msg))
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are; formatting happens on the listener thread.
+
+    The stock QueueHandler formats on the caller so records can cross
+    processes; this queue never leaves the process. Arguments should not
+    be mutated after the call, as they are formatted later.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class QueuedLogger(logging.Logger):
+    """Logger that enqueues a plain tuple instead of building a LogRecord.
+
+    Building a record (caller lookup, thread and process names) costs
+    several times more than the rest of a log call; the listener thread
+    builds it instead. Only used while ``setup_logging`` owns the root
+    handler, and only for loggers without handlers or filters of their
+    own. Anything else, and records with exception or stack info, take
+    the standard path.
+    """
+
+    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1):
+        records = _records
+        if records is None or exc_info or stack_info or self.handlers or self.filters:
+            return super()._log(level, msg, args, exc_info, extra, stack_info, stacklevel + 1)
+        if level < logging.INFO and (extra is None or "sampled" not in extra):
+            if not debug_sampler.keep((self.name, msg)):
+                return
+        records.put((self.name, level, msg, args, extra, time.time()))
+
+
+def get_logger(name):
+    """A :class:`QueuedLogger` for ``name``, unless a plain logger already exists"""
+    manager = logging.Logger.manager
+    previous = manager.loggerClass
+    manager.setLoggerClass(QueuedLogger)
+    try:
+        return logging.getLogger(name)
+    finally:
+        manager.loggerClass = previous
+
+
+class _Listener(logging.handlers.QueueListener):
+    def prepare(self, item):
+        if type(item) is not tuple:
+            return item
+        name, level, msg, args, extra, created = item
+        record = logging.LogRecord(name, level, "", 0, msg, args, None)
+        record.created = created
+        record.msecs = created % 1 * 1000
+        if extra:
+            record.__dict__.update(extra)
+        return record
+
+
+debug_sampler = DebugSampler()
+_records = None
+_listener = None
+
+
+def setup_logging(level=None, debug_every=None, fields=None, stream=None):
+    """Send all logging through a queue written out by a background thread.
+
+    Replaces the root logger's handlers. Records are JSON lines on
+    ``stream`` (stderr by default) with ``fields`` added to each. ``level``
+    defaults to LOG_LEVEL (DEBUG, INFO, WARNING...) and ``debug_every``,
+    one debug record kept per call site in so many, to LOG_DEBUG_SAMPLE;
+    both are read from the environment here, so after .env is loaded.
+    Returns the queue listener; it is stopped, and the queue flushed, at
+    exit.
+    """
+    global _listener, _records
+    if _listener is None:
+        atexit.register(stop_logging)
+    else:
+        stop_logging()
+
+    if level is None:
+        level = os.environ.get("LOG_LEVEL", "INFO")
+    if debug_every is None:
+        debug_every = int(os.environ.get("LOG_DEBUG_SAMPLE", "100"))
+    debug_sampler.every = debug_every
+    records = queue.SimpleQueue()
+    handler = LocalQueueHandler(records)
+    handler.addFilter(debug_sampler)
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter(fields))
+    _listener = _Listener(records, output)
+    _listener.start()
+    _records = records
+    return _listener
+
+
+def stop_logging():
+    """Write out whatever is still queued and stop the listener thread"""
+    global _records
+    _records = None
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
@@ -0,0 +1,169 @@
+import asyncio
+import itertools
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+
+from persistence import WriteBehind
+
+
+LEDGER_DB = "cashout_ledger.db"
+
+COLUMNS = (
+    "id", "guild_id", "created_at", "operator_id", "player_name", "cashtag",
+    "loaded_cents", "redeemed_cents", "tip_cents", "game_cents", "pay_cents",
+)
+
+
+def to_cents(amount):
+    """Whole-unit amount (int or Decimal) -> integer cents"""
+    return int(round(amount * 100))
+
+
+def format_cents(cents):
+    """Integer cents -> '15' or '15.50'"""
+    if cents % 100 == 0:
+        return str(cents // 100)
+    return str(Decimal(cents).scaleb(-2))
+
+
+class CashoutLedger(WriteBehind):
+    """Append-only cashout ledger in SQLite.
+
+    ``record`` queues a row and returns immediately; queued rows are
+    inserted in one transaction from a worker thread. Queries flush first,
+    so they always see every recorded cashout. Pagination is keyset-based
+    on the row id (newest first), which keeps every page an index range
+    scan regardless of how deep it is.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cashouts ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " guild_id INTEGER NOT NULL,"
+        " created_at REAL NOT NULL,"
+        " operator_id INTEGER,"
+        " player_name TEXT NOT NULL,"
+        " player_key TEXT NOT NULL,"
+        " cashtag TEXT NOT NULL,"
+        " cashtag_key TEXT NOT NULL,"
+        " loaded_cents INTEGER NOT NULL,"
+        " redeemed_cents INTEGER NOT NULL,"
+        " tip_cents INTEGER NOT NULL,"
+        " game_cents INTEGER NOT NULL,"
+        " pay_cents INTEGER NOT NULL)",
+        # Each index implicitly ends in the rowid, so "... AND id < ?
+        # ORDER BY id DESC" pages are pure index range scans.
+        "CREATE INDEX IF NOT EXISTS cashouts_guild ON cashouts (guild_id)",
+        "CREATE INDEX IF NOT EXISTS cashouts_player ON cashouts (guild_id, player_key)",
+        "CREATE INDEX IF NOT EXISTS cashouts_cashtag ON cashouts (guild_id, cashtag_key)",
+        "CREATE INDEX IF NOT EXISTS cashouts_time ON cashouts (guild_id, created_at)",
+    )
+
+    def __init__(self, path=LEDGER_DB, delay=0.25):
+        super().__init__(delay)
+        self.path = path
+        self.pending_rows = {}
+        self._seq = itertools.count()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn_lock = threading.Lock()
+        with self._conn:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+        self.last_id = self._max_id()
+        # Highest id inserted through this connection; other processes
+        # sharing the database raise last_id but never this.
+        self.written_id = 0
+        self._listeners = []
+
+    def _max_id(self):
+        return self._conn.execute("SELECT max(id) FROM cashouts").fetchone()[0] or 0
+
+    def subscribe(self, listener):
+        """Call ``listener(row)`` for every recorded cashout"""
+        self._listeners.append(listener)
+
+    def record(self, guild_id, operator_id, player_name, cashtag, loaded, redeemed, tip, game, pay_amount):
+        """Queue one cashout for insertion"""
+        seq = next(self._seq)
+        row = self.pending_rows[seq] = (
+            guild_id, time.time(), operator_id,
+            player_name, player_name.casefold(), cashtag, cashtag.casefold(),
+            to_cents(loaded), to_cents(redeemed), to_cents(tip), to_cents(game), to_cents(pay_amount),
+        )
+        for listener in self._listeners:
+            listener(row)
+        self.mark_dirty(seq)
+
+    def _take_snapshot(self, dirty):
+        return [self.pending_rows[seq] for seq in sorted(dirty)]
+
+    def _written(self, dirty):
+        for seq in dirty:
+            self.pending_rows.pop(seq, None)
+
+    def _write(self, rows):
+        with self._conn_lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO cashouts (guild_id, created_at, operator_id, player_name, player_key,"
+                " cashtag, cashtag_key, loaded_cents, redeemed_cents, tip_cents, game_cents, pay_cents)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            # Still inside the write transaction, so this is our last row.
+            self.last_id = self.written_id = self._max_id()
+
+    def rows_after(self, ledger_id):
+        """Yield ``(id, row)`` for rows with a larger id, oldest first"""
+        cursor = self._conn.execute(
+            "SELECT id, guild_id, created_at, operator_id, player_name, player_key, cashtag,"
+            " cashtag_key, loaded_cents, redeemed_cents, tip_cents, game_cents, pay_cents"
+            " FROM cashouts WHERE id > ? ORDER BY id",
+            (ledger_id,),
+        )
+        for row in cursor:
+            yield row[0], row[1:]
+
+    def _query(self, sql, params):
+        with self._conn_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    async def history(self, guild_id, player=None, cashtag=None, before_id=None, limit=10):
+        """One page of a guild's cashouts, newest first.
+
+        Returns ``(rows, next_before_id)``; pass ``next_before_id`` back as
+        ``before_id`` to get the following page. It is None on the last page.
+        """
+        if self.pending:
+            await self.flush()
+
+        clauses = ["guild_id = ?"]
+        params = [guild_id]
+        if player:
+            clauses.append("player_key = ?")
+            params.append(player.strip().casefold())
+        if cashtag:
+            clauses.append("cashtag_key = ?")
+            params.append(cashtag.strip().casefold())
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        params.append(limit + 1)
+
+        sql = (
+            f"SELECT {', '.join(COLUMNS)} FROM cashouts WHERE {' AND '.join(clauses)}"
+            " ORDER BY id DESC LIMIT ?"
+        )
+        rows = await asyncio.to_thread(self._query, sql, params)
+        rows = [dict(zip(COLUMNS, row)) for row in rows]
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1]["id"]
+        return rows, None
+
+    def close(self):
+        self.flush_now()
+        self._conn.close()
@@ -1,26 +1,129 @@
 from dotenv import load_dotenv
+import argparse
+import asyncio
 import os
 import logging
-from bot import bot
+import time
+from jsonlog import setup_logging
+from startup import timer as startup_timer
 
 
-def main():
+def _open_state():
+    from bot import open_state
 
-    logging.basicConfig(
-        format="%(asctime)s %(levelname)s : %(message)s",
-        level = logging.INFO,
-    )
+    start = time.perf_counter()
+    open_state()
+    startup_timer.record("settings", time.perf_counter() - start)
+
+
+async def _profile_report(bot):
+    """--profile-startup: print the phase breakdown once commands are synced, then stop"""
+    await startup_timer.reached("tree_sync")
+    print(startup_timer.report(), flush=True)
+    await bot.close()
+
+
+async def run_bot(token, profile=False):
+    """Start the bot together with its background monitors"""
+    from bot import bot, metrics, template_bot
+
+    async with bot:
+        metrics.start_loop_monitor()
+        template_bot.registry.start_watcher()
+
+        # Settings, ledger and aggregates are read from disk while the
+        # login request is in flight; no event is handled before connect().
+        state = asyncio.ensure_future(asyncio.to_thread(_open_state))
+        try:
+            await bot.login(token)
+            startup_timer.mark("login")
+        finally:
+            await state
+
+        metrics_port = os.environ.get("METRICS_PORT")
+        if metrics_port:
+            await metrics.serve(os.environ.get("METRICS_HOST", "127.0.0.1"), int(metrics_port))
+            logging.info(f"Serving metrics on port {metrics_port}")
+
+        if profile:
+            asyncio.get_running_loop().create_task(_profile_report(bot))
+        await bot.connect()
+
+
+def serve(token, profile=False):
+    """Run the bot in this process until it is stopped"""
+    from bot import close_state, recorder
+
+    try:
+        asyncio.run(run_bot(token, profile))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_state()
+        recorder.flush_now()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the template bot")
+    parser.add_argument("--shards", help="total shard count, or 'auto' to use Discord's recommendation")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes to spread shards over")
+    parser.add_argument("--force-sync", action="store_true",
+                        help="sync the app command tree even if it has not changed")
+    parser.add_argument("--cluster-dry-run", action="store_true",
+                        help="run the cluster launcher against stand-in gateway workers")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long each startup phase took once commands are synced, then exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+
+    # .env can set LOG_LEVEL and LOG_DEBUG_SAMPLE as well as the token.
     load_dotenv()
-    token = os.environ["DISCORD_TOKEN"]
+    setup_logging()
+    args = parse_args(argv)
+    if args.force_sync:
+        os.environ["FORCE_COMMAND_SYNC"] = "1"
+
+    if args.cluster_dry_run:
+        import cluster
+        shard_count = int(args.shards) if args.shards and args.shards != "auto" else args.workers * 2
+        supervisor = cluster.ClusterSupervisor("", shard_count, args.workers, cluster._fake_worker_main,
+                                               status_interval=5.0)
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # Checked before bot.py is imported: that import alone takes a few hundred ms.
+    token = os.environ.get("DISCORD_TOKEN")
     if not token:
         raise RuntimeError(
             "Bot token not found"
         )
-    
+
+    shard_count = None
+    if args.shards and args.shards != "auto":
+        shard_count = int(args.shards)
+
+    if args.workers > 1:
+        import cluster
+        if shard_count is None:
+            shard_count = asyncio.run(cluster.recommended_shard_count(token))
+        logging.info(f"Starting cluster: {shard_count} shard(s) over {args.workers} worker(s)...")
+        try:
+            cluster.ClusterSupervisor(token, shard_count, args.workers).run()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    from bot import bot
+
+    startup_timer.mark("imports")
+    bot.shard_count = shard_count
     logging.info("Starting Bot...")
-    bot.run(token)
+    serve(token, args.profile_startup)
 
 if __name__ == "__main__":
     main()
-
-
@@ -0,0 +1,73 @@
+import re
+from functools import lru_cache
+
+
+MENTION = "mention"
+COMMAND = "command"
+
+
+@lru_cache(maxsize=8)
+def mention_pattern(user_id):
+    """Compiled ``<@id>`` / ``<@!id>`` pattern for a user, built once per id"""
+    return re.compile(f'<@!?{user_id}>')
+
+
+class MessageFilter:
+    """Cheap first-pass classifier for gateway messages.
+
+    ``classify`` returns ``MENTION`` for messages addressed to the bot,
+    ``COMMAND`` for known prefix commands and ``None`` for everything else,
+    doing string checks before any regex work. ``dropped`` counts rejected
+    messages per stage.
+    """
+
+    STAGES = ("own_message", "no_trigger", "not_mentioned", "no_guild", "unknown_command")
+
+    def __init__(self, prefix='!'):
+        self.prefix = prefix
+        self.bot_user_id = None
+        self.command_names = frozenset()
+        self._id_token = None
+        self._pattern = None
+        self.dropped = dict.fromkeys(self.STAGES, 0)
+        self.accepted = {MENTION: 0, COMMAND: 0}
+
+    def bind(self, bot_user_id, command_names=()):
+        """Attach the bot's user id and prefix command names"""
+        self.bot_user_id = bot_user_id
+        self.command_names = frozenset(command_names)
+        self._id_token = str(bot_user_id)
+        self._pattern = mention_pattern(bot_user_id)
+
+    def _drop(self, stage):
+        self.dropped[stage] += 1
+        return None
+
+    def _command(self, content):
+        name = content[len(self.prefix):].split(None, 1)
+        if name and name[0] in self.command_names:
+            self.accepted[COMMAND] += 1
+            return COMMAND
+        return self._drop("unknown_command")
+
+    def classify(self, message):
+        if message.author.id == self.bot_user_id:
+            return self._drop("own_message")
+
+        content = message.content
+        if self._id_token in content and self._pattern.search(content):
+            pass
+        elif message.mention_everyone or (
+            # Reply pings put the bot in ``mentions`` without a content token.
+            message.mentions and any(user.id == self.bot_user_id for user in message.mentions)
+        ):
+            pass
+        elif content.startswith(self.prefix):
+            return self._command(content)
+        else:
+            return self._drop("not_mentioned" if self._id_token in content else "no_trigger")
+
+        if message.guild is None:
+            return self._drop("no_guild")
+        self.accepted[MENTION] += 1
+        return MENTION
@@ -0,0 +1,204 @@
+import asyncio
+import functools
+import logging
+import math
+import time
+from bisect import bisect_left
+
+from jsonlog import debug_sampler, get_logger
+
+
+handler_log = get_logger("templatebot.handlers")
+
+# Upper bounds in seconds; chosen around Discord's 3s interaction window.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (cumulative on export, like Prometheus)"""
+
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+
+class HandlerStats:
+    __slots__ = ("calls", "errors", "latency")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram()
+
+
+class MetricsRegistry:
+    """Per-handler call/error counters and latency histograms.
+
+    Handlers are wrapped with ``instrument(name)``. Other subsystems can add
+    gauges with ``add_collector(fn)``, where ``fn()`` returns a mapping of
+    metric name to a number or to a ``{label_value: number}`` dict.
+    """
+
+    def __init__(self, prefix="templatebot"):
+        self.prefix = prefix
+        self.handlers = {}
+        self.loop_lag = 0.0
+        self.loop_lag_max = 0.0
+        self.started_at = time.time()
+        self._collectors = []
+        self._lag_task = None
+
+    def handler(self, name):
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats()
+        return stats
+
+    def instrument(self, name=None):
+        """Decorator recording calls, errors and latency of a coroutine function"""
+        def decorator(func):
+            handler = name or func.__name__
+            stats = self.handler(handler)
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                stats.calls += 1
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    stats.errors += 1
+                    raise
+                finally:
+                    latency = time.perf_counter() - start
+                    stats.latency.observe(latency)
+                    # Sampled before the record exists: building one costs more than the handler.
+                    if handler_log.isEnabledFor(logging.DEBUG) and debug_sampler.keep(handler):
+                        handler_log.debug("handled", extra={
+                            "handler": handler, "guild": _guild_id(args), "latency_ms": round(latency * 1000, 3),
+                            "sampled": debug_sampler.every,
+                        })
+            return wrapper
+        return decorator
+
+    def add_collector(self, fn):
+        self._collectors.append(fn)
+
+    def collect(self):
+        values = {}
+        for fn in self._collectors:
+            values.update(fn())
+        return values
+
+    def start_loop_monitor(self, interval=0.5):
+        """Track event-loop lag: how late a periodic sleep wakes up"""
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.get_running_loop().create_task(self._monitor_loop(interval))
+
+    async def _monitor_loop(self, interval):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag = max(0.0, time.perf_counter() - start - interval)
+            if self.loop_lag > self.loop_lag_max:
+                self.loop_lag_max = self.loop_lag
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_handler_calls_total Handler invocations.",
+            f"# TYPE {p}_handler_calls_total counter",
+        ]
+        for name, stats in self.handlers.items():
+            lines.append(f'{p}_handler_calls_total{{handler="{name}"}} {stats.calls}')
+        lines += [
+            f"# HELP {p}_handler_errors_total Handler invocations that raised.",
+            f"# TYPE {p}_handler_errors_total counter",
+        ]
+        for name, stats in self.handlers.items():
+            lines.append(f'{p}_handler_errors_total{{handler="{name}"}} {stats.errors}')
+        lines += [
+            f"# HELP {p}_handler_latency_seconds Handler latency.",
+            f"# TYPE {p}_handler_latency_seconds histogram",
+        ]
+        for name, stats in self.handlers.items():
+            hist = stats.latency
+            cumulative = 0
+            for bound, count in zip(hist.bounds, hist.counts):
+                cumulative += count
+                lines.append(f'{p}_handler_latency_seconds_bucket{{handler="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{p}_handler_latency_seconds_bucket{{handler="{name}",le="+Inf"}} {hist.count}')
+            lines.append(f'{p}_handler_latency_seconds_sum{{handler="{name}"}} {hist.total}')
+            lines.append(f'{p}_handler_latency_seconds_count{{handler="{name}"}} {hist.count}')
+
+        gauges = {"event_loop_lag_seconds": self.loop_lag, "event_loop_lag_max_seconds": self.loop_lag_max}
+        gauges.update(self.collect())
+        for metric, value in gauges.items():
+            lines.append(f"# TYPE {p}_{metric} gauge")
+            if isinstance(value, dict):
+                for label, item in value.items():
+                    lines.append(f'{p}_{metric}{{key="{label}"}} {_number(item)}')
+            else:
+                lines.append(f"{p}_{metric} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host="127.0.0.1", port=9108):
+        """Serve ``/metrics`` over plain HTTP. Returns the asyncio server."""
+        async def handle(reader, writer):
+            try:
+                request_line = await reader.readline()
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                parts = request_line.split()
+                if len(parts) >= 2 and parts[1] == b"/metrics":
+                    status, body = "200 OK", self.render_prometheus().encode()
+                else:
+                    status, body = "404 Not Found", b"not found\n"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: text/plain; version=0.0.4\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: close\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+
+def _guild_id(args):
+    """Guild of a handler call: its message, interaction, context, or modal/view"""
+    for arg in args[:2]:
+        guild = getattr(arg, "guild", None)
+        if guild is not None:
+            return guild.id
+    return None
+
+
+def _number(value):
+    if value is None or (isinstance(value, float) and not math.isfinite(value)):
+        return "NaN"
+    return value
@@ -0,0 +1,73 @@
+import time
+
+
+class AdminIndex:
+    """Precomputed admin role sets with a short-lived decision cache.
+
+    ``load_role_ids(guild_id)`` returns a guild's configured admin role
+    ids; it is called once per guild and again only after
+    ``invalidate_guild``. Each rebuild bumps the guild's version, which is
+    part of every decision key, so stale decisions can never be hit again.
+    ``invalidate_member`` drops a single member's decision.
+
+    Decisions also expire after ``ttl`` seconds, which bounds staleness for
+    changes the bot is not told about (member updates need the members
+    intent).
+    """
+
+    def __init__(self, load_role_ids, ttl=30.0, max_decisions=50_000):
+        self.load_role_ids = load_role_ids
+        self.ttl = ttl
+        self.max_decisions = max_decisions
+        self._roles = {}
+        self._versions = {}
+        self._decisions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def admin_roles(self, guild_id):
+        """``(version, frozenset of role ids)`` for a guild"""
+        entry = self._roles.get(guild_id)
+        if entry is None:
+            version = self._versions.get(guild_id, 0)
+            entry = self._roles[guild_id] = (version, frozenset(self.load_role_ids(guild_id)))
+        return entry
+
+    def _decide(self, member, role_ids):
+        # Member.get_role is a binary search over the member's role ids, so
+        # this costs O(admin roles * log member roles).
+        for role_id in role_ids:
+            if member.get_role(role_id) is not None:
+                return True
+        return member.guild_permissions.administrator
+
+    def is_admin(self, member):
+        guild_id = member.guild.id
+        version, role_ids = self.admin_roles(guild_id)
+        key = (guild_id, member.id, version)
+        now = time.monotonic()
+        cached = self._decisions.get(key)
+        if cached is not None and cached[1] > now:
+            self.hits += 1
+            return cached[0]
+
+        self.misses += 1
+        allowed = self._decide(member, role_ids)
+        decisions = self._decisions
+        decisions.pop(key, None)
+        if len(decisions) >= self.max_decisions:
+            # Oldest insertion first; refreshed keys were re-inserted above.
+            del decisions[next(iter(decisions))]
+        decisions[key] = (allowed, now + self.ttl)
+        return allowed
+
+    def invalidate_guild(self, guild_id):
+        """Rebuild a guild's role set on next use and retire its decisions"""
+        guild_id = int(guild_id)
+        self._roles.pop(guild_id, None)
+        self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+
+    def invalidate_member(self, guild_id, member_id):
+        entry = self._roles.get(guild_id)
+        if entry is not None:
+            self._decisions.pop((guild_id, member_id, entry[0]), None)
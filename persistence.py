@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+
+
+def shard_path(path, shard_ids=None, shard_count=None):
+    """``path`` for a process that runs only ``shard_ids`` of ``shard_count`` shards.
+
+    Cluster workers share the database but not their snapshot files: each
+    holds state for the guilds its shards own and only that worker writes
+    it. A different shard layout gets a different file.
+    """
+    if shard_ids is None or shard_count is None:
+        return path
+    ids = sorted(shard_ids)
+    if ids == list(range(ids[0], ids[-1] + 1)):
+        label = f"{ids[0]}-{ids[-1]}"
+    else:
+        label = "_".join(map(str, ids))
+    root, ext = os.path.splitext(path)
+    return f"{root}.shards-{label}-of-{shard_count}{ext}"
+
+
+class WriteBehind:
+    """Coalescing write-behind queue.
+
+    ``mark_dirty(key)`` records a change and schedules a flush after
+    ``delay`` seconds, so a burst of changes turns into one write.
+    Subclasses implement ``_take_snapshot``, which runs on the event loop
+    and should only touch the dirty keys, and ``_write``, which runs in a
+    worker thread.
+    """
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self._dirty = set()
+        self._task = None
+        self._write_lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+
+    def _take_snapshot(self, dirty):
+        raise NotImplementedError
+
+    def _write(self, snapshot):
+        raise NotImplementedError
+
+    def _written(self, dirty):
+        """Called on the caller's thread after ``dirty`` was persisted"""
+
+    def _write_locked(self, snapshot):
+        with self._write_lock:
+            self._write(snapshot)
+
+    def mark_dirty(self, key):
+        """Record that ``key`` changed and schedule a write"""
+        self._dirty.add(key)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, shutdown): write straight away.
+            self.flush_now()
+            return
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        while self._dirty:
+            await asyncio.sleep(self.delay)
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception(f"Failed to write {type(self).__name__} changes")
+
+    async def flush(self):
+        """Write pending changes from a worker thread.
+
+        Waits for a flush that is already in flight, so when this returns
+        every change marked before the call is persisted.
+        """
+        async with self._flush_lock:
+            dirty, self._dirty = self._dirty, set()
+            snapshot = self._take_snapshot(dirty)
+            try:
+                await asyncio.to_thread(self._write_locked, snapshot)
+            except Exception:
+                # Keep the changes queued so the next flush retries them.
+                self._dirty |= dirty
+                raise
+            self._written(dirty)
+
+    def flush_now(self):
+        """Write pending changes synchronously, e.g. on shutdown"""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        self._write_locked(self._take_snapshot(dirty))
+        self._written(dirty)
+
+    @property
+    def pending(self):
+        return bool(self._dirty)
+
+
+class SettingsWriter(WriteBehind):
+    """Write-behind persistence for a JSON settings file.
+
+    Each guild's JSON is cached as an encoded fragment, so the event loop
+    only re-encodes guilds that changed; joining the fragments and writing
+    the file happen in a worker thread, through a temp file that is renamed
+    over the target.
+    """
+
+    def __init__(self, path, settings, delay=0.5):
+        super().__init__(delay)
+        self.path = path
+        self.settings = settings
+        self._fragments = {}
+
+        for guild_key in settings:
+            self._encode(guild_key)
+
+    def mark_dirty(self, guild_id):
+        super().mark_dirty(str(guild_id))
+
+    def _encode(self, guild_key):
+        value = self.settings.get(guild_key)
+        if value is None:
+            self._fragments.pop(guild_key, None)
+            return
+        body = json.dumps(value, indent=2).replace("\n", "\n  ")
+        self._fragments[guild_key] = f"  {json.dumps(guild_key)}: {body}"
+
+    def _take_snapshot(self, dirty):
+        for guild_key in dirty:
+            self._encode(guild_key)
+        return list(self._fragments.values())
+
+    def _write(self, fragments):
+        payload = "{\n" + ",\n".join(fragments) + "\n}\n" if fragments else "{}\n"
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
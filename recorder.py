@@ -0,0 +1,181 @@
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import time
+
+from amounts import AmountError, parse_amount
+from persistence import WriteBehind
+
+
+FORMAT_VERSION = 1
+USER_MENTION = re.compile(r'<@!?(\d+)>')
+ROLE_MENTION = re.compile(r'<@&(\d+)>')
+# Words kept verbatim: they steer the handlers rather than identify anyone.
+KEEP_WORDS = frozenset({"help", "tip", "game", "tip=", "game=", "tip:", "game:"})
+# Longer digit runs are card or phone numbers rather than amounts.
+MAX_AMOUNT_DIGITS = 8
+
+
+class Anonymizer:
+    """Stable pseudonyms under a per-process random salt.
+
+    Equal inputs map to equal outputs within one recording, so duplicate
+    submissions and repeat players keep their shape, but nothing maps
+    back to the original without the salt, which is never written out.
+    """
+
+    def __init__(self, salt=None):
+        self.salt = salt if salt is not None else os.urandom(16)
+
+    def _digest(self, value):
+        return hashlib.blake2b(str(value).encode(), key=self.salt, digest_size=8).digest()
+
+    def id(self, value):
+        return int.from_bytes(self._digest(value), "big") >> 1
+
+    def word(self, word, keep=()):
+        """Pseudonym for a word; amounts, handler keywords and ``keep`` pass through"""
+        folded = word.casefold()
+        if folded in KEEP_WORDS or folded.lstrip("!") in keep:
+            return word
+        if sum(char.isdigit() for char in word) <= MAX_AMOUNT_DIGITS:
+            try:
+                # "10," in a tip list is still an amount.
+                parse_amount(word.rstrip(",;"))
+                return word
+            except AmountError:
+                pass
+        prefix = word[0] if word[0] in "$#@!" else ""
+        return f"{prefix}w{self._digest(word).hex()[:6]}"
+
+    def text(self, text, keep=()):
+        """Pseudonymize each word, keeping line structure, amounts and ``keep``"""
+        def mention(match):
+            return f"<@{self.id(match.group(1))}>"
+
+        text = USER_MENTION.sub(mention, ROLE_MENTION.sub(lambda m: f"<@&{self.id(m.group(1))}>", text))
+        return "\n".join(
+            " ".join(
+                word if word.startswith("<@") else self.word(word, keep)
+                for word in line.split()
+            )
+            for line in text.split("\n")
+        )
+
+
+class EventRecorder(WriteBehind):
+    """Records anonymized gateway traffic as gzipped JSON lines.
+
+    Disabled until given a ``path``, here or through ``open``; an existing
+    file there is renamed aside with its mtime as suffix. Messages no
+    handler looks at are kept as their length and word count only. Each record carries its offset in
+    seconds from the start of the recording, so the replayer can keep the
+    original pacing. ``sample_rate`` keeps a random fraction of events
+    and recording stops once ``max_bytes`` of uncompressed JSON were
+    written. Batches are appended from a worker thread every ``delay``
+    seconds; each batch is one gzip member.
+    """
+
+    def __init__(self, path=None, sample_rate=1.0, max_bytes=100 * 2**20, delay=1.0, keep_words=(),
+                 clock=time.monotonic):
+        super().__init__(delay)
+        self.path = path
+        self.clock = clock
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.keep_words = set(keep_words)
+        self.anonymizer = Anonymizer()
+        self.started = clock()
+        self.recorded = 0
+        self.bytes = 0
+        self._buffer = []
+        if path is not None:
+            self.open(path)
+
+    def open(self, path):
+        """Start recording to ``path``"""
+        if os.path.exists(path):
+            # One recording per run; keep the previous one beside it.
+            os.replace(path, f"{path}.{int(os.path.getmtime(path))}")
+        self.path = path
+        self.started = self.clock()
+        self._append({"version": FORMAT_VERSION, "started_at": time.time()})
+
+    @property
+    def enabled(self):
+        return self.path is not None and self.bytes < self.max_bytes
+
+    def _append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        self.bytes += len(line)
+        self._buffer.append(line)
+        self.mark_dirty(0)
+
+    def _sampled(self):
+        """Whether to record the next event; decided before any anonymizing"""
+        return self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+
+    def _record(self, kind, guild, channel, user, **fields):
+        anon = self.anonymizer.id
+        record = {
+            "t": round(self.clock() - self.started, 4), "k": kind,
+            "g": anon(guild.id) if guild is not None else None,
+            "c": anon(channel.id) if channel is not None else None,
+            "u": anon(user.id),
+        }
+        record.update(fields)
+        self.recorded += 1
+        self._append(record)
+
+    def message(self, message, bot_user_id, handled=True):
+        """Record ``message``; pass ``handled=False`` for one no handler looks at"""
+        if not self._sampled():
+            return
+        if handled:
+            content = self.anonymizer.text(message.content.replace(str(bot_user_id), "BOT"), self.keep_words)
+            shape = {"content": content}
+        else:
+            shape = {"length": len(message.content), "words": len(message.content.split())}
+        self._record(
+            "message", message.guild, message.channel, message.author,
+            **shape,
+            own=message.author.id == bot_user_id,
+            bot=message.author.bot,
+            mentions_bot=any(user.id == bot_user_id for user in message.mentions),
+            everyone=message.mention_everyone,
+        )
+
+    def slash(self, interaction, name):
+        if self._sampled():
+            self._record("slash", interaction.guild, interaction.channel, interaction.user, name=name)
+
+    def modal(self, interaction, name, fields):
+        """``fields`` maps input name -> submitted text"""
+        if not self._sampled():
+            return
+        text = self.anonymizer.text
+        self._record(
+            "modal", interaction.guild, interaction.channel, interaction.user, name=name,
+            fields={key: text(value or "", self.keep_words) for key, value in fields.items()},
+        )
+
+    def _take_snapshot(self, dirty):
+        lines, self._buffer = self._buffer, []
+        return lines
+
+    def _write(self, lines):
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            f.writelines(lines)
+
+
+def read_recording(path):
+    """Yield the records of a recording, after checking its header"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported recording version {header.get('version')!r}")
+        for line in f:
+            yield json.loads(line)
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+
+from persistence import SettingsWriter, WriteBehind
+
+
+_MISSING = object()
+
+
+class SettingsBackend:
+    """Storage for per-guild settings dicts, keyed by integer guild id"""
+
+    def load(self, guild_id):
+        """Return the stored settings for a guild, or None"""
+        raise NotImplementedError
+
+    def save(self, guild_id, settings):
+        """Queue a guild's settings (None deletes them) to be persisted"""
+        raise NotImplementedError
+
+    async def flush(self):
+        """Persist queued changes without blocking the event loop"""
+
+    def flush_now(self):
+        """Persist queued changes synchronously"""
+
+    def close(self):
+        self.flush_now()
+
+
+class JsonSettingsBackend(SettingsBackend):
+    """The original single-file JSON store, written behind and atomically"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.data = json.load(f)
+        self.writer = SettingsWriter(path, self.data)
+
+    def load(self, guild_id):
+        return self.data.get(str(guild_id))
+
+    def save(self, guild_id, settings):
+        if settings is None:
+            self.data.pop(str(guild_id), None)
+        else:
+            self.data[str(guild_id)] = settings
+        self.writer.mark_dirty(guild_id)
+
+    async def flush(self):
+        await self.writer.flush()
+
+    def flush_now(self):
+        self.writer.flush_now()
+
+
+class _SqliteWriter(WriteBehind):
+    """Writes changed guild rows in one transaction from a worker thread"""
+
+    def __init__(self, backend, delay=0.5):
+        super().__init__(delay)
+        self.backend = backend
+        self.pending_rows = {}
+
+    def _take_snapshot(self, dirty):
+        rows = []
+        for guild_id in dirty:
+            settings = self.pending_rows.get(guild_id)
+            rows.append((guild_id, None if settings is None else json.dumps(settings)))
+        return rows
+
+    def _written(self, dirty):
+        for guild_id in dirty:
+            if guild_id not in self._dirty:
+                self.pending_rows.pop(guild_id, None)
+
+    def _write(self, rows):
+        conn = self.backend._writer_conn()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                "DELETE FROM guild_settings WHERE guild_id = ?",
+                [(guild_id,) for guild_id, data in rows if data is None],
+            )
+            conn.executemany(
+                "INSERT INTO guild_settings (guild_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(guild_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                [(guild_id, data, now) for guild_id, data in rows if data is not None],
+            )
+
+
+class SqliteSettingsBackend(SettingsBackend):
+    """Embedded SQLite store with one row per guild.
+
+    Reads go through a connection owned by the event loop thread; writes
+    are coalesced and applied from a worker thread on a second connection.
+    WAL mode keeps the two from blocking each other.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS guild_settings ("
+        " guild_id INTEGER PRIMARY KEY,"
+        " data TEXT NOT NULL,"
+        " updated_at REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    )
+
+    def __init__(self, path, migrate_from=None, delay=0.5):
+        self.path = path
+        self._conn = self._connect()
+        self._write_conn = None
+        with self._conn:
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+        self.writer = _SqliteWriter(self, delay)
+        if migrate_from:
+            self.migrate_json(migrate_from)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Cluster workers share the file; wait for another writer's lock.
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def _writer_conn(self):
+        if self._write_conn is None:
+            self._write_conn = self._connect()
+        return self._write_conn
+
+    def migrate_json(self, json_path):
+        """Import a legacy bot_settings.json once"""
+        done = self._conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done or not os.path.exists(json_path):
+            return 0
+        with open(json_path, 'r') as f:
+            legacy = json.load(f)
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO guild_settings (guild_id, data, updated_at) VALUES (?, ?, ?)",
+                [(int(key), json.dumps(value), now) for key, value in legacy.items()],
+            )
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (json_path,)
+            )
+        logging.info(f"Migrated settings for {len(legacy)} guild(s) from {json_path}")
+        return len(legacy)
+
+    def load(self, guild_id):
+        if guild_id in self.writer.pending_rows:
+            return self.writer.pending_rows[guild_id]
+        row = self._conn.execute(
+            "SELECT data FROM guild_settings WHERE guild_id = ?", (guild_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, guild_id, settings):
+        self.writer.pending_rows[guild_id] = settings
+        self.writer.mark_dirty(guild_id)
+
+    async def flush(self):
+        await self.writer.flush()
+
+    def flush_now(self):
+        self.writer.flush_now()
+
+    def close(self):
+        self.flush_now()
+        self._conn.close()
+        if self._write_conn is not None:
+            self._write_conn.close()
+
+
+def _freeze(settings):
+    """Read-only snapshot of a settings dict; lists become tuples"""
+    return MappingProxyType({
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in settings.items()
+    })
+
+
+def _thaw(snapshot):
+    """Mutable copy of a snapshot for an editor"""
+    return {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in snapshot.items()
+    }
+
+
+class GuildSettingsStore:
+    """Per-guild settings as copy-on-write snapshots.
+
+    Reads return an immutable mapping for the guild, taken from a
+    read-through cache without any locking; lists in it are tuples.
+    Changes go through ``async with store.edit(guild_id) as settings``.
+    That serializes writers of one guild on an asyncio lock, hands out a
+    private copy and, on exit, publishes a new snapshot in one assignment
+    and queues it for the backend. Readers holding the previous snapshot
+    never see a half-applied change.
+
+    Keys may be given as ``int`` or ``str`` guild ids, so existing
+    ``bot_settings.get(str(guild_id), {})`` lookups keep working.
+    Listeners added with ``subscribe`` are called with the guild id of
+    every published change.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._cache = {}
+        self._locks = {}
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Call ``listener(guild_id)`` whenever a guild's settings change"""
+        self._listeners.append(listener)
+
+    def _lookup(self, key):
+        snapshot = self._cache.get(key, _MISSING)
+        if snapshot is _MISSING:
+            settings = self.backend.load(key)
+            snapshot = self._cache[key] = None if settings is None else _freeze(settings)
+        return snapshot
+
+    def _publish(self, key, settings):
+        self._cache[key] = None if settings is None else _freeze(settings)
+        self.backend.save(key, settings)
+        for listener in self._listeners:
+            listener(key)
+
+    def get(self, guild_id, default=None):
+        snapshot = self._lookup(int(guild_id))
+        return default if snapshot is None else snapshot
+
+    def __getitem__(self, guild_id):
+        snapshot = self._lookup(int(guild_id))
+        if snapshot is None:
+            raise KeyError(guild_id)
+        return snapshot
+
+    def __contains__(self, guild_id):
+        return self._lookup(int(guild_id)) is not None
+
+    def __setitem__(self, guild_id, settings):
+        """Replace a guild's settings outright"""
+        self._publish(int(guild_id), dict(settings))
+
+    def __delitem__(self, guild_id):
+        key = int(guild_id)
+        if self._lookup(key) is None:
+            raise KeyError(guild_id)
+        self._publish(key, None)
+
+    @asynccontextmanager
+    async def edit(self, guild_id):
+        """Change a guild's settings; the new snapshot is published on exit.
+
+        Nothing is published if the block raises or leaves the settings
+        unchanged.
+        """
+        key = int(guild_id)
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                current = self._lookup(key) or {}
+                draft = _thaw(current)
+                yield draft
+                if draft != _thaw(current):
+                    self._publish(key, draft)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def flush(self):
+        await self.backend.flush()
+
+    def flush_now(self):
+        self.backend.flush_now()
+
+    def close(self):
+        self.backend.close()
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+
+COMMAND_SYNC_FILE = ".command_tree_sync.json"
+
+
+class PhaseTimer:
+    """Records how long each startup phase took"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases = {}
+        self.overlapped = set()
+        self._waiters = {}
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = now - self.last
+        logging.info(
+            f"Startup phase '{phase}' took {(now - self.last) * 1000:.0f} ms "
+            f"({(now - self.started) * 1000:.0f} ms since start)"
+        )
+        self.last = now
+        for waiter in self._waiters.pop(phase, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+        return self.phases[phase]
+
+    def record(self, phase, seconds):
+        """A phase that ran alongside the others; not part of the total"""
+        self.phases[phase] = seconds
+        self.overlapped.add(phase)
+        logging.info(f"Startup phase '{phase}' took {seconds * 1000:.0f} ms (in the background)")
+
+    async def reached(self, phase):
+        """Wait until ``phase`` has been marked"""
+        if phase not in self.phases:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(phase, []).append(waiter)
+            await waiter
+
+    def report(self):
+        """Per-phase breakdown as a text table"""
+        total = self.last - self.started
+        lines = [f"{'phase':<12} {'ms':>8} {'share':>6}"]
+        for phase, seconds in self.phases.items():
+            if phase in self.overlapped:
+                lines.append(f"{phase:<12} {seconds * 1000:>8.0f}   (overlapped)")
+            else:
+                lines.append(f"{phase:<12} {seconds * 1000:>8.0f} {seconds / total:>6.0%}")
+        lines.append(f"{'total':<12} {total * 1000:>8.0f}")
+        return "\n".join(lines)
+
+
+timer = PhaseTimer()
+
+
+def command_tree_fingerprint(tree):
+    """Stable hash of the app command payload Discord would receive"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda command: (command.get("type", 1), command["name"]),
+    )
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _load_sync_state(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_sync_state(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def sync_command_tree(tree, application_id, path=COMMAND_SYNC_FILE, force=False):
+    """Sync the global command tree only when it changed since the last sync.
+
+    Returns the synced commands, or None when the sync was skipped.
+    """
+    fingerprint = command_tree_fingerprint(tree)
+    state = _load_sync_state(path)
+    key = str(application_id)
+
+    if not force and state.get(key) == fingerprint:
+        return None
+
+    synced = await tree.sync()
+    state[key] = fingerprint
+    _save_sync_state(path, state)
+    return synced
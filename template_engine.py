@@ -0,0 +1,153 @@
+import re
+
+import discord
+
+
+PLACEHOLDER_PATTERN = re.compile(r'\{(\w+)\}')
+OUTPUT_MODES = ("text", "embed")
+# Lines drawn only with these are layout in text mode and dropped from embeds.
+SEPARATOR_LINE = re.compile(r'^[\s═─━=_—-]*$')
+# " **Label:** value" and " **Label**: value"
+LABEL_LINE = re.compile(r'^\s*\*\*([^*]+?):?\*\*:?\s*(.*)$')
+ONLY_PLACEHOLDERS = re.compile(r'^(\s*\{\w+\}\s*)+$')
+
+
+class CompiledTemplate:
+    """A template split once into literal segments and placeholder slots.
+
+    Rendering copies the precomputed parts list, drops the slot values in
+    and joins it, so no regex or str.format work happens per call.
+    """
+
+    __slots__ = ("name", "source", "fields", "description", "aliases", "placeholders", "embed", "_parts", "_slots")
+
+    def __init__(self, name, source, fields=(), description="", embed=None, aliases=()):
+        self.name = name
+        self.source = source
+        self.fields = tuple(fields)
+        self.description = description
+        self.aliases = tuple(alias.lower() for alias in aliases)
+        self.embed = embed
+
+        # re.split with one capture group alternates literal, name, literal, ...
+        pieces = PLACEHOLDER_PATTERN.split(source)
+        self._parts = pieces
+        self._slots = tuple((i, pieces[i]) for i in range(1, len(pieces), 2))
+        self.placeholders = tuple(dict.fromkeys(name for _, name in self._slots))
+
+    def render(self, data, resolvers=None, context=None):
+        """Render the template.
+
+        Values present (and non-empty) in ``data`` win; otherwise a resolver
+        registered for the placeholder is called with ``context`` when one is
+        given; anything left is rendered as an empty string.
+        """
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            value = data.get(name)
+            if not value:
+                resolver = resolvers.get(name) if resolvers else None
+                value = resolver(context) if resolver is not None and context else ""
+            parts[index] = value if isinstance(value, str) else str(value)
+        return "".join(parts)
+
+
+class EmbedPrototype:
+    """The embed form of a template, laid out once from its text.
+
+    The first line without placeholders is the title; ``**Label:** value``
+    lines become fields; lines holding only placeholders (the role
+    mention) go in the message content, since mentions inside an embed
+    do not ping; separator lines are dropped and anything else joins the
+    description. Fields that render empty are left out.
+
+    Each render clones a prebuilt Embed and gives it fresh fields instead
+    of going through ``Embed.from_dict``, which is several times slower.
+    The clone sets the attributes ``from_dict`` sets; it is checked
+    against ``from_dict`` once here and not used if they ever disagree.
+    """
+
+    __slots__ = ("title", "color", "content", "description", "fields", "_prototype", "_clone")
+
+    def __init__(self, source, color=None):
+        self.title = None
+        self.color = color
+        content, description, fields = [], [], []
+        for line in source.splitlines():
+            if SEPARATOR_LINE.match(line):
+                continue
+            label = LABEL_LINE.match(line)
+            if label:
+                fields.append((label.group(1).strip(), CompiledTemplate(None, label.group(2).strip())))
+            elif ONLY_PLACEHOLDERS.match(line):
+                content.append(line.strip())
+            elif self.title is None and not PLACEHOLDER_PATTERN.search(line):
+                self.title = line.replace("**", "").strip()
+            else:
+                description.append(line.strip())
+
+        self.content = CompiledTemplate(None, "\n".join(content)) if content else None
+        self.description = CompiledTemplate(None, "\n".join(description)) if description else None
+        self.fields = tuple(fields)
+
+        base = {"type": "rich"}
+        if self.title:
+            base["title"] = self.title
+        if color is not None:
+            base["color"] = color
+        self._prototype = discord.Embed.from_dict(base)
+        self._clone = self._fast_clone
+        sample = [{"name": "name", "value": "value", "inline": True}]
+        try:
+            cloned = self._fast_clone("description", sample).to_dict()
+        except AttributeError:
+            cloned = None
+        if cloned != self._slow_clone("description", sample).to_dict():
+            self._clone = self._slow_clone
+
+    def _fast_clone(self, description, fields):
+        prototype = self._prototype
+        embed = discord.Embed.__new__(discord.Embed)
+        embed.title = prototype.title
+        embed.type = prototype.type
+        embed.url = prototype.url
+        embed.description = description
+        embed._flags = prototype._flags
+        if self.color is not None:
+            embed._colour = prototype._colour
+        embed._fields = fields
+        return embed
+
+    def _slow_clone(self, description, fields):
+        payload = self._prototype.to_dict()
+        if description is not None:
+            payload["description"] = description
+        payload["fields"] = fields
+        return discord.Embed.from_dict(payload)
+
+    def render(self, data, resolvers=None, context=None):
+        """(content, discord.Embed) for ``data``; content may be empty"""
+        description = self.description.render(data, resolvers, context) if self.description is not None else None
+        fields = []
+        for name, value in self.fields:
+            value = value.render(data, resolvers, context)
+            if value:
+                fields.append({"name": name, "value": value, "inline": True})
+        content = self.content.render(data, resolvers, context) if self.content is not None else ""
+        return content, self._clone(description, fields)
+
+
+def parse_color(text):
+    """``#f1c40f``, ``0xf1c40f`` or a decimal integer"""
+    text = text.strip().lower()
+    if text.startswith("#"):
+        return int(text[1:], 16)
+    return int(text, 0)
+
+
+def compile_template(name, source, fields=(), description="", output="text", color=None, aliases=()):
+    """Compile template text into a render plan; ``output="embed"`` also lays out its embed"""
+    if output not in OUTPUT_MODES:
+        raise ValueError(f"unknown output mode {output!r}, expected one of {', '.join(OUTPUT_MODES)}")
+    embed = EmbedPrototype(source, color) if output == "embed" else None
+    return CompiledTemplate(name, source, fields, description, embed, aliases)
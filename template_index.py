@@ -0,0 +1,190 @@
+class _Node:
+    __slots__ = ("children", "name")
+
+    def __init__(self):
+        self.children = {}
+        self.name = None
+
+
+class TemplateIndex:
+    """Prefix trie over template names and aliases.
+
+    Every key (a name or an alias, lowercased) ends at a node holding the
+    template name it stands for. Keys are inserted in sorted order, so the
+    children dicts iterate alphabetically and completions come out sorted
+    without sorting at query time. The index is built once per change to
+    the template set and never modified after.
+    """
+
+    def __init__(self, keys=None):
+        """``keys`` maps each name or alias to the template name it resolves to"""
+        self.root = _Node()
+        self.size = 0
+        self._short = {}
+        for key, name in sorted((key.lower(), name) for key, name in (keys or {}).items()):
+            self._insert(key, name)
+
+    @classmethod
+    def from_templates(cls, *groups):
+        """Index CompiledTemplate mappings; later groups override earlier ones.
+
+        Names win over aliases, so an alias can never hide a template.
+        """
+        keys = {}
+        for templates in groups:
+            for compiled in templates.values():
+                for alias in compiled.aliases:
+                    keys[alias] = compiled.name
+        for templates in groups:
+            for compiled in templates.values():
+                keys[compiled.name] = compiled.name
+        return cls(keys)
+
+    def __len__(self):
+        return self.size
+
+    def _insert(self, key, name):
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+        if node.name is None:
+            self.size += 1
+        node.name = name
+
+    def _find(self, key):
+        node = self.root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def resolve(self, word):
+        """The template name ``word`` stands for, or None"""
+        node = self._find(word.lower())
+        return node.name if node is not None else None
+
+    def keys(self):
+        """Every name and alias, sorted"""
+        return [key for key, _ in self._walk(self.root, "")]
+
+    def _walk(self, node, prefix):
+        stack = [(node, prefix)]
+        while stack:
+            node, prefix = stack.pop()
+            if node.name is not None:
+                yield prefix, node.name
+            stack.extend(reversed([(child, prefix + char) for char, child in node.children.items()]))
+
+    def complete(self, prefix, limit=25):
+        """Up to ``limit`` template names with a name or alias starting with ``prefix``.
+
+        Answers for prefixes of up to two characters, the ones with the
+        most to walk, are kept; there are at most a few hundred of them.
+        """
+        prefix = prefix.lower()
+        short = len(prefix) <= 2
+        if short:
+            names = self._short.get((prefix, limit))
+            if names is not None:
+                return list(names)
+        node = self._find(prefix)
+        if node is None:
+            return []
+        names = {}
+        for _, name in self._walk(node, prefix):
+            names[name] = None
+            if len(names) >= limit:
+                break
+        names = list(names)
+        if short:
+            self._short[prefix, limit] = tuple(names)
+        return names
+
+    def suggest(self, word, max_distance=2, limit=3):
+        """Template names within ``max_distance`` edits of ``word``, closest first.
+
+        A swap of two adjacent characters counts as one edit. Short words
+        get a tighter limit so that "co" does not suggest everything.
+        """
+        word = word.lower()
+        max_distance = min(max_distance, max(1, len(word) // 3))
+        names = sorted(self._one_edit(word))
+        if not names and max_distance > 1:
+            names = list(dict.fromkeys(name for _, name in sorted(self._within(word, max_distance))))
+        return names[:limit]
+
+    def _one_edit(self, word):
+        """Names of keys one insertion, deletion, substitution or swap away.
+
+        Walks down the trie along ``word``; at each depth tries every
+        single edit there and then matches the rest of ``word`` exactly,
+        which fails within a character or two for most branches.
+        """
+        found = set()
+        exact = self._exact
+        node = self.root
+        for i in range(len(word) + 1):
+            rest = word[i + 1:]
+            for char, child in node.children.items():
+                exact(child, word[i:], found)  # a character missing from word
+                if i < len(word) and char != word[i]:
+                    exact(child, rest, found)  # a wrong character
+            if i < len(word):
+                exact(node, rest, found)  # an extra character
+                swapped = node.children.get(word[i + 1]) if i + 1 < len(word) else None
+                swapped = swapped.children.get(word[i]) if swapped is not None else None
+                if swapped is not None:
+                    exact(swapped, word[i + 2:], found)
+                node = node.children.get(word[i])
+                if node is None:
+                    break
+        return found
+
+    @staticmethod
+    def _exact(node, rest, found):
+        for char in rest:
+            node = node.children.get(char)
+            if node is None:
+                return
+        if node.name is not None:
+            found.add(node.name)
+
+    def _within(self, word, max_distance):
+        """(distance, name) for keys within ``max_distance`` edits of ``word``.
+
+        Edit distance rows are computed one trie level at a time, so keys
+        with a common prefix share them. Only the diagonal band of width
+        ``max_distance`` can stay in range; cells outside it are capped,
+        and a branch is abandoned once its whole row is over the limit.
+        """
+        length = len(word)
+        over = max_distance + 1
+        found = []
+        stack = [(child, char, 1, range(length + 1)) for char, child in self.root.children.items()]
+        while stack:
+            node, char, depth, previous = stack.pop()
+            low = max(1, depth - max_distance)
+            high = min(length, depth + max_distance)
+            row = [over] * (length + 1)
+            row[0] = depth if depth <= max_distance else over
+            best = row[0]
+            for column in range(low, high + 1):
+                cost = min(
+                    row[column - 1] + 1,
+                    previous[column] + 1,
+                    previous[column - 1] + (word[column - 1] != char),
+                )
+                row[column] = cost
+                if cost < best:
+                    best = cost
+            if best > max_distance:
+                continue
+            if node.name is not None and row[length] <= max_distance:
+                found.append((row[length], node.name))
+            depth += 1
+            stack.extend((child, next_char, depth, row) for next_char, child in node.children.items())
+        return found
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import os
+import re
+from collections import OrderedDict
+
+from template_engine import compile_template, parse_color
+from template_index import TemplateIndex
+
+
+TEMPLATE_SUFFIX = ".template"
+TEMPLATE_NAME = re.compile(r'^\w+$')
+
+
+class TemplateError(ValueError):
+    """A template file that cannot be loaded"""
+
+
+def parse_template_file(path, known_placeholders=()):
+    """Read and validate a template file, returning a CompiledTemplate.
+
+    The file holds ``key: value`` header lines (``fields`` is required;
+    ``description``, ``aliases`` (comma separated), ``output`` (text or
+    embed) and ``color`` are optional), a ``---`` line, then the template
+    body.
+    """
+    name = os.path.basename(path)[:-len(TEMPLATE_SUFFIX)].lower()
+    if not TEMPLATE_NAME.match(name):
+        raise TemplateError(f"{path}: template names may only contain letters, digits and _")
+
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    header, sep, body = text.partition("\n---\n")
+    if not sep:
+        raise TemplateError(f"{path}: missing '---' line between header and body")
+
+    meta = {}
+    for line in header.splitlines():
+        if not line.strip():
+            continue
+        key, colon, value = line.partition(":")
+        if not colon:
+            raise TemplateError(f"{path}: bad header line {line!r}")
+        meta[key.strip().lower()] = value.strip()
+
+    fields = [field.strip() for field in meta.get("fields", "").split(",") if field.strip()]
+    if not fields:
+        raise TemplateError(f"{path}: 'fields' header is required")
+
+    aliases = [alias.strip().lower() for alias in meta.get("aliases", "").split(",") if alias.strip()]
+    bad = [alias for alias in aliases if not TEMPLATE_NAME.match(alias)]
+    if bad:
+        raise TemplateError(f"{path}: aliases may only contain letters, digits and _: {', '.join(bad)}")
+
+    try:
+        color = parse_color(meta["color"]) if "color" in meta else None
+        compiled = compile_template(
+            name, body.rstrip("\n"), fields, meta.get("description", ""),
+            output=meta.get("output", "text").lower(), color=color, aliases=aliases,
+        )
+    except ValueError as e:
+        raise TemplateError(f"{path}: {e}") from None
+    unknown = set(compiled.placeholders) - set(fields) - set(known_placeholders)
+    if unknown:
+        raise TemplateError(f"{path}: placeholders without a field: {', '.join(sorted(unknown))}")
+    return compiled
+
+
+def _scan(directory):
+    """{template path: mtime_ns} for the template files directly in ``directory``"""
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return {}
+    with entries:
+        return {
+            entry.path: entry.stat().st_mtime_ns
+            for entry in entries
+            if entry.name.endswith(TEMPLATE_SUFFIX) and entry.is_file()
+        }
+
+
+def _scan_guild_dirs(directory):
+    """Guild ids with an override directory in ``directory``"""
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return set()
+    with entries:
+        return {int(entry.name) for entry in entries if entry.name.isdigit() and entry.is_dir()}
+
+
+# Shared by every guild without an override directory; never modified.
+_NO_OVERRIDES = ({}, {}, None)
+
+
+class TemplateRegistry:
+    """Templates loaded from ``directory``, with per-guild overrides.
+
+    Global templates live in ``directory/*.template``; a guild can override
+    or add templates in ``directory/guilds/<guild_id>/*.template``. Guild
+    overrides are loaded lazily and kept in an LRU of ``max_guilds``
+    entries, so memory stays flat however many guilds use the bot. Which
+    guilds have an override directory at all is listed once per watcher
+    tick; the rest never touch the disk or take an LRU slot.
+
+    ``watch`` polls file mtimes and recompiles changed files off the event
+    loop, then swaps the results in on it. A swap is a single dict
+    assignment, so renders already holding the previous
+    CompiledTemplate finish with it undisturbed. Files that fail
+    validation are reported and the previous version stays active.
+    Listeners added with ``subscribe`` hear about every change: with a
+    guild id for that guild's overrides, or None for global templates.
+
+    Names and aliases are looked up through a :class:`TemplateIndex`,
+    built on first use after a change. Guilds without overrides share
+    the global one.
+    """
+
+    def __init__(self, directory, known_placeholders=(), max_guilds=256):
+        self.directory = directory
+        self.known_placeholders = tuple(known_placeholders)
+        self.max_guilds = max_guilds
+        self.templates = {}
+        self._mtimes = {}
+        self._guilds = OrderedDict()
+        self._override_dirs = _scan_guild_dirs(self._guilds_dir())
+        self._index = None
+        self._watch_task = None
+        self._listeners = []
+        self.reload()
+
+    def subscribe(self, listener):
+        """Call ``listener(guild_id)`` when templates change (None: all guilds)"""
+        self._listeners.append(listener)
+
+    def _changed(self, guild_id=None):
+        if guild_id is None:
+            self._index = None
+            for entry in self._guilds.values():
+                entry[2] = None
+        for listener in self._listeners:
+            listener(guild_id)
+
+    def _load(self, path):
+        try:
+            return parse_template_file(path, self.known_placeholders)
+        except (OSError, TemplateError) as e:
+            logging.warning(f"Failed to load template: {e}")
+            return None
+
+    def scan_templates(self):
+        """(file mtimes, {path: CompiledTemplate or None} for changed global files).
+
+        Only reads and compiles files, so the watcher runs it in a thread.
+        """
+        mtimes = _scan(self.directory)
+        known = self._mtimes
+        return mtimes, {path: self._load(path) for path, mtime in mtimes.items() if known.get(path) != mtime}
+
+    def apply_template_scan(self, mtimes, loaded):
+        """Swap in the templates read by ``scan_templates``; returns the names that changed"""
+        changed = []
+        for compiled in loaded.values():
+            if compiled is not None:
+                self.templates[compiled.name] = compiled
+                changed.append(compiled.name)
+        for path in set(self._mtimes) - set(mtimes):
+            name = os.path.basename(path)[:-len(TEMPLATE_SUFFIX)].lower()
+            if self.templates.pop(name, None) is not None:
+                changed.append(name)
+        self._mtimes = mtimes
+        if changed:
+            self._changed()
+        return changed
+
+    def reload(self):
+        """Re-read changed global templates; returns the names that changed"""
+        return self.apply_template_scan(*self.scan_templates())
+
+    def add(self, compiled):
+        """Register a template that does not come from a file"""
+        self.templates[compiled.name] = compiled
+        self._changed()
+
+    def _guilds_dir(self):
+        return os.path.join(self.directory, "guilds")
+
+    def _guild_dir(self, guild_id):
+        return os.path.join(self._guilds_dir(), str(guild_id))
+
+    def _guild_entry(self, guild_id):
+        """[file mtimes, overrides, index or None] for a guild"""
+        guild_id = int(guild_id)
+        entry = self._guilds.get(guild_id)
+        if entry is not None:
+            self._guilds.move_to_end(guild_id)
+            return entry
+        if guild_id not in self._override_dirs:
+            return _NO_OVERRIDES
+
+        mtimes = _scan(self._guild_dir(guild_id))
+        overrides = {}
+        for path in mtimes:
+            compiled = self._load(path)
+            if compiled is not None:
+                overrides[compiled.name] = compiled
+        entry = self._guilds[guild_id] = [mtimes, overrides, None]
+        if len(self._guilds) > self.max_guilds:
+            self._guilds.popitem(last=False)
+        return entry
+
+    def _guild_overrides(self, guild_id):
+        return self._guild_entry(guild_id)[1]
+
+    def index(self, guild_id=None):
+        """The :class:`TemplateIndex` of names and aliases available in a guild"""
+        if self._index is None:
+            self._index = TemplateIndex.from_templates(self.templates)
+        if guild_id is None:
+            return self._index
+        entry = self._guild_entry(guild_id)
+        if not entry[1]:
+            return self._index
+        if entry[2] is None:
+            entry[2] = TemplateIndex.from_templates(self.templates, entry[1])
+        return entry[2]
+
+    def resolve(self, word, guild_id=None):
+        """The template name a name or alias stands for, or None"""
+        return self.index(guild_id).resolve(word)
+
+    def get(self, name, guild_id=None):
+        """The compiled template for ``name``, preferring a guild override"""
+        if guild_id is not None:
+            compiled = self._guild_overrides(guild_id).get(name)
+            if compiled is not None:
+                return compiled
+        return self.templates.get(name)
+
+    def names(self, guild_id=None):
+        """Template names available in a guild"""
+        if guild_id is None:
+            return list(self.templates)
+        overrides = self._guild_overrides(guild_id)
+        return list(self.templates) + [name for name in overrides if name not in self.templates]
+
+    def scan_guilds(self, guild_ids):
+        """(guild ids with an override directory, {guild id: file mtimes} for ``guild_ids``).
+
+        Only reads the disk, so the watcher runs it in a thread.
+        """
+        return _scan_guild_dirs(self._guilds_dir()), {
+            guild_id: _scan(self._guild_dir(guild_id)) for guild_id in guild_ids
+        }
+
+    def apply_guild_scan(self, override_dirs, mtimes):
+        """Drop cached guild overrides whose files changed since ``scan_guilds``"""
+        stale = [
+            guild_id for guild_id, scanned in mtimes.items()
+            if guild_id in self._guilds and self._guilds[guild_id][0] != scanned
+        ]
+        stale.extend(override_dirs.symmetric_difference(self._override_dirs).difference(self._guilds))
+        self._override_dirs = override_dirs
+        for guild_id in stale:
+            self._guilds.pop(guild_id, None)
+            self._changed(guild_id)
+        return stale
+
+    def check_guilds(self):
+        """Drop cached guild overrides whose files changed"""
+        return self.apply_guild_scan(*self.scan_guilds(list(self._guilds)))
+
+    def start_watcher(self, interval=2.0):
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.get_running_loop().create_task(self._watch(interval))
+
+    async def _watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            scan = await asyncio.to_thread(self.scan_templates)
+            changed = self.apply_template_scan(*scan)
+            if changed:
+                logging.info(f"Reloaded templates: {', '.join(changed)}")
+            scan = await asyncio.to_thread(self.scan_guilds, list(self._guilds))
+            self.apply_guild_scan(*scan)
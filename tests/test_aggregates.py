@@ -0,0 +1,93 @@
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregates import CashoutAggregates
+from ledger import CashoutLedger
+
+
+SHARD_COUNT = 2
+# Guild ids whose shard, (id >> 22) % 2, is 0 and 1.
+GUILD_A = 10 << 22
+GUILD_B = 11 << 22
+
+
+class Worker:
+    """One cluster worker: its own ledger connection and aggregates"""
+
+    def __init__(self, tmp_path, shard_id):
+        self.ledger = CashoutLedger(str(tmp_path / "ledger.db"))
+        self.aggregates = CashoutAggregates(
+            str(tmp_path / "aggregates.json"), shard_ids=[shard_id], shard_count=SHARD_COUNT
+        )
+        self.aggregates.restore(self.ledger)
+        self.ledger.subscribe(self.aggregates.apply_row)
+
+    def record(self, guild_id, paid):
+        # No running loop: the ledger writes each row straight away.
+        self.ledger.record(guild_id, 1, "Player", "$tag", Decimal(paid), Decimal(paid), 0, 0, Decimal(paid))
+
+    def paid(self, guild_id):
+        return self.aggregates.summary(guild_id)["paid"]
+
+    def stop(self):
+        self.aggregates.snapshot_now(self.ledger)
+        self.ledger.close()
+
+
+def test_workers_keep_separate_snapshots(tmp_path):
+    a = Worker(tmp_path, 0)
+    b = Worker(tmp_path, 1)
+    assert a.aggregates.path != b.aggregates.path
+
+    b.record(GUILD_B, 100)
+    a.record(GUILD_A, 50)
+    b.stop()
+    a.stop()
+
+    b = Worker(tmp_path, 1)
+    assert b.paid(GUILD_B) == 10000
+    assert b.paid(GUILD_A) == 0
+    a = Worker(tmp_path, 0)
+    assert a.paid(GUILD_A) == 5000
+    assert a.paid(GUILD_B) == 0
+    a.stop()
+    b.stop()
+
+
+def test_restart_replays_own_rows_written_after_another_workers(tmp_path):
+    a = Worker(tmp_path, 0)
+    b = Worker(tmp_path, 1)
+
+    a.record(GUILD_A, 50)
+    b.record(GUILD_B, 100)
+    # b's snapshot watermark must not cover a's later rows, nor a's b's.
+    b.stop()
+    a.record(GUILD_A, 25)
+    b = Worker(tmp_path, 1)
+    b.record(GUILD_B, 10)
+    a.stop()
+
+    a = Worker(tmp_path, 0)
+    assert a.paid(GUILD_A) == 7500
+    b.stop()
+    b = Worker(tmp_path, 1)
+    assert b.paid(GUILD_B) == 11000
+    a.stop()
+    b.stop()
+
+
+def test_crash_without_snapshot_replays_owned_rows_only(tmp_path):
+    a = Worker(tmp_path, 0)
+    b = Worker(tmp_path, 1)
+    a.record(GUILD_A, 50)
+    b.record(GUILD_B, 100)
+    a.ledger.close()
+    b.ledger.close()
+
+    a = Worker(tmp_path, 0)
+    assert a.paid(GUILD_A) == 5000
+    assert a.paid(GUILD_B) == 0
+    a.stop()
@@ -0,0 +1,57 @@
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amounts import AmountError, parse_amount, parse_tip_game
+
+
+@pytest.mark.parametrize("text, tip, game", [
+    ("", "0", "0"),
+    ("10", "10", "0"),
+    ("10,5", "10", "5"),
+    ("10, 5", "10", "5"),
+    ("10 5", "10", "5"),
+    ("10,5000", "10", "5000"),
+    ("1,500, 20", "1500", "20"),
+    ("$1,500 20", "1500", "20"),
+    ("tip=10 game=5", "10", "5"),
+    ("game: $5 tip: $1,000", "1000", "5"),
+])
+def test_tip_game(text, tip, game):
+    assert parse_tip_game(text) == (Decimal(tip), Decimal(game))
+
+
+@pytest.mark.parametrize("text", ["$1,500", "1,500", "$1,000.50", "10,500", "1,000,000"])
+def test_thousands_separator_is_not_split(text):
+    with pytest.raises(AmountError, match="ambiguous"):
+        parse_tip_game(text)
+
+
+@pytest.mark.parametrize("text, value", [
+    ("15", "15"),
+    ("$1,500", "1500"),
+    ("$1,500.50", "1500.50"),
+    ("2000.5", "2000.5"),
+    ("1.5k", "1500"),
+])
+def test_parse_amount(text, value):
+    assert parse_amount(text) == Decimal(value)
+
+
+@pytest.mark.parametrize("text", ["1,50", "1,5000", "$1,500.505", "15.", "12.345", "-5", "abc"])
+def test_parse_amount_rejects(text):
+    with pytest.raises(AmountError):
+        parse_amount(text)
+
+
+@pytest.mark.parametrize("text, reason", [
+    ("x tip 10", "before 'tip'"),
+    ("tip 10 Tip 5", "'tip' given more than once"),
+])
+def test_tip_game_rejects_labels(text, reason):
+    with pytest.raises(AmountError, match=reason):
+        parse_tip_game(text)
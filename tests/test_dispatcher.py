@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeChannel, FakeGuild
+from dispatcher import MAX_CONTENT_LENGTH, MessageDispatcher, split_content
+
+
+class Channel(FakeChannel):
+    def __init__(self):
+        super().__init__(FakeGuild("guild", channel_count=0), "posts")
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+        return await super().send(content, **kwargs)
+
+
+def test_split_content_prefers_line_breaks():
+    lines = ["x" * 1500, "y" * 1500, "z" * 10]
+    assert split_content("\n".join(lines)) == ["x" * 1500, "y" * 1500 + "\n" + "z" * 10]
+    assert split_content("a" * 4500) == ["a" * 2000, "a" * 2000, "a" * 500]
+
+
+def test_long_content_goes_out_as_several_messages():
+    channel = Channel()
+    content = "\n".join(f"line {i} " + "x" * 90 for i in range(60))
+
+    async def run():
+        dispatcher = MessageDispatcher(channel_rate=100, global_rate=100)
+        return await dispatcher.send(channel, content)
+
+    message = asyncio.run(run())
+    assert len(channel.sent) > 1
+    assert all(len(sent) <= MAX_CONTENT_LENGTH for sent in channel.sent)
+    assert "\n".join(channel.sent) == content
+    assert message.content == channel.sent[-1]
+
+
+def test_idle_queues_are_dropped_once_the_bucket_refills():
+    channel = Channel()
+
+    async def run():
+        dispatcher = MessageDispatcher(channel_rate=5, channel_per=0.05)
+        await asyncio.gather(*(dispatcher.send(channel, f"message {i}") for i in range(3)))
+        assert channel.id in dispatcher.queues
+        await asyncio.sleep(0.1)
+        assert dispatcher.queues == {}
+        await dispatcher.send(channel, "again")
+        return dispatcher
+
+    asyncio.run(run())
+    assert channel.sent[-1] == "again"
@@ -0,0 +1,32 @@
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+from dispatcher import MAX_CONTENT_LENGTH
+from ledger import CashoutLedger
+
+
+def test_pages_stay_under_the_limit_and_cover_every_row(tmp_path):
+    ledger = CashoutLedger(str(tmp_path / "ledger.db"))
+    row = (1, time.time(), 42, "Maria Lopez", "maria lopez", "$pablolose2", "$pablolose2",
+           150000, 1000000, 5000, 2500, 992500)
+    ledger._write([row] * 60)
+
+    async def pages():
+        seen = []
+        before_id = None
+        while True:
+            rows, next_id = await ledger.history(1, before_id=before_id, limit=25)
+            content, before_id = bot.format_history_page(rows, "guild", next_id)
+            assert len(content) <= MAX_CONTENT_LENGTH
+            seen.extend(row["id"] for row in rows if f"`#{row['id']}`" in content)
+            if before_id is None:
+                return seen
+
+    seen = asyncio.run(pages())
+    ledger.close()
+    assert seen == list(range(60, 0, -1))
@@ -0,0 +1,57 @@
+import asyncio
+import io
+import os
+import sys
+from types import SimpleNamespace
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cashout_import
+from cashout_import import ImportStatus
+from benchmarks.fakes import FakeChannel, FakeGuild, FakeInteraction, FakeUser
+
+
+class Interaction(FakeInteraction):
+    def __init__(self, token_valid=True):
+        guild = FakeGuild("guild", channel_count=0)
+        super().__init__(FakeUser("operator"), FakeChannel(guild, "commands"))
+        self.token_valid = token_valid
+        self.edits = []
+
+    async def edit_original_response(self, content=None, attachments=()):
+        if not self.token_valid:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"),
+                                   {"code": 50027, "message": "Invalid Webhook Token"})
+        self.edits.append(content)
+
+
+def test_edits_the_response_while_the_token_is_good():
+    interaction = Interaction()
+    status = ImportStatus(interaction)
+    asyncio.run(status.update("progress"))
+    assert interaction.edits == ["progress"]
+    assert interaction.channel.sent_count == 0
+
+
+def test_moves_to_a_channel_message_when_an_edit_fails():
+    interaction = Interaction(token_valid=False)
+    status = ImportStatus(interaction)
+
+    async def run():
+        await status.update("progress")
+        report = discord.File(io.BytesIO(b"line,error\n"), filename="import_errors.csv")
+        await status.update("done", [report])
+
+    asyncio.run(run())
+    assert interaction.channel.sent_count == 1
+    assert status.message.content == f"{interaction.user.mention} done"
+
+
+def test_stops_editing_the_response_before_the_token_expires():
+    interaction = Interaction()
+    status = ImportStatus(interaction, age=cashout_import.TOKEN_LIFETIME)
+    asyncio.run(status.update("progress"))
+    assert interaction.edits == []
+    assert interaction.channel.last_message.content == f"{interaction.user.mention} progress"
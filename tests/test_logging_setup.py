@@ -0,0 +1,50 @@
+import io
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import jsonlog
+import main
+
+
+@pytest.fixture
+def restore_root():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    jsonlog.stop_logging()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_settings_are_read_when_logging_is_set_up(monkeypatch, restore_root):
+    monkeypatch.setenv("LOG_LEVEL", "WARNING")
+    monkeypatch.setenv("LOG_DEBUG_SAMPLE", "7")
+    jsonlog.setup_logging(stream=io.StringIO())
+    assert restore_root.level == logging.WARNING
+    assert jsonlog.debug_sampler.every == 7
+
+
+def test_main_loads_dotenv_before_logging(monkeypatch):
+    monkeypatch.delenv("LOG_LEVEL", raising=False)
+    seen = []
+
+    def load_dotenv():
+        monkeypatch.setenv("LOG_LEVEL", "ERROR")
+
+    def setup_logging():
+        seen.append(os.environ.get("LOG_LEVEL"))
+        raise SystemExit
+
+    monkeypatch.setattr(main, "load_dotenv", load_dotenv)
+    monkeypatch.setattr(main, "setup_logging", setup_logging)
+    with pytest.raises(SystemExit):
+        main.main([])
+    assert seen == ["ERROR"]
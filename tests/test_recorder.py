@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeChannel, FakeGuild, FakeMessage, FakeUser
+from persistence import shard_path
+from recorder import Anonymizer, EventRecorder, read_recording
+
+
+BOT_ID = 12345
+
+
+def channel():
+    return FakeChannel(FakeGuild("guild", channel_count=0), "chat")
+
+
+def test_long_digit_runs_are_not_kept_as_amounts():
+    text = Anonymizer().text("card is 4111111111111111 call 5551234567 tip $1,500 10,")
+    assert "4111111111111111" not in text
+    assert "5551234567" not in text
+    assert text.endswith("tip $1,500 10,")
+
+
+def test_unhandled_messages_keep_only_their_shape(tmp_path):
+    path = str(tmp_path / "events.jsonl.gz")
+    recorder = EventRecorder(path, keep_words=("cashout",))
+    recorder.message(FakeMessage("card is 4111111111111111", FakeUser("member"), channel()), BOT_ID,
+                     handled=False)
+    recorder.message(FakeMessage(f"<@{BOT_ID}> cashout\n15", FakeUser("staff"), channel()), BOT_ID)
+    recorder.flush_now()
+
+    chatter, mention = read_recording(path)
+    assert "content" not in chatter
+    assert (chatter["length"], chatter["words"]) == (24, 3)
+    assert mention["content"] == "<@BOT> cashout\n15"
+
+
+def test_sampling_comes_before_anonymizing(tmp_path):
+    recorder = EventRecorder(str(tmp_path / "events.jsonl.gz"), sample_rate=0.0)
+    calls = []
+    recorder.anonymizer.text = lambda *args: calls.append(args)
+    recorder.message(FakeMessage(f"<@{BOT_ID}> cashout", FakeUser("staff"), channel()), BOT_ID)
+    assert calls == []
+    assert recorder.recorded == 0
+
+
+def test_workers_record_to_their_own_files(tmp_path):
+    path = str(tmp_path / "events.jsonl.gz")
+    first = EventRecorder()
+    first.open(shard_path(path, [0, 1], 4))
+    second = EventRecorder()
+    second.open(shard_path(path, [2, 3], 4))
+    first.flush_now()
+    second.flush_now()
+    assert sorted(os.listdir(tmp_path)) == ["events.jsonl.shards-0-1-of-4.gz", "events.jsonl.shards-2-3-of-4.gz"]
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from discord import app_commands
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregates import CashoutAggregates
+from benchmarks.harness import World, import_bot
+from dispatcher import MAX_CONTENT_LENGTH
+
+
+@pytest.fixture
+def world(tmp_path, monkeypatch):
+    bot = import_bot(str(tmp_path))
+    monkeypatch.setattr(bot, "aggregates", CashoutAggregates(str(tmp_path / "aggregates.json")))
+    yield World(bot)
+    bot.bot_settings.close()
+
+
+def test_grouped_summary_fits_in_one_message(world):
+    bot = world.bot
+    for operator_id in range(10**17, 10**17 + 40):
+        bot.aggregates.apply_row((world.guild.id, time.time(), operator_id, "Player", "player",
+                                  "$tag", "$tag", 1234567, 98765432, 125050, 75025, 98565357))
+    interaction = world.interaction()
+    group_by = app_commands.Choice(name="Operator", value="operator")
+    asyncio.run(bot.cashout_summary.callback(interaction, 1, group_by))
+
+    content = interaction.response.last_content
+    assert len(content) <= MAX_CONTENT_LENGTH
+    shown = content.count("\n• ")
+    assert 10 < shown < 40
+    assert content.endswith(f"…and {40 - shown} more")
+
+
+@pytest.fixture
+def many_templates(world, tmp_path, monkeypatch):
+    template_bot = world.bot.TemplateBot(str(tmp_path / "templates"))
+    for i in range(150):
+        template_bot.register_template(f"template_{i:03d}", "{value}", ["value"],
+                                       description=f"Posts announcement number {i}", aliases=[f"t{i}"])
+    monkeypatch.setattr(world.bot, "template_bot", template_bot)
+    return template_bot
+
+
+def test_help_fits_in_one_message(world, many_templates):
+    interaction = world.interaction()
+    asyncio.run(world.bot.slash_help.callback(interaction))
+    content = interaction.response.last_content
+    assert len(content) <= MAX_CONTENT_LENGTH
+    assert "more, search them with `/template`" in content
+    assert "`/cashout_summary`" in content
+
+
+def test_template_list_fits_in_one_message(world, many_templates):
+    interaction = world.interaction()
+    asyncio.run(world.bot.slash_templates.callback(interaction))
+    content = interaction.response.last_content
+    assert len(content) <= MAX_CONTENT_LENGTH
+    assert "more, search them with `/template`" in content
+
+
+def test_stats_fit_in_one_message(world, monkeypatch):
+    import cluster
+
+    bot = world.bot
+    shards = [{"shard_id": i, "latency": 0.0423, "closed": False, "ratelimited": False, "guilds": 2500}
+              for i in range(64)]
+    monkeypatch.setattr(cluster, "shard_status", lambda _: shards)
+    for stats in bot.metrics.handlers.values():
+        stats.calls += 123456
+        stats.errors += 12
+        for latency in (0.0012, 0.0345, 0.789):
+            stats.latency.observe(latency)
+    interaction = world.interaction()
+    asyncio.run(bot.bot_stats.callback(interaction))
+
+    content = interaction.response.last_content
+    assert len(content) <= MAX_CONTENT_LENGTH
+    assert "more shards" in content
+    assert "**Send queue:**" in content
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import World, import_bot
+
+
+@pytest.fixture
+def world(tmp_path):
+    bot = import_bot(str(tmp_path))
+    yield World(bot)
+    bot.bot_settings.close()
+
+
+def test_cashout_is_refused_and_not_posted(world):
+    interaction = world.interaction()
+    asyncio.run(world.bot.slash_template.callback(interaction, "cashout", "Maria|15|$tag|100|10|5|85"))
+    assert "/cashout" in interaction.response.last_content
+    assert world.response_channel.sent_count == 0
+
+
+def test_other_templates_are_posted(world):
+    world.bot.template_bot.register_template("notice", "Notice: {text}", ["text"])
+    interaction = world.interaction()
+
+    async def run():
+        await world.bot.slash_template.callback(interaction, "notice", "closing early")
+        while world.bot.dispatcher.stats()["queue_depth"]:
+            await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert interaction.response.last_content.startswith("✅ Template posted")
+    assert world.response_channel.last_content == "Notice: closing early"
@@ -0,0 +1,19 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from template_index import TemplateIndex
+
+
+INDEX = TemplateIndex({"cashout": "cashout", "deposit": "deposit", "co": "cashout"})
+
+
+def test_one_edit_is_suggested_at_either_distance():
+    assert INDEX.suggest("cashuot", max_distance=1) == ["cashout"]
+    assert INDEX.suggest("cashuot") == ["cashout"]
+
+
+def test_two_edits_only_when_asked_for():
+    assert INDEX.suggest("kashoutt", max_distance=1) == []
+    assert INDEX.suggest("kashoutt", max_distance=2) == ["cashout"]
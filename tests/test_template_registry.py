@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import template_registry
+from template_registry import TemplateRegistry
+
+
+def write_template(directory, name, body):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{name}.template").write_text(f"fields: value\n---\n{body}", encoding="utf-8")
+
+
+def test_guilds_without_overrides_skip_the_disk(tmp_path, monkeypatch):
+    write_template(tmp_path, "greet", "hi {value}")
+    write_template(tmp_path / "guilds" / "7", "greet", "hey {value}")
+    registry = TemplateRegistry(str(tmp_path), max_guilds=2)
+
+    scanned = []
+    scan = template_registry._scan
+    monkeypatch.setattr(template_registry, "_scan", lambda directory: scanned.append(directory) or scan(directory))
+    for guild_id in range(100, 110):
+        assert registry.get("greet", guild_id).source == "hi {value}"
+    assert scanned == []
+    assert registry.get("greet", 7).source == "hey {value}"
+    assert len(scanned) == 1
+
+
+def test_watcher_scan_picks_up_new_and_removed_override_directories(tmp_path):
+    write_template(tmp_path, "greet", "hi {value}")
+    registry = TemplateRegistry(str(tmp_path))
+    changed = []
+    registry.subscribe(changed.append)
+    assert registry.get("greet", 7).source == "hi {value}"
+
+    write_template(tmp_path / "guilds" / "7", "greet", "hey {value}")
+    assert registry.check_guilds() == [7]
+    assert registry.get("greet", 7).source == "hey {value}"
+
+    os.remove(tmp_path / "guilds" / "7" / "greet.template")
+    os.rmdir(tmp_path / "guilds" / "7")
+    assert registry.check_guilds() == [7]
+    assert registry.get("greet", 7).source == "hi {value}"
+    assert changed == [7, 7]
+
+
+def test_render_of_a_removed_template_is_not_found(tmp_path):
+    import bot
+
+    write_template(tmp_path, "greet", "hi {value}")
+    template_bot = bot.TemplateBot(str(tmp_path))
+    assert template_bot.render_post("greet", {"value": "you"}) == ("hi you", None)
+
+    os.remove(tmp_path / "greet.template")
+    template_bot.registry.reload()
+    assert template_bot.render_post("greet", {"value": "you"}) is None
+    assert template_bot.fill_template("greet", {"value": "you"}) is None
+
+
+def test_watcher_reads_global_templates_off_the_loop(tmp_path, monkeypatch):
+    write_template(tmp_path, "greet", "hi {value}")
+    registry = TemplateRegistry(str(tmp_path))
+    scanned_on = []
+    scan = template_registry._scan
+    monkeypatch.setattr(template_registry, "_scan",
+                        lambda directory: scanned_on.append(threading.current_thread()) or scan(directory))
+    changed = []
+    registry.subscribe(changed.append)
+
+    async def run():
+        registry.start_watcher(interval=0)
+        write_template(tmp_path, "bye", "bye {value}")
+        while not changed:
+            await asyncio.sleep(0.01)
+        registry._watch_task.cancel()
+
+    asyncio.run(run())
+    assert registry.get("bye").source == "bye {value}"
+    assert changed[0] is None
+    assert scanned_on and threading.main_thread() not in scanned_on
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+
+class ViewCache:
+    """Rendered per-guild views (help, template list, settings), built on demand.
+
+    Entries are grouped by guild and dropped as a whole by ``invalidate``
+    when anything they were built from changes. At most ``max_guilds``
+    guilds are kept; the least recently used one is evicted first.
+    """
+
+    def __init__(self, max_guilds=1024):
+        self.max_guilds = max_guilds
+        self._guilds = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, guild_id, view, build):
+        """The cached ``view`` for a guild, calling ``build()`` on a miss"""
+        key = int(guild_id)
+        views = self._guilds.get(key)
+        if views is None:
+            views = self._guilds[key] = {}
+            if len(self._guilds) > self.max_guilds:
+                self._guilds.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._guilds.move_to_end(key)
+            rendered = views.get(view)
+            if rendered is not None:
+                self.hits += 1
+                return rendered
+
+        self.misses += 1
+        rendered = views[view] = build()
+        return rendered
+
+    def invalidate(self, guild_id=None):
+        """Forget one guild's views, or every guild's without an id"""
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(int(guild_id), None)
+
+    def stats(self):
+        return {
+            "guilds": len(self._guilds),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }